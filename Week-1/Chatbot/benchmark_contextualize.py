@@ -0,0 +1,53 @@
+"""
+Per-turn LLM calls and latency with and without rewrite skipping.
+
+Replays scripted conversations through ``conversational_rag_query`` twice:
+once rewriting every turn, the first included (the notebook's behaviour), and
+once with the reference detector deciding. Needs OPENAI_API_KEY and an
+ingested collection.
+
+    python benchmark_contextualize.py
+"""
+import json
+
+import chat_rag
+from vector_store import get_collection
+
+CONVERSATIONS = [
+    [
+        "Give me summary about NovaCore Solutions?",
+        "What products does NovaCore Solutions offer?",
+        "Who are its main customers?",
+        "What are the office working hours at NovaCore Solutions?",
+        "And on Fridays?",
+    ],
+    [
+        "What is the leave policy for employees?",
+        "How many sick days do employees get per year?",
+        "Can they be carried over?",
+        "What is the dress code policy?",
+        "What about remote days?",
+    ],
+]
+
+
+def run(mode: str, collection) -> dict:
+    chat_rag.CONTEXTUALIZE_MODE = mode
+    chat_rag.turn_log.clear()
+    chat_rag.rewrite_cache = chat_rag.RewriteCache()
+    for turns in CONVERSATIONS:
+        session_id = chat_rag.create_session()
+        for query in turns:
+            chat_rag.conversational_rag_query(collection, query, session_id)
+        chat_rag.conversations.pop(session_id, None)
+    return chat_rag.get_turn_report()
+
+
+def main():
+    collection = get_collection()
+    results = {mode: run(mode, collection) for mode in ["always", "auto"]}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
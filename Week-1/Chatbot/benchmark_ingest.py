@@ -0,0 +1,90 @@
+"""
+Ingestion benchmark on a synthetic corpus.
+
+Writes ``--docs`` synthetic policy documents and ingests them three times,
+each into a fresh Chroma directory except the last:
+
+1. the notebook's sequential loop (read, split, ``collection.add`` in
+   batches of 100 through the embedding function);
+2. ``ingest.process_and_add_documents`` (parallel parsing, batched
+   embedding, manifest);
+3. the same pipeline again, where every file is unchanged and skipped.
+
+    python benchmark_ingest.py --docs 3000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import chromadb
+
+from ingest import get_model, process_and_add_documents, read_document, split_text
+from vector_store import get_embedding_function
+
+TOPICS = ["leave", "remote work", "expenses", "travel", "security", "onboarding", "benefits", "conduct"]
+SENTENCES = [
+    "Employees must submit {topic} requests through the HR portal at least {n} days in advance.",
+    "Managers review {topic} exceptions within {n} business days of the request.",
+    "The {topic} policy applies to full-time staff and contractors after {n} months of service.",
+    "Questions about {topic} should be sent to the people operations team.",
+    "Violations of the {topic} guidelines may lead to disciplinary action after {n} warnings.",
+]
+
+
+def write_corpus(folder: str, docs: int, sentences_per_doc: int = 40, seed: int = 7):
+    rng = random.Random(seed)
+    for i in range(docs):
+        topic = rng.choice(TOPICS)
+        text = " ".join(rng.choice(SENTENCES).format(topic=topic, n=rng.randint(1, 30))
+                        for _ in range(sentences_per_doc))
+        with open(os.path.join(folder, f"policy_{i:05d}.txt"), "w", encoding="utf-8") as file:
+            file.write(text)
+
+
+def sequential_ingest(collection, folder: str):
+    """The notebook's loop: one file at a time, 100-chunk adds through the embedding function"""
+    for name in sorted(os.listdir(folder)):
+        chunks = split_text(read_document(os.path.join(folder, name)))
+        ids = [f"{name}_chunk_{i}" for i in range(len(chunks))]
+        metadatas = [{"source": name, "chunk": i} for i in range(len(chunks))]
+        for i in range(0, len(chunks), 100):
+            collection.add(documents=chunks[i:i + 100], metadatas=metadatas[i:i + 100], ids=ids[i:i + 100])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=3000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        corpus = os.path.join(root, "corpus")
+        os.makedirs(corpus)
+        write_corpus(corpus, args.docs)
+        model = get_model()
+
+        baseline = chromadb.PersistentClient(path=os.path.join(root, "baseline")).get_or_create_collection(
+            "bench", embedding_function=get_embedding_function())
+        start = time.perf_counter()
+        sequential_ingest(baseline, corpus)
+        sequential = time.perf_counter() - start
+
+        pipeline = chromadb.PersistentClient(path=os.path.join(root, "pipeline")).get_or_create_collection(
+            "bench", embedding_function=get_embedding_function())
+        manifest = os.path.join(root, "pipeline", "manifest.json")
+        first = process_and_add_documents(pipeline, corpus, manifest, args.workers, args.batch_size, model)
+        rerun = process_and_add_documents(pipeline, corpus, manifest, args.workers, args.batch_size, model)
+
+    print(f"{'run':<28} {'seconds':>9} {'docs/s':>9}")
+    for label, seconds in [("sequential (notebook)", sequential),
+                           ("parallel + batched", first["seconds"]),
+                           ("re-run, all unchanged", rerun["seconds"])]:
+        print(f"{label:<28} {seconds:>9.2f} {args.docs / seconds:>9.1f}")
+    print(f"chunks: {first['chunks']}, skipped on re-run: {rerun['unchanged']}/{args.docs}")
+
+
+if __name__ == "__main__":
+    main()
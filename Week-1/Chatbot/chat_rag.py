@@ -0,0 +1,294 @@
+"""
+Conversational RAG for the document chatbot (the notebook's chat loop as a module).
+
+Follow-up questions are rewritten into standalone queries before retrieval,
+but only when they need it. ``needs_contextualization`` is a cheap check
+for pronouns and elliptical follow-ups ("what about...", "and for
+managers?"). Self-contained questions, and every first turn, go straight
+to retrieval (``CONTEXTUALIZE_MODE=always`` rewrites every turn instead). Rewrites use a smaller model (``CONTEXTUALIZE_MODEL``) and
+are cached per question and recent history. Every turn's LLM calls and
+latency are recorded for ``get_turn_report``.
+
+    python chat_rag.py               # chat with rewrite skipping
+    python chat_rag.py --always-rewrite
+"""
+import argparse
+import hashlib
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from openai import OpenAI
+
+from vector_store import get_collection, get_context_with_sources, semantic_search
+
+load_dotenv()
+
+ANSWER_MODEL = os.getenv("ANSWER_MODEL", "gpt-4o")
+# Rewrites are short and mechanical, so a smaller model is enough
+CONTEXTUALIZE_MODEL = os.getenv("CONTEXTUALIZE_MODEL", "gpt-4o-mini")
+# "auto": rewrite only follow-ups that reference earlier turns; "always": every turn, the first included
+CONTEXTUALIZE_MODE = os.getenv("CONTEXTUALIZE_MODE", "auto")
+REWRITE_CACHE_SIZE = int(os.getenv("REWRITE_CACHE_SIZE", "1024"))
+
+client = OpenAI()
+
+
+# ──────────────────────────────────────────────── Sessions ───
+# In-memory conversation store
+conversations: Dict[str, List[Dict]] = {}
+
+
+def create_session() -> str:
+    """Create a new conversation session"""
+    session_id = str(uuid.uuid4())
+    conversations[session_id] = []
+    return session_id
+
+
+def add_message(session_id: str, role: str, content: str):
+    """Add a message to the conversation history"""
+    conversations.setdefault(session_id, []).append({
+        "role": role,
+        "content": content,
+        "timestamp": datetime.now().isoformat()
+    })
+
+
+def get_conversation_history(session_id: str, max_messages: int = None) -> List[Dict]:
+    """Get conversation history for a session"""
+    history = conversations.get(session_id, [])
+    return history[-max_messages:] if max_messages else history
+
+
+def format_history_for_prompt(session_id: str, max_messages: int = 5) -> str:
+    """Format conversation history for inclusion in prompts"""
+    return "\n\n".join(
+        f"{'Human' if msg['role'] == 'user' else 'Assistant'}: {msg['content']}"
+        for msg in get_conversation_history(session_id, max_messages)
+    )
+
+
+# ──────────────────────────────────────────────── Contextualization ───
+# Words that point back at something said earlier
+# (all-caps "IT" is the department, not a pronoun)
+REFERENCE_WORDS = re.compile(
+    r"\b(?!(?-i:IT)\b)(it|its|it's|they|them|their|theirs|this|that|these|those|he|him|his|she|her|hers|"
+    r"there|then|former|latter|above|same|such|one|ones|else|another|other|more|again)\b",
+    re.IGNORECASE,
+)
+# Openers of elliptical follow-ups ("What about contractors?", "And for interns?")
+FOLLOW_UP_OPENERS = re.compile(
+    r"^\s*(what|how) about\b|^\s*(and|also|but|or|so|why|how come|what if|in that case)\b",
+    re.IGNORECASE,
+)
+# Questions this short rarely stand on their own ("Why?", "For how long?")
+MIN_STANDALONE_WORDS = 4
+
+
+def needs_contextualization(query: str, conversation_history: str) -> bool:
+    """True if the query likely depends on earlier turns and should be rewritten"""
+    if CONTEXTUALIZE_MODE == "always":
+        return True
+    if not conversation_history.strip():
+        return False
+    return bool(
+        REFERENCE_WORDS.search(query)
+        or FOLLOW_UP_OPENERS.search(query)
+        or len(query.split()) < MIN_STANDALONE_WORDS
+    )
+
+
+class RewriteCache:
+    """Bounded LRU of rewritten queries keyed by the question and the history it was rewritten against"""
+
+    def __init__(self, max_size: int = REWRITE_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(query: str, conversation_history: str) -> str:
+        normalized = " ".join(query.lower().split())
+        return hashlib.sha256(f"{conversation_history}\x00{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, query: str, conversation_history: str) -> Optional[str]:
+        key = self.key(query, conversation_history)
+        rewritten = self._entries.get(key)
+        if rewritten is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return rewritten
+
+    def put(self, query: str, conversation_history: str, rewritten: str):
+        key = self.key(query, conversation_history)
+        self._entries[key] = rewritten
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+rewrite_cache = RewriteCache()
+
+
+def contextualize_query(query: str, conversation_history: str, client: OpenAI,
+                        model: str = CONTEXTUALIZE_MODEL) -> str:
+    """Convert follow-up questions into standalone queries"""
+    contextualize_prompt = """Given a chat history and the latest user question
+    which might reference context in the chat history, formulate a standalone
+    question which can be understood without the chat history. Do NOT answer
+    the question, just reformulate it if needed and otherwise return it as is."""
+
+    try:
+        completion = client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": contextualize_prompt},
+                {"role": "user", "content": f"Chat history:\n{conversation_history}\n\nQuestion:\n{query}"}
+            ],
+            temperature=0,
+            max_tokens=100
+        )
+        return completion.choices[0].message.content
+    except Exception as e:
+        print(f"Error contextualizing query: {str(e)}")
+        return query  # Fallback to original query
+
+
+# ──────────────────────────────────────────────── Generation ───
+def get_prompt(context: str, conversation_history: str, query: str) -> str:
+    """Generate a prompt combining context, history, and query"""
+    return f"""Based on the following context and conversation history,
+    please provide a relevant and contextual response. If the answer cannot
+    be derived from the context, only use the conversation history or say
+    "I cannot answer this based on the provided information."
+
+    Context from documents:
+    {context}
+
+    Previous conversation:
+    {conversation_history}
+
+    Human: {query}
+
+    Assistant:"""
+
+
+def generate_response(query: str, context: str, conversation_history: str = "") -> str:
+    """Generate a response using OpenAI with conversation history"""
+    response = client.chat.completions.create(
+        model=ANSWER_MODEL,
+        messages=[{"role": "system", "content": get_prompt(context, conversation_history, query)}],
+        temperature=0,
+        max_tokens=500
+    )
+    return response.choices[0].message.content
+
+
+# ──────────────────────────────────────────────── Per-turn metrics ───
+# Most recent turns kept for the report
+turn_log: Deque[Dict] = deque(maxlen=1000)
+
+
+def get_turn_report() -> Dict:
+    """LLM calls and latency per turn, and how often the rewrite was skipped"""
+    turns = len(turn_log)
+    if not turns:
+        return {"turns": 0}
+    latencies = sorted(t["latency_ms"] for t in turn_log)
+    return {
+        "turns": turns,
+        "llm_calls_per_turn": round(sum(t["llm_calls"] for t in turn_log) / turns, 2),
+        "rewrite_skipped_rate": round(sum(t["rewrite"] == "skipped" for t in turn_log) / turns, 2),
+        "rewrite_cache_hits": sum(t["rewrite"] == "cached" for t in turn_log),
+        "avg_latency_ms": round(sum(latencies) / turns, 2),
+        "p95_latency_ms": latencies[min(turns - 1, int(0.95 * turns))],
+        "avg_rewrite_ms": round(sum(t["rewrite_ms"] for t in turn_log) / turns, 2),
+    }
+
+
+# ──────────────────────────────────────────────── RAG ───
+def rag_query(collection, query: str, n_chunks: int = 2) -> Tuple[str, List[str]]:
+    """Perform RAG query: retrieve relevant chunks and generate answer"""
+    context, sources = get_context_with_sources(semantic_search(collection, query, n_chunks))
+    return generate_response(query, context), sources
+
+
+def conversational_rag_query(collection, query: str, session_id: str,
+                             n_chunks: int = 3) -> Tuple[str, List[str]]:
+    """Perform RAG query with conversation history"""
+    start = time.perf_counter()
+    conversation_history = format_history_for_prompt(session_id)
+    llm_calls = 0
+
+    # Handle follow up questions; self-contained ones skip the rewrite call
+    rewrite = "skipped"
+    if needs_contextualization(query, conversation_history):
+        cached = rewrite_cache.get(query, conversation_history)
+        if cached is not None:
+            rewrite = "cached"
+            standalone = cached
+        else:
+            rewrite = "llm"
+            standalone = contextualize_query(query, conversation_history, client)
+            llm_calls += 1
+            rewrite_cache.put(query, conversation_history, standalone)
+        query = standalone
+    rewrite_ms = (time.perf_counter() - start) * 1000
+
+    context, sources = get_context_with_sources(semantic_search(collection, query, n_chunks))
+    response = generate_response(query, context, conversation_history)
+    llm_calls += 1
+
+    add_message(session_id, "user", query)
+    add_message(session_id, "assistant", response)
+
+    turn_log.append({
+        "query": query,
+        "rewrite": rewrite,
+        "llm_calls": llm_calls,
+        "rewrite_ms": round(rewrite_ms, 2),
+        "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+    })
+    return response, sources
+
+
+def main():
+    global CONTEXTUALIZE_MODE
+    parser = argparse.ArgumentParser(description="Document chatbot")
+    parser.add_argument("--always-rewrite", action="store_true",
+                        help="rewrite every turn (previous behaviour), for comparison")
+    args = parser.parse_args()
+    if args.always_rewrite:
+        CONTEXTUALIZE_MODE = "always"
+
+    collection = get_collection()
+    print("🤖 Chatbot started. Type 'exit' to quit.\n")
+    session_id = create_session()
+
+    while True:
+        query = input("You: ")
+
+        if query.lower() in ["exit", "quit"]:
+            print("👋 Ending session...")
+            conversations.pop(session_id, None)
+            print("Turn metrics:", get_turn_report())
+            break
+
+        response, sources = conversational_rag_query(collection, query, session_id)
+        turn = turn_log[-1]
+        print("\nBot:", response)
+        print(f"[rewrite: {turn['rewrite']}, LLM calls: {turn['llm_calls']}, {turn['latency_ms']:.0f} ms]")
+        print("-" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Document ingestion for the chatbot (the notebook's ``process_and_add_documents`` as a module).
+
+- Files are hashed, read and chunked in a process pool (``PARSE_WORKERS``),
+  so PDF and DOCX parsing uses every core.
+- Files whose SHA-256 matches the manifest from the last run into the same
+  collection are not parsed or embedded again. Changed files have their old
+  chunks replaced, and deleted files have their chunks removed. The
+  manifest keeps one section per collection name.
+- Chunks from all files are embedded together in batches of
+  ``EMBED_BATCH_SIZE`` while parsing continues, then upserted with
+  precomputed embeddings. ``tune_batch_size`` picks the fastest batch size
+  for the local model.
+
+    python ingest.py Docs
+    python ingest.py Docs --tune
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import docx
+import PyPDF2
+from sentence_transformers import SentenceTransformer
+
+from vector_store import CHROMA_PATH, COLLECTION_NAME, EMBEDDING_MODEL, get_collection
+
+SUPPORTED_EXTENSIONS = {".txt", ".pdf", ".docx"}
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 1)))
+# Texts per model forward pass; see tune_batch_size
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+# Chunks embedded and upserted together
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "1024"))
+MANIFEST_PATH = os.getenv("INGEST_MANIFEST", os.path.join(CHROMA_PATH, "ingest_manifest.json"))
+
+
+# ──────────────────────────────────────────────── Reading ───
+def read_text_file(file_path: str) -> str:
+    """Read content from a text file"""
+    with open(file_path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def read_pdf_file(file_path: str) -> str:
+    """Read content from a PDF file"""
+    with open(file_path, "rb") as file:
+        return "".join(page.extract_text() + "\n" for page in PyPDF2.PdfReader(file).pages)
+
+
+def read_docx_file(file_path: str) -> str:
+    """Read content from a Word document"""
+    return "\n".join(paragraph.text for paragraph in docx.Document(file_path).paragraphs)
+
+
+def read_document(file_path: str) -> str:
+    """Read document content based on file extension"""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".txt":
+        return read_text_file(file_path)
+    if extension == ".pdf":
+        return read_pdf_file(file_path)
+    if extension == ".docx":
+        return read_docx_file(file_path)
+    raise ValueError(f"Unsupported file format: {extension}")
+
+
+def split_text(text: str, chunk_size: int = 500) -> List[str]:
+    """Split text into chunks while preserving sentence boundaries"""
+    chunks = []
+    current_chunk = []
+    current_size = 0
+
+    for sentence in text.replace("\n", " ").split(". "):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        # Ensure proper sentence ending
+        if not sentence.endswith("."):
+            sentence += "."
+
+        # Check if adding this sentence would exceed chunk size
+        if current_size + len(sentence) > chunk_size and current_chunk:
+            chunks.append(" ".join(current_chunk))
+            current_chunk = [sentence]
+            current_size = len(sentence)
+        else:
+            current_chunk.append(sentence)
+            current_size += len(sentence)
+
+    if current_chunk:
+        chunks.append(" ".join(current_chunk))
+    return chunks
+
+
+def file_hash(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def parse_file(job: Tuple[str, Optional[str]]) -> Tuple[str, str, Optional[List[str]], Optional[str]]:
+    """
+    Worker: ``(path, previous hash)`` -> ``(path, hash, chunks, error)``.
+    ``chunks`` is None when the file is unchanged since the last run.
+    """
+    file_path, previous_hash = job
+    try:
+        digest = file_hash(file_path)
+        if digest == previous_hash:
+            return file_path, digest, None, None
+        return file_path, digest, split_text(read_document(file_path)), None
+    except Exception as e:
+        return file_path, "", [], f"{type(e).__name__}: {e}"
+
+
+# ──────────────────────────────────────────────── Manifest ───
+def _read_manifest(path: str) -> Dict[str, Dict[str, str]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as file:
+        manifest = json.load(file)
+    if manifest and all(isinstance(value, str) for value in manifest.values()):
+        # Written before the manifest had per-collection sections, always for the default collection
+        return {COLLECTION_NAME: manifest}
+    return manifest
+
+
+def load_manifest(collection_name: str = COLLECTION_NAME, path: str = MANIFEST_PATH) -> Dict[str, str]:
+    """File name -> SHA-256 of the version already in the collection"""
+    return dict(_read_manifest(path).get(collection_name, {}))
+
+
+def save_manifest(manifest: Dict[str, str], collection_name: str = COLLECTION_NAME, path: str = MANIFEST_PATH):
+    sections = _read_manifest(path)
+    sections[collection_name] = manifest
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(sections, file, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+# ──────────────────────────────────────────────── Embedding ───
+_models: Dict[str, SentenceTransformer] = {}
+
+
+def get_model(model_name: str = EMBEDDING_MODEL) -> SentenceTransformer:
+    """Same model the collection's embedding function uses, loaded once per process"""
+    if model_name not in _models:
+        _models[model_name] = SentenceTransformer(model_name)
+    return _models[model_name]
+
+
+def tune_batch_size(model: SentenceTransformer, sample: List[str],
+                    candidates: Iterable[int] = (16, 32, 64, 128, 256)) -> int:
+    """Encode ``sample`` at each batch size and return the fastest"""
+    model.encode(sample[:8])  # warm-up
+    best_size, best_rate = EMBED_BATCH_SIZE, 0.0
+    for size in candidates:
+        start = time.perf_counter()
+        model.encode(sample, batch_size=size)
+        rate = len(sample) / (time.perf_counter() - start)
+        print(f"  batch {size:>4}: {rate:8.1f} chunks/s")
+        if rate > best_rate:
+            best_size, best_rate = size, rate
+    return best_size
+
+
+def _flush(collection, model, batch_size: int, ids: List[str], texts: List[str], metadatas: List[Dict]):
+    if not texts:
+        return
+    embeddings = model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+    collection.upsert(ids=ids, documents=texts, metadatas=metadatas, embeddings=embeddings.tolist())
+    ids.clear()
+    texts.clear()
+    metadatas.clear()
+
+
+# ──────────────────────────────────────────────── Pipeline ───
+def list_documents(folder_path: str) -> List[str]:
+    return sorted(
+        os.path.join(folder_path, name) for name in os.listdir(folder_path)
+        if os.path.isfile(os.path.join(folder_path, name))
+        and os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS
+    )
+
+
+def process_and_add_documents(collection, folder_path: str, manifest_path: str = MANIFEST_PATH,
+                              workers: int = PARSE_WORKERS, batch_size: int = EMBED_BATCH_SIZE,
+                              model: Optional[SentenceTransformer] = None) -> Dict:
+    """Add new and changed documents in a folder to the collection; returns run statistics"""
+    start = time.perf_counter()
+    model = model or get_model()
+    manifest = load_manifest(collection.name, manifest_path)
+    files = list_documents(folder_path)
+    stats = {"files": len(files), "parsed": 0, "unchanged": 0, "failed": 0, "removed": 0, "chunks": 0}
+
+    # Chunks of files that no longer exist
+    present = {os.path.basename(path) for path in files}
+    for name in [name for name in manifest if name not in present]:
+        collection.delete(where={"source": name})
+        del manifest[name]
+        stats["removed"] += 1
+
+    ids: List[str] = []
+    texts: List[str] = []
+    metadatas: List[Dict] = []
+    jobs = [(path, manifest.get(os.path.basename(path))) for path in files]
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        # Results stream back in order while later files are still being parsed
+        for file_path, digest, chunks, error in pool.map(parse_file, jobs, chunksize=16):
+            file_name = os.path.basename(file_path)
+            if error:
+                print(f"Error processing {file_path}: {error}")
+                stats["failed"] += 1
+                continue
+            if chunks is None:
+                stats["unchanged"] += 1
+                continue
+
+            if file_name in manifest:
+                # Changed file: drop chunks the new version may not overwrite
+                collection.delete(where={"source": file_name})
+            ids.extend(f"{file_name}_chunk_{i}" for i in range(len(chunks)))
+            texts.extend(chunks)
+            metadatas.extend({"source": file_name, "chunk": i} for i in range(len(chunks)))
+            manifest[file_name] = digest
+            stats["parsed"] += 1
+            stats["chunks"] += len(chunks)
+
+            if len(texts) >= UPSERT_BATCH_SIZE:
+                _flush(collection, model, batch_size, ids, texts, metadatas)
+        _flush(collection, model, batch_size, ids, texts, metadatas)
+
+    save_manifest(manifest, collection.name, manifest_path)
+    stats["seconds"] = round(time.perf_counter() - start, 2)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest documents into the chatbot collection")
+    parser.add_argument("folder", nargs="?", default="Docs")
+    parser.add_argument("--workers", type=int, default=PARSE_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE)
+    parser.add_argument("--tune", action="store_true", help="pick the fastest embedding batch size first")
+    args = parser.parse_args()
+
+    batch_size = args.batch_size
+    if args.tune:
+        sample = [chunk for path in list_documents(args.folder)[:50]
+                  for chunk in split_text(read_document(path))][:512]
+        if sample:
+            batch_size = tune_batch_size(get_model(), sample)
+            print(f"Using embedding batch size {batch_size}")
+
+    stats = process_and_add_documents(get_collection(), args.folder, workers=args.workers, batch_size=batch_size)
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
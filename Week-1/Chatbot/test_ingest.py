@@ -0,0 +1,82 @@
+import numpy as np
+
+from ingest import load_manifest, process_and_add_documents
+
+
+class FakeCollection:
+    """In-memory stand-in for a Chroma collection: upsert and delete by source."""
+
+    def __init__(self, name):
+        self.name = name
+        self.chunks = {}
+        self.upserts = 0
+
+    def upsert(self, ids, documents, metadatas, embeddings):
+        self.upserts += 1
+        for chunk_id, text, metadata in zip(ids, documents, metadatas):
+            self.chunks[chunk_id] = (text, metadata)
+
+    def delete(self, where):
+        self.chunks = {k: v for k, v in self.chunks.items() if v[1]["source"] != where["source"]}
+
+
+class FakeModel:
+    def encode(self, texts, **kwargs):
+        return np.zeros((len(texts), 3), dtype=np.float32)
+
+
+def _ingest(collection, folder, manifest):
+    return process_and_add_documents(collection, str(folder), manifest_path=str(manifest),
+                                     workers=1, model=FakeModel())
+
+
+def test_unchanged_files_are_skipped(tmp_path):
+    """A second run over the same files parses and embeds nothing."""
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "leave.txt").write_text("Employees get 20 days of leave. Leave carries over.")
+    (docs / "hours.txt").write_text("Office hours are 9 to 5.")
+    manifest = tmp_path / "manifest.json"
+    collection = FakeCollection("documents")
+
+    first = _ingest(collection, docs, manifest)
+    second = _ingest(collection, docs, manifest)
+
+    assert first["parsed"] == 2
+    assert second["parsed"] == 0 and second["unchanged"] == 2
+    assert collection.upserts == 1
+
+
+def test_changed_file_replaces_its_chunks(tmp_path):
+    """An edited file's old chunks are dropped, even when the new version has fewer."""
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    policy = docs / "policy.txt"
+    policy.write_text(". ".join(f"Rule {i} is about topic {i} in some detail" for i in range(40)))
+    manifest = tmp_path / "manifest.json"
+    collection = FakeCollection("documents")
+
+    _ingest(collection, docs, manifest)
+    assert len(collection.chunks) > 1
+    policy.write_text("Rule 1 was replaced.")
+    stats = _ingest(collection, docs, manifest)
+
+    assert stats["parsed"] == 1
+    assert [text for text, _ in collection.chunks.values()] == ["Rule 1 was replaced."]
+
+
+def test_manifest_is_kept_per_collection(tmp_path):
+    """Files ingested into one collection are still ingested into another."""
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "leave.txt").write_text("Employees get 20 days of leave.")
+    manifest = tmp_path / "manifest.json"
+    first, second = FakeCollection("documents"), FakeCollection("documents_v2")
+
+    _ingest(first, docs, manifest)
+    stats = _ingest(second, docs, manifest)
+
+    assert stats["parsed"] == 1
+    assert len(second.chunks) == 1
+    assert set(load_manifest("documents", str(manifest))) == {"leave.txt"}
+    assert set(load_manifest("documents_v2", str(manifest))) == {"leave.txt"}
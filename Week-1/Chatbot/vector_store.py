@@ -0,0 +1,34 @@
+import os
+from typing import Dict, List, Tuple
+
+import chromadb
+from chromadb.utils import embedding_functions
+
+CHROMA_PATH = os.getenv("CHROMA_PATH", "chroma_db")
+COLLECTION_NAME = os.getenv("CHROMA_COLLECTION", "documents_collection")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+
+# ──────────────────────────────────────────────── Collection ───
+def get_embedding_function():
+    """Sentence transformer embeddings, as used by the notebook"""
+    return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=EMBEDDING_MODEL)
+
+
+def get_collection(path: str = CHROMA_PATH, name: str = COLLECTION_NAME):
+    """Create or get the persistent document collection"""
+    client = chromadb.PersistentClient(path=path)
+    return client.get_or_create_collection(name=name, embedding_function=get_embedding_function())
+
+
+# ──────────────────────────────────────────────── Retrieval ───
+def semantic_search(collection, query: str, n_results: int = 2) -> Dict:
+    """Perform semantic search on the collection"""
+    return collection.query(query_texts=[query], n_results=n_results)
+
+
+def get_context_with_sources(results: Dict) -> Tuple[str, List[str]]:
+    """Extract context and source information from search results"""
+    context = "\n\n".join(results["documents"][0])
+    sources = [f"{meta['source']} (chunk {meta['chunk']})" for meta in results["metadatas"][0]]
+    return context, sources
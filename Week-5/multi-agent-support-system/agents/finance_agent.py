@@ -1,8 +1,17 @@
+import asyncio
 from langchain.tools import tool
 from rag.finance_rag import load_finance_rag_chain
-from tools.tavily_tool import tavily_search
+from tools.tavily_tool import tavily_search, atavily_search
+from rag.context_packing import assemble_context
+from rag.prefetch import consume_warm_documents, take_prefetched, warm_documents
 from langchain.agents import create_agent
-from config import get_llm
+import deadline
+from deadline import DeadlineExceeded
+from langchain_core.messages import HumanMessage
+from prompt_cache import cacheable_system_prompt, record_agent_usage
+import time
+from agents import pipeline
+from config import get_llm, shared_resource
 
 
 def _fetch_docs_with_fallback(retriever, db, query):
@@ -22,6 +31,21 @@ def _fetch_docs_with_fallback(retriever, db, query):
     return []
 
 
+async def _afetch_docs(retriever, db, query):
+    """Async retrieval through the retriever, falling back to the vector store."""
+    try:
+        if hasattr(retriever, "ainvoke"):
+            return await retriever.ainvoke(query)
+
+        if hasattr(db, "asimilarity_search"):
+            return await db.asimilarity_search(query, k=4)
+
+    except Exception as e:
+        print(f"Exception: {e}")
+
+    return []
+
+
 @tool("internal_finance_search")
 def internal_finance_search(query: str) -> str:
     """
@@ -29,9 +53,11 @@ def internal_finance_search(query: str) -> str:
     reimbursements, budgets, and finance policies.
     """
     try:
-        retriever, db, _ = load_finance_rag_chain()
-        docs = _fetch_docs_with_fallback(retriever, db, query)
-        return "\n".join(d.page_content for d in docs) if docs else ""
+        docs = consume_warm_documents()
+        if docs is None:
+            retriever, db, _ = shared_resource("finance_rag", load_finance_rag_chain)
+            docs = deadline.call("retrieval", _fetch_docs_with_fallback, retriever, db, query)
+        return assemble_context(docs, separator="\n") if docs else ""
     except Exception:
         return ""
 
@@ -42,12 +68,13 @@ def web_search(query: str) -> str:
     return tavily_search(query)
 
 
+ROLE = "Finance Support Agent"
+REFUSAL = "I'm a Finance Support Agent and can only help with finance-related questions about company policies, payroll, expenses, reimbursements, and financial procedures."
 
-def finance_agent(state):
-    llm = get_llm()
-    query = state["query"] if isinstance(state, dict) else state
 
-    system_prompt = f"""You are a Finance Support Agent. The user has asked: "{query}"
+# Static system prompt: the query travels in the human message, so the whole
+# prompt is a stable prefix that Bedrock can cache
+SYSTEM_PROMPT = f"""You are a Finance Support Agent. Help the user with the question in their message.
 
 MANDATORY PROCESS - FOLLOW THIS EXACT ORDER:
 
@@ -59,11 +86,36 @@ STEP 5: Combine internal and external information if both were needed
 
 CRITICAL: You MUST use internal_finance_search first before considering web search. Never skip internal search.
 
-If the question is not finance-related, respond: "I'm a Finance Support Agent and can only help with finance-related questions about company policies, payroll, expenses, reimbursements, and financial procedures."
-
-Answer the user's question: "{query}"
+If the question is not finance-related, respond: "{REFUSAL}"
 """
 
+
+def _system_prompt():
+    return cacheable_system_prompt(SYSTEM_PROMPT)
+
+
+@deadline.scoped
+def finance_agent(state):
+    llm = get_llm()
+    query = state["query"] if isinstance(state, dict) else state
+
+    if pipeline.SPECIALIST_MODE == "pipeline":
+        with warm_documents(take_prefetched(query, "FINANCE")):
+            answer = pipeline.run_pipeline(
+                llm, query, ROLE, REFUSAL,
+                search=internal_finance_search.func,
+                web_search=tavily_search
+            )
+        return {
+            "query": query,
+            "route": "FINANCE",
+            "response": answer
+        }
+
+    start = time.perf_counter()
+
+    system_prompt = _system_prompt()
+
     agent = create_agent(
         llm,
         tools=[internal_finance_search, web_search],
@@ -71,7 +123,17 @@ Answer the user's question: "{query}"
     )
 
     # 🔹 Let agent reason + invoke tools
-    result = agent.invoke({"input": f"Please help me with: {query}"})
+    # Speculatively prefetched documents serve the first internal search
+    with warm_documents(take_prefetched(query, "FINANCE")):
+        try:
+            result = deadline.invoke_agent("finance_agent", agent, {"messages": [HumanMessage(content=f"Please help me with: {query}")]})
+        except DeadlineExceeded as e:
+            # Out of time: answer with whatever the agent gathered so far
+            return {
+                "query": query,
+                "route": "FINANCE",
+                "response": deadline.partial_answer(e.messages)
+            }
 
     # 🔹 Extract clean response from LangChain agent result
     answer = "Information not found."
@@ -81,6 +143,85 @@ Answer the user's question: "{query}"
                 if msg.type == "ai"
             )
 
+    pipeline.record_specialist_run("agent", pipeline.count_llm_calls(result), time.perf_counter() - start)
+    record_agent_usage("finance_agent", result)
+
+    return {
+        "query": query,
+        "route": "FINANCE",
+        "response": answer
+    }
+
+
+# Async tools keep the sync tools' names so the system prompt applies unchanged
+@tool("internal_finance_search")
+async def ainternal_finance_search(query: str) -> str:
+    """
+    Search internal Finance company documents such as payroll,
+    reimbursements, budgets, and finance policies.
+    """
+    try:
+        docs = consume_warm_documents()
+        if docs is None:
+            retriever, db, _ = shared_resource("finance_rag", load_finance_rag_chain)
+            docs = await deadline.acall("retrieval", _afetch_docs(retriever, db, query))
+        return assemble_context(docs, separator="\n") if docs else ""
+    except Exception:
+        return ""
+
+
+@tool("web_search")
+async def aweb_search(query: str) -> str:
+    """Search the web if internal finance documents do not contain the answer."""
+    return await atavily_search(query)
+
+
+@deadline.scoped
+async def afinance_agent(state):
+    """Async variant of :func:`finance_agent` for the async workflow."""
+    llm = get_llm()
+    query = state["query"] if isinstance(state, dict) else state
+
+    if pipeline.SPECIALIST_MODE == "pipeline":
+        prefetched = await asyncio.to_thread(take_prefetched, query, "FINANCE")
+        with warm_documents(prefetched):
+            answer = await pipeline.arun_pipeline(
+                llm, query, ROLE, REFUSAL,
+                search=ainternal_finance_search.coroutine,
+                web_search=atavily_search
+            )
+        return {
+            "query": query,
+            "route": "FINANCE",
+            "response": answer
+        }
+
+    start = time.perf_counter()
+
+    agent = create_agent(
+        llm,
+        tools=[ainternal_finance_search, aweb_search],
+        system_prompt=_system_prompt()
+    )
+
+    prefetched = await asyncio.to_thread(take_prefetched, query, "FINANCE")
+    with warm_documents(prefetched):
+        try:
+            result = await deadline.ainvoke_agent("finance_agent", agent, {"messages": [HumanMessage(content=f"Please help me with: {query}")]})
+        except DeadlineExceeded as e:
+            return {
+                "query": query,
+                "route": "FINANCE",
+                "response": deadline.partial_answer(e.messages)
+            }
+    pipeline.record_specialist_run("agent", pipeline.count_llm_calls(result), time.perf_counter() - start)
+    record_agent_usage("finance_agent", result)
+
+    answer = next(
+            msg.content for msg in reversed(result["messages"])
+            if msg.type == "ai"
+        )
+
     return {
         "query": query,
         "route": "FINANCE",
@@ -1,8 +1,17 @@
+import asyncio
 from langchain.tools import tool
-from config import get_llm
+from config import get_llm, shared_resource
 from rag.it_rag import load_it_rag_chain
-from tools.tavily_tool import tavily_search
+from tools.tavily_tool import tavily_search, atavily_search
+from rag.context_packing import assemble_context
+from rag.prefetch import consume_warm_documents, take_prefetched, warm_documents
 from langchain.agents import create_agent
+import deadline
+from deadline import DeadlineExceeded
+from langchain_core.messages import HumanMessage
+from prompt_cache import cacheable_system_prompt, record_agent_usage
+import time
+from agents import pipeline
 
 def _fetch_docs_with_fallback(retriever, db, query):
     """
@@ -28,6 +37,21 @@ def _fetch_docs_with_fallback(retriever, db, query):
     return []
 
 
+async def _afetch_docs(retriever, db, query):
+    """Async retrieval through the retriever, falling back to the vector store."""
+    try:
+        if hasattr(retriever, "ainvoke"):
+            return await retriever.ainvoke(query)
+
+        if hasattr(db, "asimilarity_search"):
+            return await db.asimilarity_search(query, k=4)
+
+    except Exception as e:
+        print(f"Exception: {e}")
+
+    return []
+
+
 @tool("internal_it_search")
 def internal_it_search(query: str) -> str:
     """
@@ -35,9 +59,11 @@ def internal_it_search(query: str) -> str:
     troubleshooting guides, and technical procedures.
     """
     try:
-        retriever, db, _ = load_it_rag_chain()
-        docs = _fetch_docs_with_fallback(retriever, db, query)
-        return "\n".join(d.page_content for d in docs) if docs else ""
+        docs = consume_warm_documents()
+        if docs is None:
+            retriever, db, _ = shared_resource("it_rag", load_it_rag_chain)
+            docs = deadline.call("retrieval", _fetch_docs_with_fallback, retriever, db, query)
+        return assemble_context(docs, separator="\n") if docs else ""
     except Exception:
         return ""
 
@@ -47,11 +73,13 @@ def web_search(query: str) -> str:
     """Search the web if internal IT documents do not contain the answer."""
     return tavily_search(query)
 
-def it_agent(state):
-    llm = get_llm()
-    query = state["query"] if isinstance(state, dict) else state
+ROLE = "IT Support Agent"
+REFUSAL = "I'm an IT Support Agent and can only help with IT-related questions about company policies, technical support, hardware, software, and network issues."
 
-    system_prompt = f"""You are an IT Support Agent. The user has asked: "{query}"
+
+# Static system prompt: the query travels in the human message, so the whole
+# prompt is a stable prefix that Bedrock can cache
+SYSTEM_PROMPT = f"""You are an IT Support Agent. Help the user with the question in their message.
 
 MANDATORY PROCESS - FOLLOW THIS EXACT ORDER:
 
@@ -63,18 +91,132 @@ STEP 5: Combine internal and external information if both were needed
 
 CRITICAL: You MUST use internal_it_search first before considering web search. Never skip internal search.
 
-If the question is not IT-related, respond: "I'm an IT Support Agent and can only help with IT-related questions about company policies, technical support, hardware, software, and network issues."
-
-Answer the user's question: "{query}"
+If the question is not IT-related, respond: "{REFUSAL}"
 """
 
+
+def _system_prompt():
+    return cacheable_system_prompt(SYSTEM_PROMPT)
+
+
+@deadline.scoped
+def it_agent(state):
+    llm = get_llm()
+    query = state["query"] if isinstance(state, dict) else state
+
+    if pipeline.SPECIALIST_MODE == "pipeline":
+        with warm_documents(take_prefetched(query, "IT")):
+            answer = pipeline.run_pipeline(
+                llm, query, ROLE, REFUSAL,
+                search=internal_it_search.func,
+                web_search=tavily_search
+            )
+        return {
+            "query": query,
+            "route": "IT",
+            "response": answer
+        }
+
+    start = time.perf_counter()
+
+    system_prompt = _system_prompt()
+
     agent = create_agent(
         llm,
         tools=[internal_it_search, web_search],
         system_prompt=system_prompt
     )
 
-    result = agent.invoke({"input": f"Please help me with: {query}"})
+    # Speculatively prefetched documents serve the first internal search
+    with warm_documents(take_prefetched(query, "IT")):
+        try:
+            result = deadline.invoke_agent("it_agent", agent, {"messages": [HumanMessage(content=f"Please help me with: {query}")]})
+        except DeadlineExceeded as e:
+            # Out of time: answer with whatever the agent gathered so far
+            return {
+                "query": query,
+                "route": "IT",
+                "response": deadline.partial_answer(e.messages)
+            }
+
+    answer = next(
+            msg.content for msg in reversed(result["messages"])
+            if msg.type == "ai"
+        )
+
+    pipeline.record_specialist_run("agent", pipeline.count_llm_calls(result), time.perf_counter() - start)
+    record_agent_usage("it_agent", result)
+
+    return {
+        "query": query,
+        "route": "IT",
+        "response": answer
+    }
+
+
+# Async tools keep the sync tools' names so the system prompt applies unchanged
+@tool("internal_it_search")
+async def ainternal_it_search(query: str) -> str:
+    """
+    Search internal IT company documents such as IT policies,
+    troubleshooting guides, and technical procedures.
+    """
+    try:
+        docs = consume_warm_documents()
+        if docs is None:
+            retriever, db, _ = shared_resource("it_rag", load_it_rag_chain)
+            docs = await deadline.acall("retrieval", _afetch_docs(retriever, db, query))
+        return assemble_context(docs, separator="\n") if docs else ""
+    except Exception:
+        return ""
+
+
+@tool("web_search")
+async def aweb_search(query: str) -> str:
+    """Search the web if internal IT documents do not contain the answer."""
+    return await atavily_search(query)
+
+
+@deadline.scoped
+async def ait_agent(state):
+    """Async variant of :func:`it_agent` for the async workflow."""
+    llm = get_llm()
+    query = state["query"] if isinstance(state, dict) else state
+
+    if pipeline.SPECIALIST_MODE == "pipeline":
+        prefetched = await asyncio.to_thread(take_prefetched, query, "IT")
+        with warm_documents(prefetched):
+            answer = await pipeline.arun_pipeline(
+                llm, query, ROLE, REFUSAL,
+                search=ainternal_it_search.coroutine,
+                web_search=atavily_search
+            )
+        return {
+            "query": query,
+            "route": "IT",
+            "response": answer
+        }
+
+    start = time.perf_counter()
+
+    agent = create_agent(
+        llm,
+        tools=[ainternal_it_search, aweb_search],
+        system_prompt=_system_prompt()
+    )
+
+    prefetched = await asyncio.to_thread(take_prefetched, query, "IT")
+    with warm_documents(prefetched):
+        try:
+            result = await deadline.ainvoke_agent("it_agent", agent, {"messages": [HumanMessage(content=f"Please help me with: {query}")]})
+        except DeadlineExceeded as e:
+            return {
+                "query": query,
+                "route": "IT",
+                "response": deadline.partial_answer(e.messages)
+            }
+    pipeline.record_specialist_run("agent", pipeline.count_llm_calls(result), time.perf_counter() - start)
+    record_agent_usage("it_agent", result)
 
     answer = next(
             msg.content for msg in reversed(result["messages"])
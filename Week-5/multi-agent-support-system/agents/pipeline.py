@@ -0,0 +1,161 @@
+"""
+Retrieve-then-answer pipeline for the specialist agents.
+
+The tool-calling agent spends its first LLM round trip deciding to run the
+internal search its prompt makes mandatory. In pipeline mode
+(``SPECIALIST_MODE=pipeline``) the specialist searches internal documents
+right away and calls the LLM once with that context. Web search only runs,
+followed by a second LLM call, when the model replies with the
+``NEED_WEB_SEARCH`` sentinel.
+
+Both modes record LLM calls and latency per request; see
+``get_specialist_report``. When the request deadline cuts an LLM call
+short, the pipeline answers with the retrieved context instead.
+"""
+import os
+import time
+from typing import Any, Callable, Dict
+
+import deadline
+import metrics
+from deadline import DeadlineExceeded
+from prompt_cache import cacheable_prompt, record_usage
+
+# "agent": tool-calling agent loop; "pipeline": retrieve, answer, web search on demand
+SPECIALIST_MODE = os.environ.get("SPECIALIST_MODE", "agent").lower()
+
+NEED_WEB_SEARCH = "NEED_WEB_SEARCH"
+
+
+# Instructions come first and stay fixed per specialist; documents and the
+# question form the dynamic suffix so the prefix can be cached
+def _answer_prompt(role: str, refusal: str, query: str, context: str):
+    static = f"""You are an {role}. Answer the user's question using the internal company documents given after these instructions.
+
+If the internal documents do not contain enough information to answer and public information would help, respond with exactly {NEED_WEB_SEARCH} and nothing else.
+
+If the question is not in your area, respond: "{refusal}"
+"""
+    return cacheable_prompt(static, f"""Internal Documents:
+{context or "(no matching internal documents)"}
+
+Question: "{query}"
+""")
+
+
+def _web_prompt(role: str, refusal: str, query: str, context: str, web_context: str):
+    static = f"""You are an {role}. Answer the user's question. Prefer the internal company documents given after these instructions and use the web results only for what they do not cover.
+
+If the question is not in your area, respond: "{refusal}"
+"""
+    return cacheable_prompt(static, f"""Internal Documents:
+{context or "(no matching internal documents)"}
+
+Web Results:
+{web_context}
+
+Question: "{query}"
+""")
+
+
+def _needs_web_search(content: str) -> bool:
+    return content.strip().strip('"').upper().startswith(NEED_WEB_SEARCH)
+
+
+def _text(response) -> str:
+    content = getattr(response, "content", response)
+    if isinstance(content, list):
+        return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+    return content
+
+
+def record_specialist_run(mode: str, llm_calls: int, seconds: float):
+    metrics.increment(f"specialist.{mode}.requests")
+    metrics.increment(f"specialist.{mode}.llm_calls", llm_calls)
+    metrics.observe(f"specialist.{mode}", seconds)
+
+
+def count_llm_calls(result: Dict[str, Any]) -> int:
+    """LLM round trips in an agent run: one per AI message."""
+    return sum(1 for msg in result.get("messages", []) if getattr(msg, "type", None) == "ai")
+
+
+def _partial(context: str) -> str:
+    """Answer when the deadline cuts the LLM call short: the retrieved context, if any."""
+    if not context:
+        return deadline.TIMEOUT_MESSAGE
+    return f"{deadline.PARTIAL_PREFIX}\n\n{context}"
+
+
+def run_pipeline(llm, query: str, role: str, refusal: str,
+                 search: Callable[[str], str], web_search: Callable[[str], str]) -> str:
+    start = time.perf_counter()
+    context = search(query)
+    try:
+        response = deadline.call("specialist_llm", llm.invoke, _answer_prompt(role, refusal, query, context))
+    except DeadlineExceeded:
+        return _partial(context)
+    record_usage("pipeline_answer", response)
+    answer = _text(response)
+    llm_calls = 1
+
+    if _needs_web_search(answer):
+        metrics.increment("specialist.pipeline.web_search")
+        try:
+            response = deadline.call(
+                "specialist_llm", llm.invoke, _web_prompt(role, refusal, query, context, web_search(query))
+            )
+        except DeadlineExceeded:
+            return _partial(context)
+        record_usage("pipeline_web", response)
+        answer = _text(response)
+        llm_calls += 1
+
+    record_specialist_run("pipeline", llm_calls, time.perf_counter() - start)
+    return answer
+
+
+async def arun_pipeline(llm, query: str, role: str, refusal: str, search, web_search) -> str:
+    """Async variant of :func:`run_pipeline`; ``search`` and ``web_search`` are coroutines."""
+    start = time.perf_counter()
+    context = await search(query)
+    try:
+        response = await deadline.acall("specialist_llm", llm.ainvoke(_answer_prompt(role, refusal, query, context)))
+    except DeadlineExceeded:
+        return _partial(context)
+    record_usage("pipeline_answer", response)
+    answer = _text(response)
+    llm_calls = 1
+
+    if _needs_web_search(answer):
+        metrics.increment("specialist.pipeline.web_search")
+        web_context = await web_search(query)
+        try:
+            response = await deadline.acall(
+                "specialist_llm", llm.ainvoke(_web_prompt(role, refusal, query, context, web_context))
+            )
+        except DeadlineExceeded:
+            return _partial(context)
+        record_usage("pipeline_web", response)
+        answer = _text(response)
+        llm_calls += 1
+
+    record_specialist_run("pipeline", llm_calls, time.perf_counter() - start)
+    return answer
+
+
+def get_specialist_report() -> Dict[str, Any]:
+    """Requests, mean LLM calls per request and latency for each specialist mode."""
+    latency = metrics.snapshot()["latency"]
+    report = {}
+    for mode in ("agent", "pipeline"):
+        requests = metrics.get_count(f"specialist.{mode}.requests")
+        report[mode] = {
+            "requests": requests,
+            "llm_calls_per_request": metrics.get_count(f"specialist.{mode}.llm_calls") / requests if requests else 0.0,
+            "latency": latency.get(f"specialist.{mode}", {}),
+        }
+    report["pipeline"]["web_search_rate"] = metrics.ratio(
+        "specialist.pipeline.web_search", "specialist.pipeline.requests"
+    )
+    return report
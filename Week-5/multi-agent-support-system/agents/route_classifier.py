@@ -0,0 +1,187 @@
+"""
+Local fast-path classifier for the supervisor.
+
+A TF-IDF nearest-centroid model over a small set of labeled example queries.
+It runs in microseconds with no network call, so the supervisor only has to
+ask the LLM when this classifier is not confident.
+
+Confidence is the margin between the two best centroids, but only for
+queries that are close enough to their centroid (``MIN_SIMILARITY``) and do
+not use terms specific to both IT and finance, which may need both
+specialists.
+"""
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+LABELED_EXAMPLES: Dict[str, List[str]] = {
+    "IT": [
+        "How do I set up VPN on my laptop?",
+        "VPN connection keeps dropping",
+        "I forgot my password and need a reset",
+        "How do I reset my company password?",
+        "Software installation request for Visual Studio",
+        "Can I install software on my work computer?",
+        "My laptop is not working",
+        "Request a new laptop or monitor",
+        "Hardware replacement for a broken keyboard",
+        "Network connectivity problems in the office",
+        "WiFi is not connecting",
+        "How do I connect to the company WiFi?",
+        "Email configuration issues in Outlook",
+        "An application keeps crashing on startup",
+        "Printer setup on the network",
+        "Server access and SSH keys",
+        "Security policy for USB drives",
+        "Report a phishing email or malware",
+        "Cybersecurity threats and antivirus",
+        "Multi-factor authentication is not working",
+        "Access to a shared drive or server",
+    ],
+    "FINANCE": [
+        "What is the reimbursement policy for travel expenses?",
+        "How do I submit an expense report?",
+        "When is payroll processed each month?",
+        "What is my salary and when is it paid?",
+        "My paycheck is missing an amount",
+        "Reimbursement process for client dinners",
+        "Budget approval procedures for my team",
+        "Quarterly budget report",
+        "Invoice processing for a vendor",
+        "How long does invoice payment take?",
+        "Tax rate information for employees",
+        "Tax deductions on my payslip",
+        "Expense policy clarification",
+        "Has my expense claim been approved?",
+        "Per diem rates for business travel",
+        "Corporate credit card policy",
+        "Purchase order approval limits",
+        "Financial policies and guidelines",
+        "Bonus and salary revision dates",
+    ],
+    "IRRELEVANT": [
+        "What's the weather today?",
+        "Will it rain tomorrow?",
+        "Who won the football match yesterday?",
+        "Sports scores today",
+        "Recipe for chocolate cookies",
+        "How do I cook pasta?",
+        "Movie recommendations for the weekend",
+        "Tell me a joke",
+        "Best travel destinations in Europe for a holiday",
+        "What is the capital of France?",
+        "Who is the most famous singer?",
+        "How do I lose weight?",
+        "Write a poem about the sea",
+        "What should I name my dog?",
+    ],
+}
+
+# Below this centroid similarity a query is not decided locally, whatever the margin.
+# Words the examples never use count against it, so one known word in a long query is not enough.
+MIN_SIMILARITY = 0.15
+
+# Queries with terms specific to both of these domains are left to the LLM (fan-out)
+CROSS_DOMAIN = ("IT", "FINANCE")
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "for", "in", "on", "at", "is", "are",
+    "was", "be", "my", "me", "i", "do", "does", "how", "what", "when", "who", "can",
+    "with", "it", "this", "that", "need", "please", "help", "about", "our", "your",
+    "we", "you", "there", "any", "get", "should", "will", "from", "by", "not", "has",
+    "have", "long", "which", "where", "why", "is", "s", "t",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        if word in STOPWORDS:
+            continue
+        # Crude plural folding keeps "expenses"/"expense" together
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def _normalize(vector: Dict[str, float]) -> Dict[str, float]:
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    return {t: v / norm for t, v in vector.items()} if norm else {}
+
+
+class RouteClassifier:
+    """TF-IDF nearest-centroid classifier over labeled example queries."""
+
+    def __init__(self, examples: Dict[str, List[str]] = None, min_similarity: float = MIN_SIMILARITY):
+        examples = examples or LABELED_EXAMPLES
+        self.min_similarity = min_similarity
+        documents = [(label, tokenize(q)) for label, queries in examples.items() for q in queries]
+
+        doc_freq = Counter(token for _, tokens in documents for token in set(tokens))
+        total = len(documents)
+        self.idf = {t: math.log((1 + total) / (1 + df)) + 1.0 for t, df in doc_freq.items()}
+        # Weight of a word no example uses, as if it had a document frequency of 0
+        self.unknown_idf = math.log(1 + total) + 1.0
+
+        # Words used by one label's examples and no other label's
+        vocabularies = {label: set() for label in examples}
+        for label, tokens in documents:
+            vocabularies[label].update(tokens)
+        self.specific_terms = {
+            label: words - set().union(*(v for other, v in vocabularies.items() if other != label))
+            for label, words in vocabularies.items()
+        }
+
+        self.centroids: Dict[str, Dict[str, float]] = {}
+        for label in examples:
+            centroid = Counter()
+            for doc_label, tokens in documents:
+                if doc_label == label:
+                    for token, weight in self._vectorize(tokens).items():
+                        centroid[token] += weight
+            self.centroids[label] = _normalize(dict(centroid))
+
+    def _vectorize(self, tokens: List[str]) -> Dict[str, float]:
+        counts = Counter(t for t in tokens if t in self.idf)
+        return _normalize({t: (1 + math.log(c)) * self.idf[t] for t, c in counts.items()})
+
+    def _query_vector(self, tokens: List[str]) -> Dict[str, float]:
+        # Unknown words stay in the vector, so they lower the similarity to every centroid
+        counts = Counter(tokens)
+        return _normalize({t: (1 + math.log(c)) * self.idf.get(t, self.unknown_idf) for t, c in counts.items()})
+
+    def scores(self, query: str) -> Dict[str, float]:
+        vector = self._query_vector(tokenize(query))
+        return {
+            label: sum(weight * centroid.get(token, 0.0) for token, weight in vector.items())
+            for label, centroid in self.centroids.items()
+        }
+
+    def is_cross_domain(self, query: str) -> bool:
+        """True if ``query`` uses words specific to each of the ``CROSS_DOMAIN`` labels."""
+        tokens = set(tokenize(query))
+        return all(tokens & self.specific_terms.get(label, set()) for label in CROSS_DOMAIN)
+
+    def classify(self, query: str) -> Tuple[str, float]:
+        """
+        Return ``(label, confidence)``. Confidence is the relative margin
+        between the best and second-best centroid similarity, in [0, 1].
+        Queries below ``min_similarity`` or mixing IT and finance terms get 0.0.
+        """
+        ranked = sorted(self.scores(query).items(), key=lambda item: item[1], reverse=True)
+        (label, best), (_, second) = ranked[0], ranked[1]
+        if best < self.min_similarity or best <= 0.0 or self.is_cross_domain(query):
+            return label, 0.0
+        return label, (best - second) / best
+
+
+_default_classifier = None
+
+
+def get_classifier() -> RouteClassifier:
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = RouteClassifier()
+    return _default_classifier
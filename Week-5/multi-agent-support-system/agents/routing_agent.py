@@ -1,20 +1,39 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from config import get_llm
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from agents.route_classifier import get_classifier
+import deadline
+import metrics
+from deadline import DeadlineExceeded
+from prompt_cache import cacheable_prompt, record_usage
 
-def supervisor_agent(state: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Supervisor Agent - Classifies user queries as IT or Finance and routes to appropriate specialist agent.
-    """
-    llm = get_llm()
-    query = state["query"] if isinstance(state, dict) else state
-    
-    system_prompt = f"""You are a Supervisor Agent that classifies user queries and routes them to the appropriate specialist.
+# "on": confident local classifications skip the LLM; "shadow": always ask the
+# LLM but record agreement with the local classifier; "off": LLM only.
+ROUTER_FAST_PATH = os.environ.get("ROUTER_FAST_PATH", "on").lower()
+# Minimum local classifier confidence (relative centroid margin) to skip the LLM
+FAST_PATH_CONFIDENCE = float(os.environ.get("ROUTER_FAST_PATH_CONFIDENCE", "0.75"))
+# Queries packed into one LLM call by classify_queries, and batches in flight
+BATCH_SIZE = int(os.environ.get("ROUTER_BATCH_SIZE", "100"))
+BATCH_CONCURRENCY = int(os.environ.get("ROUTER_BATCH_CONCURRENCY", "4"))
+# Retries of a batch call that fails outright (throttling, outage), with exponential backoff
+BATCH_RETRIES = int(os.environ.get("ROUTER_BATCH_RETRIES", "2"))
+BATCH_RETRY_BACKOFF = float(os.environ.get("ROUTER_BATCH_RETRY_BACKOFF", "1.0"))
+# Seconds a routing decision is reused for the same normalized query (0 disables)
+ROUTE_CACHE_TTL = float(os.environ.get("ROUTE_CACHE_TTL", "3600"))
+ROUTE_CACHE_SIZE = int(os.environ.get("ROUTE_CACHE_SIZE", "10000"))
 
-User Query: "{query}"
+# Cross-domain queries fan out to both specialists in parallel
+MULTI_ROUTE = "IT+FINANCE"
+ROUTES = ["IT", "FINANCE", MULTI_ROUTE, "IRRELEVANT"]
 
-Your task is to classify this query based on the content.
 
-IT-related topics include:
+ROUTING_GUIDE = """IT-related topics include:
 - VPN setup and network issues
 - Software installation and troubleshooting
 - Hardware requests (laptops, equipment)
@@ -32,36 +51,378 @@ Finance-related topics include:
 - Financial policies and guidelines
 - Tax rates and financial regulations
 
+Queries that genuinely need BOTH an IT and a Finance answer (for example
+reimbursement for a new laptop) are labeled IT+FINANCE.
+
 NON-RELEVANT topics include:
 - Weather, sports, cooking, entertainment
 - General knowledge questions unrelated to business
-- Personal advice or non-work related queries
+- Personal advice or non-work related queries"""
+
+
+def normalize_query(query: str) -> str:
+    """Case-, punctuation- and whitespace-insensitive cache key."""
+    return " ".join(re.findall(r"[a-z0-9]+", query.lower()))
+
+
+class RouteCache:
+    """Bounded LRU of routing decisions that expire after ``ttl`` seconds."""
+
+    def __init__(self, ttl: float = ROUTE_CACHE_TTL, max_size: int = ROUTE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query: str) -> Optional[Tuple[str, float]]:
+        if self.ttl <= 0:
+            return None
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, route, confidence = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return route, confidence
+
+    def put(self, query: str, route: str, confidence: float):
+        if self.ttl <= 0:
+            return
+        key = normalize_query(query)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, route, confidence)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+route_cache = RouteCache()
+
+
+def parse_route(content: str) -> Tuple[str, float]:
+    """
+    Parse an LLM reply such as ``"FINANCE 0.8"`` into ``(route, confidence)``.
+    A bare label counts as fully confident; anything unrecognised defaults to
+    IT with zero confidence.
+    """
+    match = re.match(
+        r"\s*(IT\s*\+\s*FINANCE|FINANCE\s*\+\s*IT|IT|FINANCE|IRRELEVANT)\b[\s:,(]*([01](?:\.\d+)?)?",
+        content, re.IGNORECASE
+    )
+    if not match:
+        return "IT", 0.0
+    confidence = float(match.group(2)) if match.group(2) else 1.0
+    route = match.group(1).upper()
+    return MULTI_ROUTE if "+" in route else route, min(confidence, 1.0)
+
+
+def get_routing_report() -> Dict[str, Any]:
+    """Cache, fast-path and LLM fallback rates, local/LLM agreement and routing latency."""
+    fast = metrics.get_count("router.fast_path")
+    llm = metrics.get_count("router.llm")
+    cached = metrics.get_count("router.cache_hit")
+    total = fast + llm + cached
+    compared = metrics.get_count("router.compared")
+    snapshot = metrics.snapshot()["latency"]
+    return {
+        "requests": total,
+        "cache_hit_rate": cached / total if total else 0.0,
+        "fast_path_rate": fast / total if total else 0.0,
+        "fallback_rate": llm / total if total else 0.0,
+        "agreement_rate": metrics.get_count("router.agreed") / compared if compared else 0.0,
+        "latency": {
+            "fast_path": snapshot.get("router.latency.fast_path", {}),
+            "llm": snapshot.get("router.latency.llm", {}),
+        },
+    }
+
+
+def _route_without_llm(query: str, start: float) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Cache and local classifier tiers. Returns ``(state, local_route)``; the
+    state is None when the query still needs the LLM.
+    """
+    cached = route_cache.get(query)
+    if cached is not None:
+        metrics.increment("router.cache_hit")
+        route, confidence = cached
+        return {"query": query, "route": route, "confidence": confidence, "response": ""}, None
+
+    local_route = None
+    if ROUTER_FAST_PATH in ("on", "shadow"):
+        local_route, confidence = get_classifier().classify(query)
+
+        if ROUTER_FAST_PATH == "on" and confidence >= FAST_PATH_CONFIDENCE:
+            metrics.increment("router.fast_path")
+            metrics.observe("router.latency.fast_path", time.perf_counter() - start)
+            route_cache.put(query, local_route, confidence)
+            return {"query": query, "route": local_route, "confidence": confidence, "response": ""}, local_route
+
+    return None, local_route
+
+
+# Static prefix shared by every routing call; only the query suffix changes
+SUPERVISOR_PROMPT = f"""You are a Supervisor Agent that classifies user queries and routes them to the appropriate specialist.
+
+Your task is to classify the user query given after these instructions based on its content.
+
+{ROUTING_GUIDE}
+
+Respond with ONLY the label "IT", "FINANCE", "IT+FINANCE", or "IRRELEVANT" followed by your confidence between 0 and 1, for example: FINANCE 0.9"""
+
+
+def _supervisor_prompt(query: str):
+    return cacheable_prompt(SUPERVISOR_PROMPT, f'User Query: "{query}"')
+
+
+def _route_from_reply(query: str, content: str, local_route: Optional[str], start: float) -> Dict[str, Any]:
+    route, confidence = parse_route(content)
+    metrics.increment("router.llm")
+    metrics.observe("router.latency.llm", time.perf_counter() - start)
+
+    if local_route is not None:
+        metrics.increment("router.compared")
+        if local_route == route:
+            metrics.increment("router.agreed")
+
+    # Unparseable replies default to IT and are not worth caching
+    if confidence > 0.0:
+        route_cache.put(query, route, confidence)
+
+    return {
+        "query": query,
+        "route": route,
+        "confidence": confidence,
+        "response": ""
+    }
+
+
+def _route_on_deadline(query: str, local_route: Optional[str]) -> Dict[str, Any]:
+    """Out of time for the LLM: take the local classifier's best guess, uncached."""
+    if local_route is None:
+        local_route, _ = get_classifier().classify(query)
+    return {
+        "query": query,
+        "route": local_route,
+        "confidence": 0.0,
+        "response": ""
+    }
+
+
+def _routing_error(query: str, error: Exception) -> Dict[str, Any]:
+    return {
+        "query": query,
+        "route": "IT",
+        "confidence": 0.0,
+        "response": f"Error in routing: {str(error)}"
+    }
+
+
+@deadline.scoped
+def supervisor_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Supervisor Agent - Classifies user queries as IT, Finance or Irrelevant and routes to appropriate specialist agent.
 
-Respond with ONLY one word: "IT", "FINANCE", or "IRRELEVANT"
-"""
+    Repeat queries are answered from the routing cache and confident cases
+    by the local classifier; only uncertain queries are sent to the LLM.
+    The returned state carries the route's ``confidence`` in [0, 1]. If the
+    request deadline runs out before the LLM replies, the local classifier's
+    best guess is used with zero confidence.
+    """
+    start = time.perf_counter()
+    query = state["query"] if isinstance(state, dict) else state
+
+    result, local_route = _route_without_llm(query, start)
+    if result is not None:
+        return result
+
+    llm = get_llm()
 
     try:
-        response = llm.invoke(system_prompt)
-        route = response.content.strip().upper()
-        
-        # Ensure we get a valid route
-        if route not in ["IT", "FINANCE"]:
-            # Default to IT if unclear
-            route = "IT"
-            
-        return {
-            "query": query,
-            "route": route,
-            "response": ""
-        }
-        
+        response = deadline.call("supervisor", llm.invoke, _supervisor_prompt(query))
+        record_usage("supervisor", response)
+        return _route_from_reply(query, response.content, local_route, start)
+    except DeadlineExceeded:
+        return _route_on_deadline(query, local_route)
     except Exception as e:
-        return {
-            "query": query,
-            "route": "IT",
-            "response": f"Error in routing: {str(e)}"
+        return _routing_error(query, e)
+
+
+@deadline.scoped
+async def asupervisor_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Async variant of :func:`supervisor_agent` for the async workflow."""
+    start = time.perf_counter()
+    query = state["query"] if isinstance(state, dict) else state
+
+    result, local_route = _route_without_llm(query, start)
+    if result is not None:
+        return result
+
+    llm = get_llm()
+
+    try:
+        response = await deadline.acall("supervisor", llm.ainvoke(_supervisor_prompt(query)))
+        record_usage("supervisor", response)
+        return _route_from_reply(query, response.content, local_route, start)
+    except DeadlineExceeded:
+        return _route_on_deadline(query, local_route)
+    except Exception as e:
+        return _routing_error(query, e)
+
+
+BATCH_PROMPT = f"""You are a Supervisor Agent that classifies user queries and routes them to the appropriate specialist.
+
+Classify each of the numbered user queries given after these instructions.
+
+{ROUTING_GUIDE}
+
+Respond with ONLY a JSON object mapping each query number to "IT", "FINANCE", "IT+FINANCE", or "IRRELEVANT", for example {{"1": "IT", "2": "FINANCE"}}"""
+
+
+def _batch_prompt(queries: Sequence[str]):
+    numbered = "\n".join(f"{i}. {json.dumps(q)}" for i, q in enumerate(queries, 1))
+    return cacheable_prompt(BATCH_PROMPT, f"User Queries:\n{numbered}")
+
+
+def _parse_batch_labels(content: str, size: int) -> Dict[int, str]:
+    """Valid labels from a batch response, keyed by 0-based query index."""
+    match = re.search(r"\{.*\}", content, re.DOTALL)
+    if not match:
+        return {}
+    try:
+        raw = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return {}
+
+    labels = {}
+    for key, label in raw.items():
+        try:
+            index = int(key) - 1
+        except (TypeError, ValueError):
+            continue
+        label = re.sub(r"\s+", "", str(label)).upper().replace("FINANCE+IT", MULTI_ROUTE)
+        if 0 <= index < size and label in ROUTES:
+            labels[index] = label
+    return labels
+
+
+def _invoke_batch(llm, queries: Sequence[str]):
+    """One batch call, retried ``BATCH_RETRIES`` times with backoff; the last error is raised."""
+    for attempt in range(BATCH_RETRIES + 1):
+        try:
+            response = llm.invoke(_batch_prompt(queries))
+            metrics.increment("router.batch_calls")
+            record_usage("supervisor_batch", response)
+            return response
+        except Exception:
+            metrics.increment("router.batch_errors")
+            if attempt == BATCH_RETRIES:
+                raise
+            time.sleep(BATCH_RETRY_BACKOFF * 2 ** attempt)
+
+
+def _classify_batch(llm, queries: Sequence[str]) -> List[Dict[str, Any]]:
+    """
+    Classify ``queries`` in one LLM call. Queries the response does not label
+    are retried in halves, so a bad item only costs its own slot; a single
+    query that is still unlabeled is returned with an error. A call that
+    fails outright is retried whole (splitting would multiply calls to an
+    endpoint that is already throttling) and then fails every query in it.
+    """
+    try:
+        response = _invoke_batch(llm, queries)
+    except Exception as e:
+        error = f"Error in routing: {str(e)}"
+        return [{"query": query, "route": "IT", "source": "llm", "error": error} for query in queries]
+    labels = _parse_batch_labels(response.content, len(queries))
+    error = "No label returned"
+
+    results = [None] * len(queries)
+    for index, label in labels.items():
+        results[index] = {
+            "query": queries[index],
+            "route": label,
+            "source": "llm",
+            "error": None,
         }
 
+    missing = [i for i, result in enumerate(results) if result is None]
+    if len(queries) == 1 and missing:
+        return [{"query": queries[0], "route": "IT", "source": "llm", "error": error}]
+
+    if missing:
+        middle = len(missing) // 2
+        for part in (missing[:middle], missing[middle:]):
+            if part:
+                for index, result in zip(part, _classify_batch(llm, [queries[i] for i in part])):
+                    results[index] = result
+    return results
+
+
+def classify_queries(
+    queries: Sequence[str],
+    batch_size: int = None,
+    max_concurrency: int = None,
+) -> List[Dict[str, Any]]:
+    """
+    Batch entry point for bulk triage. Returns one ``{"query", "route",
+    "source", "error"}`` dict per query, in input order.
+
+    Cached and confident queries are routed by the local classifier; the rest are packed
+    ``batch_size`` to an LLM call with at most ``max_concurrency`` calls in
+    flight.
+    """
+    batch_size = batch_size or BATCH_SIZE
+    max_concurrency = max_concurrency or BATCH_CONCURRENCY
+    results: List[Dict[str, Any]] = [None] * len(queries)
+
+    pending = []
+    for index, query in enumerate(queries):
+        cached = route_cache.get(query)
+        if cached is not None:
+            metrics.increment("router.cache_hit")
+            results[index] = {"query": query, "route": cached[0], "source": "cache", "error": None}
+            continue
+        if ROUTER_FAST_PATH == "on":
+            route, confidence = get_classifier().classify(query)
+            if confidence >= FAST_PATH_CONFIDENCE:
+                metrics.increment("router.fast_path")
+                route_cache.put(query, route, confidence)
+                results[index] = {"query": query, "route": route, "source": "fast_path", "error": None}
+                continue
+        pending.append(index)
+
+    if not pending:
+        return results
+
+    llm = get_llm()
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+
+    def run(batch):
+        start = time.perf_counter()
+        batch_results = _classify_batch(llm, [queries[i] for i in batch])
+        for result in batch_results:
+            if result["error"] is None:
+                route_cache.put(result["query"], result["route"], 1.0)
+        metrics.increment("router.llm", len(batch))
+        metrics.observe("router.latency.batch", time.perf_counter() - start)
+        return batch, batch_results
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        for batch, batch_results in executor.map(run, batches):
+            for index, result in zip(batch, batch_results):
+                results[index] = result
+
+    return results
+
 
 def dynamic_routing_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     return supervisor_agent(state)
@@ -0,0 +1,89 @@
+# Document throughput and query-embed latency of Titan vs the local ONNX model.
+#
+# Documents are synthetic policy-sized chunks. Titan is skipped when AWS
+# credentials are not set; the local runs need the model files described in
+# rag/local_embeddings.py ("local-int8" also needs the quantized copy).
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+from rag.local_embeddings import MODEL_DIR, OnnxEmbeddings
+
+load_dotenv()
+
+WORDS = ("vpn password laptop payroll reimbursement budget invoice network access "
+         "approval manager employee policy request ticket device travel expense").split()
+
+
+def _text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _titan():
+    from langchain_aws import BedrockEmbeddings
+    return BedrockEmbeddings(
+        model_id="amazon.titan-embed-text-v1",
+        region_name=os.environ["AWS_REGION"],
+        aws_access_key_id=os.environ["AWS_ACCESS_KEY_ID"],
+        aws_secret_access_key=os.environ["AWS_SECRET_ACCESS_KEY"],
+    )
+
+
+def run(embeddings, docs, queries):
+    embeddings.embed_query(queries[0])  # warm-up (session init, connection)
+
+    start = time.perf_counter()
+    embeddings.embed_documents(docs)
+    docs_per_second = len(docs) / (time.perf_counter() - start)
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        embeddings.embed_query(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return docs_per_second, statistics.median(latencies), latencies[int(0.95 * (len(latencies) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--backends", default="titan,local,local-int8")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    # About the size of the 1000-character chunks the vectorize scripts write
+    docs = [_text(rng, 150) for _ in range(args.docs)]
+    queries = [_text(rng, rng.randint(5, 15)) for _ in range(args.queries)]
+
+    print(f"{'backend':<12} {'docs/s':>9} {'query p50 ms':>13} {'query p95 ms':>13}")
+    for backend in args.backends.split(","):
+        if backend == "titan":
+            if not all(os.environ.get(k) for k in ("AWS_REGION", "AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY")):
+                print(f"{backend:<12} skipped (AWS credentials not set)")
+                continue
+            embeddings = _titan()
+        else:
+            try:
+                embeddings = OnnxEmbeddings(args.model_dir, quantized=backend == "local-int8",
+                                            threads=args.threads, batch_size=args.batch_size)
+            except FileNotFoundError as e:
+                print(f"{backend:<12} skipped ({e})")
+                continue
+        docs_per_second, p50, p95 = run(embeddings, docs, queries)
+        print(f"{backend:<12} {docs_per_second:>9.1f} {p50:>13.2f} {p95:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
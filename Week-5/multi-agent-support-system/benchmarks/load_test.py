@@ -0,0 +1,71 @@
+# Concurrent load generator for server.py (run the server with --stub for local tests)
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+QUERIES = [
+    "How do I set up VPN on my laptop?",
+    "When is payroll processed each month?",
+    "What is the reimbursement policy for travel expenses?",
+    "My laptop is not working",
+    "What's the weather today?",
+]
+
+
+async def _worker(session, url, jobs, latencies, statuses, retry_delay):
+    while True:
+        try:
+            query = jobs.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        start = time.perf_counter()
+        while True:
+            async with session.post(f"{url}/query", json={"query": query}) as response:
+                # Drain the stream so latency covers the full answer
+                await response.read()
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+            if response.status != 429:
+                break
+            # Back off like a client honouring Retry-After, on a shorter clock
+            await asyncio.sleep(retry_delay)
+        if response.status == 200:
+            latencies.append(time.perf_counter() - start)
+
+
+async def run(url: str, requests: int, concurrency: int, retry_delay: float):
+    jobs = asyncio.Queue()
+    for i in range(requests):
+        jobs.put_nowait(QUERIES[i % len(QUERIES)])
+
+    latencies, statuses = [], {}
+    start = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(_worker(session, url, jobs, latencies, statuses, retry_delay) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        async with session.get(f"{url}/metrics") as response:
+            server_metrics = await response.json()
+
+    print(f"{requests} requests, concurrency {concurrency}: {elapsed:.2f}s ({requests / elapsed:.1f} req/s)")
+    print(f"Status codes: {statuses}")
+    if latencies:
+        latencies.sort()
+        print(f"Latency p50 {statistics.median(latencies) * 1000:.0f}ms, "
+              f"p95 {latencies[int(0.95 * (len(latencies) - 1))] * 1000:.0f}ms")
+    print(f"Server rejected: {server_metrics['counters'].get('server.rejected', 0)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the support system HTTP server")
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--retry-delay", type=float, default=0.1, help="Seconds to wait after a 429")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.requests, args.concurrency, args.retry_delay))
+
+
+if __name__ == "__main__":
+    main()
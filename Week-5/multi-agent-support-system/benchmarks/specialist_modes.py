@@ -0,0 +1,90 @@
+# LLM calls and latency per request: tool-calling agent vs retrieve-then-answer pipeline.
+#
+# The chat model is scripted with a fixed per-call latency, retrieval and web
+# search with fixed sleeps, so the comparison counts round trips rather than
+# measuring Bedrock.
+import argparse
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.documents import Document
+
+import metrics
+from agents import pipeline
+from agents.it_agent import it_agent
+from agents.pipeline import NEED_WEB_SEARCH, get_specialist_report
+
+
+class ScriptedChatModel(GenericFakeChatModel):
+    """Replays scripted replies, sleeping ``latency`` seconds per call."""
+    latency: float = 0.0
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super()._generate(*args, **kwargs)
+
+
+def _tool_call(name, query):
+    return AIMessage(content="", tool_calls=[{"name": name, "args": {"query": query}, "id": f"call_{name}"}])
+
+
+def script(mode, needs_web, query):
+    if mode == "agent":
+        replies = [_tool_call("internal_it_search", query)]
+        if needs_web:
+            replies.append(_tool_call("web_search", query))
+        return replies + [AIMessage(content="Answer")]
+    if needs_web:
+        return [AIMessage(content=NEED_WEB_SEARCH), AIMessage(content="Answer")]
+    return [AIMessage(content="Answer")]
+
+
+def run(mode, needs_web, requests, llm_latency, retrieval_latency, web_latency):
+    def retrieve(*args, **kwargs):
+        time.sleep(retrieval_latency)
+        return [Document(page_content="VPN requires the company client and MFA.")]
+
+    def web(query):
+        time.sleep(web_latency)
+        return "web results"
+
+    query = "How do I connect to the VPN?"
+    with patch.object(pipeline, "SPECIALIST_MODE", mode), \
+         patch('agents.it_agent._fetch_docs_with_fallback', side_effect=retrieve), \
+         patch('agents.it_agent.load_it_rag_chain', return_value=(None, None, None)), \
+         patch('agents.it_agent.tavily_search', side_effect=web), \
+         patch('agents.it_agent.get_llm', side_effect=lambda: ScriptedChatModel(
+             messages=iter(script(mode, needs_web, query)), latency=llm_latency)):
+        for _ in range(requests):
+            it_agent({"query": query})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the agent loop with the retrieve-then-answer pipeline")
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--llm-ms", type=float, default=800, help="Latency of one LLM call")
+    parser.add_argument("--retrieval-ms", type=float, default=150)
+    parser.add_argument("--web-ms", type=float, default=1200)
+    args = parser.parse_args()
+
+    for needs_web in (False, True):
+        print(f"\nInternal documents {'insufficient (web search needed)' if needs_web else 'sufficient'}:")
+        for mode in ("agent", "pipeline"):
+            metrics.reset()
+            run(mode, needs_web, args.requests, args.llm_ms / 1000, args.retrieval_ms / 1000, args.web_ms / 1000)
+            report = get_specialist_report()[mode]
+            print(f"  {mode:8}  {report['llm_calls_per_request']:.1f} LLM calls/request  "
+                  f"mean {report['latency']['avg'] * 1000:7.1f}ms  p95 {report['latency']['p95'] * 1000:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# End-to-end latency of the sync workflow with and without speculative retrieval.
+#
+# Model and vector store calls are replaced with sleeps of configurable length
+# so the comparison isolates the overlap of classification and retrieval.
+import argparse
+import os
+import statistics
+import sys
+import time
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.documents import Document
+
+from agents.it_agent import internal_it_search
+from agents.routing_agent import route_cache
+from graph.workflow import create_supervisor_workflow
+
+
+def _sleeping(seconds, value):
+    def call(*args, **kwargs):
+        time.sleep(seconds)
+        return value
+    return call
+
+
+def run(queries, speculative, classify, embed, search):
+    docs = [Document(page_content="VPN requires the company client and MFA.")]
+
+    llm = Mock()
+    llm.invoke.side_effect = _sleeping(classify, Mock(content="IT 0.9"))
+
+    # Non-speculative retrieval embeds and searches in one call
+    retriever = Mock()
+    retriever.get_relevant_documents.side_effect = _sleeping(embed + search, docs)
+    db = Mock()
+    db.similarity_search_by_vector.side_effect = _sleeping(search, docs)
+    embeddings = Mock()
+    embeddings.embed_query.side_effect = _sleeping(embed, [0.1, 0.2])
+
+    # The specialist runs its mandatory internal search and answers
+    agent = Mock()
+    agent.invoke.side_effect = lambda inputs: {
+        "messages": [Mock(type="ai", content=internal_it_search.invoke(inputs["input"]))]
+    }
+
+    latencies = []
+    with patch('agents.routing_agent.ROUTER_FAST_PATH', "off"), \
+         patch('agents.routing_agent.get_llm', return_value=llm), \
+         patch('agents.it_agent.get_llm'), \
+         patch('agents.it_agent.create_agent', return_value=agent), \
+         patch('agents.it_agent.load_it_rag_chain', return_value=(retriever, db, None)), \
+         patch('rag.prefetch._load_databases', return_value={"IT": db, "FINANCE": db}), \
+         patch('rag.prefetch.get_embeddings', return_value=embeddings):
+        workflow = create_supervisor_workflow(speculative=speculative)
+        for query in queries:
+            route_cache.clear()
+            start = time.perf_counter()
+            workflow.invoke({"query": query})
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare workflow latency with and without speculative retrieval")
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--classify-ms", type=float, default=600, help="Supervisor LLM latency")
+    parser.add_argument("--embed-ms", type=float, default=120, help="Query embedding latency")
+    parser.add_argument("--search-ms", type=float, default=40, help="Vector search latency per collection")
+    args = parser.parse_args()
+
+    queries = [f"VPN keeps disconnecting on laptop {i}" for i in range(args.queries)]
+    for speculative in (False, True):
+        latencies = run(queries, speculative, args.classify_ms / 1000, args.embed_ms / 1000, args.search_ms / 1000)
+        print(f"speculative={str(speculative):5}  mean {statistics.mean(latencies) * 1000:7.1f}ms  "
+              f"p50 {statistics.median(latencies) * 1000:7.1f}ms  max {max(latencies) * 1000:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
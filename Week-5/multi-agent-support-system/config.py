@@ -1,13 +1,40 @@
 import os
+import threading
 from dotenv import load_dotenv
 from langchain_aws import ChatBedrockConverse, BedrockEmbeddings
 
 load_dotenv()
 
+# Chat model for every agent; prompt_cache checks it for prompt caching support
+MODEL_ID = os.environ.get("BEDROCK_MODEL_ID", "anthropic.claude-3-5-sonnet-20240620-v1:0")
+
+# Long-lived processes (the HTTP server) share clients and retrievers across
+# requests; everything else builds them per call as before.
+_shared_resources = None
+_shared_lock = threading.Lock()
+
+def enable_shared_resources():
+    global _shared_resources
+    with _shared_lock:
+        if _shared_resources is None:
+            _shared_resources = {}
+
+def shared_resource(name, factory):
+    """Return the cached ``factory()`` result when sharing is enabled."""
+    if _shared_resources is None:
+        return factory()
+    with _shared_lock:
+        if name not in _shared_resources:
+            _shared_resources[name] = factory()
+        return _shared_resources[name]
+
 def get_llm():
+    return shared_resource("llm", _create_llm)
+
+def _create_llm():
     try:
         return ChatBedrockConverse(
-            model_id="anthropic.claude-3-5-sonnet-20240620-v1:0",
+            model_id=MODEL_ID,
             region_name=os.environ["AWS_REGION"],
             aws_access_key_id=os.environ["AWS_ACCESS_KEY_ID"],
             aws_secret_access_key=os.environ["AWS_SECRET_ACCESS_KEY"],
@@ -16,6 +43,10 @@ def get_llm():
         raise EnvironmentError(f"Missing AWS env variable: {e}")
 
 def get_embeddings():
+    # Same backend as the RAG chains, so prefetched query vectors match the indexes
+    from rag.local_embeddings import embedding_backend, get_local_embeddings
+    if embedding_backend() == "local":
+        return get_local_embeddings()
     return BedrockEmbeddings(
         model_id="amazon.titan-embed-text-v1",
         region_name=os.environ["AWS_REGION"],
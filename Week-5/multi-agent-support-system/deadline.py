@@ -0,0 +1,247 @@
+"""
+Per-request deadlines for the multi-agent support system.
+
+``route_query`` (and the HTTP server) put an absolute ``deadline`` into the
+graph state. Each node enters ``deadline_scope`` with it, so the LLM,
+retriever and Tavily calls made underneath, including from agent tools,
+can read the remaining budget without it being passed through every
+signature.
+
+Async calls are cancelled when the budget runs out. Sync calls run on a
+worker thread and are abandoned instead, since Python threads cannot be
+interrupted; their late results are dropped. Either way the caller gets
+``DeadlineExceeded`` and can degrade to a partial answer.
+"""
+import asyncio
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+import metrics
+
+# End-to-end budget for one query, in seconds (0 disables deadlines)
+REQUEST_DEADLINE_SECONDS = float(os.environ.get("REQUEST_DEADLINE_SECONDS", "60"))
+
+TIMEOUT_MESSAGE = "I couldn't finish answering within the time limit. Please try again or narrow the question."
+PARTIAL_PREFIX = "I ran out of time before finishing. Here is what I found so far:"
+
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="deadline")
+_current = contextvars.ContextVar("request_deadline", default=None)
+# Deadline already enforced by the deadline worker this code runs on, if any
+_worker_deadline = contextvars.ContextVar("deadline_worker", default=None)
+# Recently missed deadlines, so a request is counted once however many stages miss
+_missed = deque(maxlen=1024)
+_missed_lock = threading.Lock()
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's deadline passed before ``stage`` finished."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Deadline exceeded during {stage}")
+        self.stage = stage
+        # Agent messages produced before the deadline, for partial answers
+        self.messages = []
+
+
+def new_deadline(budget: float = None) -> Optional[float]:
+    """Absolute ``time.monotonic()`` deadline ``budget`` seconds from now, or None if disabled."""
+    budget = REQUEST_DEADLINE_SECONDS if budget is None else budget
+    if budget <= 0:
+        return None
+    metrics.increment("deadline.requests")
+    return time.monotonic() + budget
+
+
+def current_deadline() -> Optional[float]:
+    return _current.get()
+
+
+def remaining(deadline: float = None) -> Optional[float]:
+    """Seconds left before ``deadline`` (default: the current scope's), or None without one."""
+    deadline = current_deadline() if deadline is None else deadline
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[float]):
+    """Make ``deadline`` the current deadline; None keeps the enclosing one."""
+    if deadline is None:
+        yield
+        return
+    token = _current.set(deadline)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def state_deadline(state) -> Optional[float]:
+    return state.get("deadline") if isinstance(state, dict) else None
+
+
+def scoped(node):
+    """Run a graph node (sync or async) inside the ``deadline`` of its input state."""
+    if inspect.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def async_wrapper(state, *args, **kwargs):
+            with deadline_scope(state_deadline(state)):
+                return await node(state, *args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(node)
+    def wrapper(state, *args, **kwargs):
+        with deadline_scope(state_deadline(state)):
+            return node(state, *args, **kwargs)
+    return wrapper
+
+
+def record_miss(stage: str):
+    """Count a miss for ``stage``, and for the request the first time its deadline is missed."""
+    metrics.increment(f"deadline.missed.{stage}")
+    deadline = current_deadline()
+    with _missed_lock:
+        if deadline in _missed:
+            return
+        _missed.append(deadline)
+    metrics.increment("deadline.missed")
+
+
+def check(stage: str):
+    """Raise ``DeadlineExceeded`` if the current deadline has already passed."""
+    left = remaining()
+    if left is not None and left <= 0:
+        record_miss(stage)
+        raise DeadlineExceeded(stage)
+
+
+def call(stage: str, fn, *args, **kwargs):
+    """
+    Run ``fn(*args, **kwargs)`` within the current deadline. Without one the
+    call runs inline; with one it runs on a worker thread (with a copy of
+    the caller's context) and is abandoned when the budget runs out.
+
+    Nested calls (retrieval inside an agent run that is itself on a worker)
+    run inline: the outer call already abandons the whole run at the same
+    deadline, and queueing behind other agent runs on the shared pool would
+    make every request miss it under load.
+    """
+    left = remaining()
+    if left is None:
+        return fn(*args, **kwargs)
+    check(stage)
+    enforced = _worker_deadline.get()
+    if enforced is not None and enforced <= current_deadline():
+        result = fn(*args, **kwargs)
+        check(stage)
+        return result
+
+    context = contextvars.copy_context()
+    context.run(_worker_deadline.set, current_deadline())
+    future = _executor.submit(context.run, fn, *args, **kwargs)
+    try:
+        return future.result(timeout=left)
+    except FutureTimeout:
+        future.cancel()
+        record_miss(stage)
+        raise DeadlineExceeded(stage) from None
+
+
+async def acall(stage: str, awaitable):
+    """Await ``awaitable`` within the current deadline, cancelling it when the budget runs out."""
+    left = remaining()
+    if left is None:
+        return await awaitable
+    if left <= 0:
+        # Close the never-awaited coroutine before giving up
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        record_miss(stage)
+        raise DeadlineExceeded(stage)
+    try:
+        return await asyncio.wait_for(awaitable, timeout=left)
+    except asyncio.TimeoutError:
+        record_miss(stage)
+        raise DeadlineExceeded(stage) from None
+
+
+def invoke_agent(stage: str, agent, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    ``agent.invoke(inputs)`` within the current deadline. The run is streamed
+    so that on ``DeadlineExceeded`` the messages produced so far are
+    attached to the exception.
+    """
+    if remaining() is None:
+        return agent.invoke(inputs)
+
+    latest = {"messages": []}
+
+    def run():
+        for values in agent.stream(inputs, stream_mode="values"):
+            latest.update(values)
+        return latest
+
+    try:
+        return call(stage, run)
+    except DeadlineExceeded as e:
+        e.messages = list(latest["messages"])
+        raise
+
+
+async def ainvoke_agent(stage: str, agent, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Async counterpart of :func:`invoke_agent`; the agent run is cancelled at the deadline."""
+    if remaining() is None:
+        return await agent.ainvoke(inputs)
+
+    latest = {"messages": []}
+
+    async def run():
+        async for values in agent.astream(inputs, stream_mode="values"):
+            latest.update(values)
+        return latest
+
+    try:
+        return await acall(stage, run())
+    except DeadlineExceeded as e:
+        e.messages = list(latest["messages"])
+        raise
+
+
+def partial_answer(messages) -> str:
+    """
+    Best answer available from an interrupted agent run: the last complete
+    AI answer, else the tool results gathered so far, else a timeout notice.
+    """
+    for msg in reversed(messages or []):
+        if getattr(msg, "type", None) == "ai" and msg.content and not getattr(msg, "tool_calls", None):
+            return msg.content
+
+    findings = [
+        msg.content for msg in messages or []
+        if getattr(msg, "type", None) == "tool" and isinstance(msg.content, str) and msg.content.strip()
+    ]
+    if findings:
+        return PARTIAL_PREFIX + "\n\n" + "\n\n".join(findings)
+    return TIMEOUT_MESSAGE
+
+
+def get_deadline_report() -> Dict[str, Any]:
+    """Requests with a deadline, overall miss rate and misses per stage."""
+    counters = metrics.snapshot()["counters"]
+    prefix = "deadline.missed."
+    return {
+        "requests": counters.get("deadline.requests", 0),
+        "miss_rate": metrics.ratio("deadline.missed", "deadline.requests"),
+        "missed_by_stage": {
+            name[len(prefix):]: count for name, count in counters.items() if name.startswith(prefix)
+        },
+    }
@@ -0,0 +1,93 @@
+"""
+Parallel fan-out for cross-domain queries.
+
+When the supervisor labels a query ``IT+FINANCE`` the workflow runs the IT
+and finance specialists as parallel branches. Each branch has its own
+timeout, so a slow specialist yields a placeholder instead of holding up
+the other's answer, and a merge node combines whatever came back. The
+request deadline is passed on, so each specialist degrades to a partial
+answer on its own before its branch times out.
+"""
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import metrics
+
+BRANCH_TIMEOUT_SECONDS = float(os.environ.get("BRANCH_TIMEOUT_SECONDS", "60"))
+
+BRANCH_LABELS = {"IT": "IT", "FINANCE": "Finance"}
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="fanout")
+
+
+def _branch_input(state):
+    """The specialist's input: the query and the request deadline, if any."""
+    return {"query": state["query"], "deadline": state.get("deadline")}
+
+
+def _branch_result(route, response=None, error=None, started=None):
+    if started is not None:
+        metrics.observe(f"fanout.latency.{route.lower()}", time.perf_counter() - started)
+    return {"branch_responses": [{"route": route, "response": response, "error": error}]}
+
+
+def make_branch(agent, route, timeout=None):
+    """Wrap a sync specialist as a fan-out branch with a timeout."""
+    def branch(state):
+        started = time.perf_counter()
+        # Copy the context so graph callbacks (streaming, tracing) still apply
+        future = _executor.submit(contextvars.copy_context().run, agent, _branch_input(state))
+        try:
+            result = future.result(timeout=BRANCH_TIMEOUT_SECONDS if timeout is None else timeout)
+        except FutureTimeout:
+            # The worker thread cannot be interrupted; its late answer is dropped
+            metrics.increment("fanout.timeout")
+            return _branch_result(route, error="timeout", started=started)
+        except Exception as e:
+            metrics.increment("fanout.error")
+            return _branch_result(route, error=str(e), started=started)
+        return _branch_result(route, response=result.get("response", ""), started=started)
+    return branch
+
+
+def make_async_branch(agent, route, timeout=None):
+    """Wrap an async specialist as a fan-out branch with a timeout."""
+    async def branch(state):
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(
+                agent(_branch_input(state)),
+                timeout=BRANCH_TIMEOUT_SECONDS if timeout is None else timeout
+            )
+        except asyncio.TimeoutError:
+            metrics.increment("fanout.timeout")
+            return _branch_result(route, error="timeout", started=started)
+        except Exception as e:
+            metrics.increment("fanout.error")
+            return _branch_result(route, error=str(e), started=started)
+        return _branch_result(route, response=result.get("response", ""), started=started)
+    return branch
+
+
+def merge_branches(state):
+    """Combine the branch answers, IT first, into a single response."""
+    metrics.increment("fanout.merged")
+    order = list(BRANCH_LABELS)
+    sections = []
+    for branch in sorted(state.get("branch_responses", []), key=lambda b: order.index(b["route"])):
+        label = BRANCH_LABELS[branch["route"]]
+        if branch["error"] == "timeout":
+            body = f"The {label} specialist did not respond in time. Please ask again for the {label} part of your question."
+        elif branch["error"]:
+            body = f"The {label} specialist could not answer: {branch['error']}"
+        else:
+            body = branch["response"]
+        sections.append(f"{label}:\n{body}")
+
+    return {
+        "route": "IT+FINANCE",
+        "response": "\n\n".join(sections)
+    }
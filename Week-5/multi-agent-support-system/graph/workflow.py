@@ -1,12 +1,29 @@
+import inspect
+import operator
+from typing import Annotated, List, TypedDict
 from langgraph.graph import StateGraph
-from agents.routing_agent import supervisor_agent
-from agents.it_agent import it_agent
-from agents.finance_agent import finance_agent
+from agents.routing_agent import supervisor_agent, asupervisor_agent, MULTI_ROUTE
+from agents.it_agent import it_agent, ait_agent
+from agents.finance_agent import finance_agent, afinance_agent
+from graph.fanout import make_branch, make_async_branch, merge_branches
+from rag import prefetch
+
+class SupportState(TypedDict, total=False):
+    query: str
+    route: str
+    confidence: float
+    response: str
+    # Absolute time.monotonic() deadline for the whole request (see deadline.py)
+    deadline: float
+    # Parallel branches append here; the merge node combines them
+    branch_responses: Annotated[List[dict], operator.add]
 
 def route_to_agent(state):
     """Route based on supervisor's classification"""
     route = state.get("route", "IT")
-    if route == "FINANCE":
+    if route == MULTI_ROUTE:
+        return ["it_branch", "finance_branch"]
+    elif route == "FINANCE":
         return "finance_agent"
     elif route == "IRRELEVANT":
         return "irrelevant_handler"
@@ -21,20 +38,23 @@ def irrelevant_handler(state):
         "response": "I'm a corporate support system that handles IT and Finance-related queries only. For questions about weather, sports, cooking, or other non-business topics, please use appropriate external resources or contact the relevant department."
     }
 
-def create_supervisor_workflow():
+def build_workflow(supervisor, it, finance):
     """
-    Creates a supervisor-agent workflow:
-    1. Supervisor Agent classifies queries as IT, Finance, or Irrelevant
-    2. Routes to appropriate specialist agent or irrelevant handler
-    3. Specialist agents use their tools to provide responses
+    Supervisor graph over the given supervisor and specialist nodes. The
+    specialists are also wrapped as parallel branches for cross-domain
+    queries, using async branches when the specialists are coroutines.
     """
-    graph = StateGraph(dict)
+    branch = make_async_branch if inspect.iscoroutinefunction(it) else make_branch
+    graph = StateGraph(SupportState)
 
     # Add nodes
-    graph.add_node("supervisor", supervisor_agent)
-    graph.add_node("it_agent", it_agent)
-    graph.add_node("finance_agent", finance_agent)
+    graph.add_node("supervisor", supervisor)
+    graph.add_node("it_agent", it)
+    graph.add_node("finance_agent", finance)
     graph.add_node("irrelevant_handler", irrelevant_handler)
+    graph.add_node("it_branch", branch(it, "IT"))
+    graph.add_node("finance_branch", branch(finance, "FINANCE"))
+    graph.add_node("merge", merge_branches)
 
     # Set entry point
     graph.set_entry_point("supervisor")
@@ -46,19 +66,52 @@ def create_supervisor_workflow():
         {
             "it_agent": "it_agent",
             "finance_agent": "finance_agent",
-            "irrelevant_handler": "irrelevant_handler"
+            "irrelevant_handler": "irrelevant_handler",
+            "it_branch": "it_branch",
+            "finance_branch": "finance_branch"
         }
     )
 
+    # Both branches run in the same step, so merge waits for the two of them
+    graph.add_edge("it_branch", "merge")
+    graph.add_edge("finance_branch", "merge")
+
     # All agents are end points
     graph.set_finish_point("it_agent")
     graph.set_finish_point("finance_agent")
     graph.set_finish_point("irrelevant_handler")
+    graph.set_finish_point("merge")
 
     return graph.compile()
 
-# Create the compiled app
+def create_supervisor_workflow(speculative=None):
+    """
+    Creates a supervisor-agent workflow:
+    1. Supervisor Agent classifies queries as IT, Finance, both, or Irrelevant
+    2. Routes to appropriate specialist agent or irrelevant handler, or to
+       both specialists in parallel followed by a merge node
+    3. Specialist agents use their tools to provide responses
+
+    With speculative retrieval (SPECULATIVE_RETRIEVAL=true) both domains are
+    prefetched while the supervisor classifies.
+    """
+    speculative = prefetch.SPECULATIVE_RETRIEVAL if speculative is None else speculative
+    supervisor = prefetch.with_prefetch(supervisor_agent) if speculative else supervisor_agent
+    return build_workflow(supervisor, it_agent, finance_agent)
+
+def create_async_supervisor_workflow(speculative=None):
+    """
+    Same graph as create_supervisor_workflow with async supervisor and
+    specialist nodes; run it with ``ainvoke`` so LLM, retrieval and Tavily
+    calls are awaited instead of holding a thread per request.
+    """
+    speculative = prefetch.SPECULATIVE_RETRIEVAL if speculative is None else speculative
+    supervisor = prefetch.with_async_prefetch(asupervisor_agent) if speculative else asupervisor_agent
+    return build_workflow(supervisor, ait_agent, afinance_agent)
+
+# Create the compiled apps
 app = create_supervisor_workflow()
+async_app = create_async_supervisor_workflow()
 
 # Keep the old function for backward compatibility
 def create_dynamic_workflow():
@@ -1,26 +1,49 @@
 # Interactive main that uses dynamic routing agent to handle queries
-from agents.routing_agent import dynamic_routing_agent
-from graph.workflow import app
+from agents.routing_agent import dynamic_routing_agent, asupervisor_agent
+from graph.workflow import app, async_app
+from deadline import new_deadline
 
-def route_query(query: str) -> str:
+def route_query(query: str, timeout: float = None) -> str:
     """
     Route query using the dynamic routing agent that intelligently
     selects appropriate tools based on query content.
+
+    The whole request shares one deadline, ``timeout`` seconds (default
+    REQUEST_DEADLINE_SECONDS); stages that run out answer with what they have.
     """
+    request_deadline = new_deadline(timeout)
     try:
         # Option 1: Use the workflow app
-        result = app.invoke({"query": query})
+        result = app.invoke({"query": query, "deadline": request_deadline})
         return result.get("response", "No response generated.")
         
     except Exception as e:
         # Option 2: Fallback to direct agent call
         try:
-            state = {"query": query}
+            state = {"query": query, "deadline": request_deadline}
             result = dynamic_routing_agent(state)
             return result.get("response", "No response generated.")
         except Exception as fallback_e:
             return f"Error processing query: {str(e)}. Fallback error: {str(fallback_e)}"
 
+async def route_query_async(query: str, timeout: float = None) -> str:
+    """
+    Async counterpart of route_query for serving many concurrent
+    conversations from one event loop. Calls still in flight at the
+    deadline are cancelled.
+    """
+    request_deadline = new_deadline(timeout)
+    try:
+        result = await async_app.ainvoke({"query": query, "deadline": request_deadline})
+        return result.get("response", "No response generated.")
+
+    except Exception as e:
+        try:
+            result = await asupervisor_agent({"query": query, "deadline": request_deadline})
+            return result.get("response", "No response generated.")
+        except Exception as fallback_e:
+            return f"Error processing query: {str(e)}. Fallback error: {str(fallback_e)}"
+
 def main_loop():
     print("\n\n\nEnter your question below: (Type 'exit' to quit)\n")
     try:
@@ -0,0 +1,81 @@
+"""
+In-process counters and latency samples for the multi-agent support system.
+
+Kept dependency-free so any module (agents, RAG chains, tools) can record
+metrics without caring about where they are exported.
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# Latency samples kept per metric for percentile estimates
+MAX_SAMPLES = 2048
+
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_samples = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+
+
+def increment(name: str, value: int = 1):
+    with _lock:
+        _counters[name] += value
+
+
+def observe(name: str, seconds: float):
+    with _lock:
+        _samples[name].append(seconds)
+
+
+@contextmanager
+def timer(name: str):
+    """Record the wall-clock duration of the wrapped block under ``name``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def get_count(name: str) -> int:
+    with _lock:
+        return _counters[name]
+
+
+def ratio(numerator: str, *denominators: str) -> float:
+    """``numerator`` divided by the sum of ``denominators`` (0.0 when empty)."""
+    with _lock:
+        total = sum(_counters[d] for d in denominators)
+        return _counters[numerator] / total if total else 0.0
+
+
+def percentile(name: str, q: float) -> float:
+    with _lock:
+        samples = sorted(_samples[name])
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, max(0, round(q / 100 * (len(samples) - 1))))
+    return samples[index]
+
+
+def snapshot() -> dict:
+    with _lock:
+        counters = dict(_counters)
+        samples = {name: sorted(values) for name, values in _samples.items() if values}
+
+    latencies = {}
+    for name, values in samples.items():
+        latencies[name] = {
+            "count": len(values),
+            "avg": sum(values) / len(values),
+            "p50": values[(len(values) - 1) // 2],
+            "p95": values[round(0.95 * (len(values) - 1))],
+        }
+
+    return {"counters": counters, "latency": latencies}
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _samples.clear()
@@ -0,0 +1,114 @@
+"""
+Prompt-prefix caching for Bedrock Converse models.
+
+Prompts are split into a static prefix (instructions, routing guide,
+process rules) and a dynamic suffix (the user query, retrieved context).
+For models that support Bedrock prompt caching, the static prefix is sent
+as a system message ending in a cache checkpoint, so repeat calls only pay
+for the suffix. Other models get the same text as one plain string.
+
+Bedrock only caches prefixes above a model-specific minimum (about 1,024
+tokens for Claude Sonnet), so short prompts report zero cached tokens even
+on supported models.
+"""
+import logging
+import os
+from typing import Any, Dict, List, Union
+
+from langchain_aws import ChatBedrockConverse
+from langchain_core.messages import HumanMessage, SystemMessage
+
+import metrics
+from config import MODEL_ID
+
+logger = logging.getLogger(__name__)
+
+# "auto": checkpoint on models that support caching; "off": never
+PROMPT_CACHE = os.environ.get("PROMPT_CACHE", "auto").lower()
+# Model id fragments with Bedrock prompt caching (matches inference profiles too)
+PROMPT_CACHE_MODELS = [
+    fragment.strip()
+    for fragment in os.environ.get(
+        "PROMPT_CACHE_MODELS",
+        "claude-3-7-sonnet,claude-3-5-haiku,claude-sonnet-4,claude-opus-4,claude-haiku-4,nova-"
+    ).split(",")
+    if fragment.strip()
+]
+
+
+def supports_prompt_cache(model_id: str = MODEL_ID) -> bool:
+    if PROMPT_CACHE == "off":
+        return False
+    return any(fragment in model_id for fragment in PROMPT_CACHE_MODELS)
+
+
+def cacheable_system_prompt(static: str, model_id: str = MODEL_ID) -> Union[str, SystemMessage]:
+    """System prompt for ``create_agent``, with a cache checkpoint when supported."""
+    if not supports_prompt_cache(model_id):
+        return static
+    return SystemMessage(content=[
+        {"type": "text", "text": static},
+        ChatBedrockConverse.create_cache_point(),
+    ])
+
+
+def cacheable_prompt(static: str, dynamic: str, model_id: str = MODEL_ID) -> Union[str, List]:
+    """
+    LLM input with ``static`` first and ``dynamic`` last. Supported models get
+    ``[SystemMessage(static + checkpoint), HumanMessage(dynamic)]``;
+    others a single string.
+    """
+    if not supports_prompt_cache(model_id):
+        return f"{static.rstrip()}\n\n{dynamic}"
+    return [cacheable_system_prompt(static, model_id), HumanMessage(content=dynamic)]
+
+
+def record_usage(call: str, message) -> Dict[str, int]:
+    """
+    Record the input, cache-read and cache-write token counts of one LLM
+    response under ``call`` and return them. Responses without usage
+    metadata (fakes, errors) are ignored.
+    """
+    usage = getattr(message, "usage_metadata", None)
+    if not isinstance(usage, dict):
+        return {}
+
+    details = usage.get("input_token_details") or {}
+    counts = {
+        "input_tokens": int(usage.get("input_tokens", 0)),
+        "cache_read_tokens": int(details.get("cache_read", 0)),
+        "cache_write_tokens": int(details.get("cache_creation", 0)),
+    }
+    metrics.increment(f"prompt_cache.{call}.calls")
+    for name, value in counts.items():
+        metrics.increment(f"prompt_cache.{call}.{name}", value)
+    logger.debug("%s: %d input tokens, %d read from cache, %d written to cache",
+                 call, counts["input_tokens"], counts["cache_read_tokens"], counts["cache_write_tokens"])
+    return counts
+
+
+def record_agent_usage(call: str, result: Dict[str, Any]):
+    """Record usage for every LLM round trip of an agent run."""
+    for msg in result.get("messages", []):
+        if getattr(msg, "type", None) == "ai":
+            record_usage(call, msg)
+
+
+def get_prompt_cache_report() -> Dict[str, Any]:
+    """Calls, token counts and cache-read share of input tokens per call site."""
+    calls = sorted({
+        name.split(".")[1] for name in metrics.snapshot()["counters"]
+        if name.startswith("prompt_cache.") and name.endswith(".calls")
+    })
+    report = {}
+    for call in calls:
+        input_tokens = metrics.get_count(f"prompt_cache.{call}.input_tokens")
+        cache_read = metrics.get_count(f"prompt_cache.{call}.cache_read_tokens")
+        report[call] = {
+            "calls": metrics.get_count(f"prompt_cache.{call}.calls"),
+            "input_tokens": input_tokens,
+            "cache_read_tokens": cache_read,
+            "cache_write_tokens": metrics.get_count(f"prompt_cache.{call}.cache_write_tokens"),
+            "cache_read_ratio": cache_read / input_tokens if input_tokens else 0.0,
+        }
+    return report
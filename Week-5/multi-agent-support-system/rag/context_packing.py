@@ -0,0 +1,190 @@
+"""
+Context assembly for RAG prompts.
+
+Policy PDFs are split with ``chunk_overlap=150``, so the top-k chunks for a
+question often include neighbours from the same page that repeat each other's
+text. Before the chunks go into a prompt they are:
+
+1. merged when they come from the same source/page and overlap (or one
+   contains the other), so the shared span is sent once;
+2. dropped when they are near-duplicates of a higher-ranked passage;
+3. packed in relevance order until the token budget is used up.
+"""
+import os
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+# Rough chars-per-token ratio for English prose; good enough for budgeting
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "2000"))
+
+# Shortest suffix/prefix match treated as chunk overlap rather than chance
+MIN_OVERLAP_CHARS = 30
+# Longest overlap searched; a bit above the splitter's chunk_overlap
+MAX_OVERLAP_CHARS = 400
+# Word-shingle Jaccard similarity above which two passages are duplicates
+NEAR_DUPLICATE_THRESHOLD = 0.85
+SHINGLE_SIZE = 3
+
+
+@dataclass
+class Passage:
+    text: str
+    rank: int
+    score: Optional[float] = None
+    metadata: dict = field(default_factory=dict)
+    key: object = None
+
+
+def approx_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of ``left`` that is also a prefix of ``right``."""
+    tail = left[-MAX_OVERLAP_CHARS:]
+    probe = right[:MIN_OVERLAP_CHARS]
+    if len(probe) < MIN_OVERLAP_CHARS:
+        return 0
+
+    start = tail.find(probe)
+    while start != -1:
+        if right.startswith(tail[start:]):
+            return len(tail) - start
+        start = tail.find(probe, start + 1)
+    return 0
+
+
+def _shingles(text: str) -> set:
+    words = re.findall(r"\w+", text.lower())
+    size = min(SHINGLE_SIZE, len(words)) or 1
+    return {tuple(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _group_key(doc, position):
+    metadata = getattr(doc, "metadata", None)
+    if not isinstance(metadata, dict) or "source" not in metadata:
+        # Unknown provenance: never merge with anything else
+        return ("__chunk__", position)
+    return (metadata.get("source"), metadata.get("page"))
+
+
+def _start_index(doc, position):
+    metadata = getattr(doc, "metadata", None)
+    if isinstance(metadata, dict):
+        return metadata.get("start_index", position)
+    return position
+
+
+def _merge_into(passage: Passage, text: str) -> bool:
+    """Fold ``text`` into ``passage`` if they overlap; return True on merge."""
+    if text in passage.text:
+        return True
+    if passage.text in text:
+        passage.text = text
+        return True
+
+    overlap = _overlap(passage.text, text)
+    if overlap:
+        passage.text += text[overlap:]
+        return True
+
+    overlap = _overlap(text, passage.text)
+    if overlap:
+        passage.text = text + passage.text[overlap:]
+        return True
+
+    return False
+
+
+def merge_passages(docs: Sequence, scores: Optional[Sequence[float]] = None) -> List[Passage]:
+    """
+    Merge overlapping chunks from the same source/page and drop
+    near-duplicates. ``docs`` are expected most relevant first; each passage
+    keeps the best rank and score of the chunks folded into it.
+    """
+    passages: List[Passage] = []
+
+    # Within a page, merge in document order when the splitter recorded it
+    order = sorted(
+        range(len(docs)),
+        key=lambda i: (str(_group_key(docs[i], i)), _start_index(docs[i], i)),
+    )
+
+    for i in order:
+        doc = docs[i]
+        text = (doc.page_content or "").strip()
+        if not text:
+            continue
+
+        key = _group_key(doc, i)
+        score = scores[i] if scores is not None else None
+
+        for passage in passages:
+            if passage.key == key and _merge_into(passage, text):
+                passage.rank = min(passage.rank, i)
+                if score is not None:
+                    passage.score = max(passage.score if passage.score is not None else score, score)
+                break
+        else:
+            metadata = getattr(doc, "metadata", None)
+            metadata = metadata if isinstance(metadata, dict) else {}
+            passages.append(Passage(text=text, rank=i, score=score, metadata=metadata, key=key))
+
+    passages.sort(key=lambda p: p.rank)
+
+    unique: List[Passage] = []
+    unique_shingles = []
+    for passage in passages:
+        shingles = _shingles(passage.text)
+        if any(_jaccard(shingles, seen) >= NEAR_DUPLICATE_THRESHOLD for seen in unique_shingles):
+            continue
+        unique.append(passage)
+        unique_shingles.append(shingles)
+
+    return unique
+
+
+def pack_passages(
+    docs: Sequence,
+    scores: Optional[Sequence[float]] = None,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+) -> List[Passage]:
+    """Merged passages in relevance order, truncated to fit ``token_budget``."""
+    packed = []
+    remaining = token_budget
+
+    for passage in merge_passages(docs, scores):
+        cost = approx_tokens(passage.text)
+        if cost <= remaining:
+            packed.append(passage)
+            remaining -= cost
+            continue
+
+        # Fill what is left with the start of the passage, cut at a word break
+        max_chars = remaining * CHARS_PER_TOKEN
+        if max_chars >= MIN_OVERLAP_CHARS:
+            cut = passage.text.rfind(" ", 0, max_chars)
+            passage.text = passage.text[:cut if cut > 0 else max_chars].rstrip()
+            packed.append(passage)
+        break
+
+    return packed
+
+
+def assemble_context(
+    docs: Optional[Sequence],
+    scores: Optional[Sequence[float]] = None,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    separator: str = "\n\n",
+) -> str:
+    if not docs:
+        return ""
+    return separator.join(p.text for p in pack_passages(docs, scores, token_budget))
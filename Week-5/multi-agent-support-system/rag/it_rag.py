@@ -2,33 +2,48 @@ import os
 from langchain_chroma import Chroma
 from langchain_aws import BedrockEmbeddings, ChatBedrock
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnableLambda, RunnablePassthrough
+from langchain_core.runnables import RunnableLambda
 from tools.tavily_tool import tavily_search
+from rag.mmap_index import MmapVectorStore
+from rag.local_embeddings import embedding_backend, get_local_embeddings, index_dir
+from rag.context_packing import assemble_context
+from rag.web_fallback import build_chain_inputs
 
 CHROMA_DIR = "vectorstore/it_chroma"
+MMAP_DIR = "vectorstore/it_mmap"
 COLLECTION = "IT_policy"
 
 def _format_docs(docs):
     if not docs:
         return ""
-    return "\n\n".join(d.page_content for d in docs)
+    return assemble_context(docs)
 
 def _web_search(input_dict):
     return tavily_search(input_dict["question"])
 
 def load_it_rag_chain():
-    embeddings = BedrockEmbeddings(
-        model_id="amazon.titan-embed-text-v1",
-        region_name=os.environ["AWS_REGION"],
-        aws_access_key_id=os.environ["AWS_ACCESS_KEY_ID"],
-        aws_secret_access_key=os.environ["AWS_SECRET_ACCESS_KEY"],
-    )
+    if embedding_backend() == "local":
+        embeddings = get_local_embeddings()
+    else:
+        embeddings = BedrockEmbeddings(
+            model_id="amazon.titan-embed-text-v1",
+            region_name=os.environ["AWS_REGION"],
+            aws_access_key_id=os.environ["AWS_ACCESS_KEY_ID"],
+            aws_secret_access_key=os.environ["AWS_SECRET_ACCESS_KEY"],
+        )
 
-    db = Chroma(
-        persist_directory=CHROMA_DIR,
-        embedding_function=embeddings,
-        collection_name=COLLECTION
-    )
+    if os.environ.get("VECTOR_BACKEND", "chroma").lower() == "mmap":
+        db = MmapVectorStore(
+            persist_directory=index_dir(MMAP_DIR),
+            embedding_function=embeddings,
+            collection_name=COLLECTION
+        )
+    else:
+        db = Chroma(
+            persist_directory=index_dir(CHROMA_DIR),
+            embedding_function=embeddings,
+            collection_name=COLLECTION
+        )
 
     retriever = db.as_retriever(search_kwargs={"k": 4})
 
@@ -58,12 +73,9 @@ Question:
 """
     )
 
+    # Web search only runs when internal retrieval is not confident enough
     chain = (
-        {
-            "context": retriever | _format_docs,
-            "web_context": RunnableLambda(_web_search),
-            "question": RunnablePassthrough()
-        }
+        RunnableLambda(lambda question: build_chain_inputs(db, question, _web_search))
         | prompt
         | llm
     )
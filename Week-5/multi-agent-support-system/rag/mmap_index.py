@@ -0,0 +1,406 @@
+"""
+Memory-mapped vector index used as a drop-in alternative to Chroma.
+
+The index is a directory holding a contiguous float16 (or int8 + per-row
+scale) embedding matrix saved with numpy, plus a JSONL metadata sidecar.
+Everything is opened with ``mmap_mode="r"``, so opening the index is close to
+free and several worker processes share the same page-cached files instead of
+each loading their own copy of Chroma's SQLite/HNSW state.
+
+Search is exact (one vectorized matrix product over the mapped rows) or,
+when the index was built with ``nlist > 0``, IVF: rows are stored grouped by
+k-means cluster so each inverted list is a contiguous slice of the matrix and
+only the ``nprobe`` closest lists are scanned.
+"""
+import json
+import mmap
+import os
+import shutil
+import uuid
+from typing import Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+MANIFEST = "manifest.json"
+VECTORS = "vectors.npy"
+SCALES = "scales.npy"
+CENTROIDS = "centroids.npy"
+LIST_OFFSETS = "list_offsets.npy"
+DOCS = "docs.jsonl"
+DOC_OFFSETS = "docs_offsets.npy"
+
+SUPPORTED_DTYPES = ("float16", "int8")
+
+# Rows scored per matrix product in exact search; bounds the float32 scratch
+# memory when the mapped matrix is large.
+SEARCH_BLOCK_ROWS = 65536
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+
+    # Symmetric per-row int8: row ~= q * scale
+    scales = np.abs(vectors).max(axis=1)
+    scales[scales == 0] = 1.0
+    scales = (scales / 127.0).astype(np.float32)
+    quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales
+
+
+def _kmeans(vectors: np.ndarray, nlist: int, iterations: int = 20, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Spherical k-means over normalized rows; returns (centroids, assignments)."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=nlist, replace=False)].copy()
+    assignments = np.zeros(len(vectors), dtype=np.int64)
+
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(nlist):
+            members = vectors[assignments == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+            else:
+                # Re-seed empty clusters so every list stays usable
+                centroids[c] = vectors[rng.integers(len(vectors))]
+        centroids = _normalize(centroids)
+
+    return centroids, np.argmax(vectors @ centroids.T, axis=1)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    if k >= len(scores):
+        return np.argsort(-scores)
+    candidates = np.argpartition(-scores, k)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+class MmapVectorStore(VectorStore):
+    """
+    Read-mostly vector store backed by memory-mapped numpy files.
+
+    Constructed with the same keyword arguments as ``Chroma`` so it can be
+    swapped in where the persisted Chroma collection is opened today.
+    """
+
+    def __init__(
+        self,
+        persist_directory: str,
+        embedding_function: Embeddings,
+        collection_name: str,
+        nprobe: int = 8,
+    ):
+        self.index_dir = os.path.join(persist_directory, collection_name)
+        self._embedding = embedding_function
+        self.nprobe = nprobe
+        self._open()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def _open(self):
+        self.dtype = "float16"
+        self.dim = 0
+        self.count = 0
+        self._vectors = None
+        self._scales = None
+        self._centroids = None
+        self._list_offsets = None
+        self._doc_offsets = None
+        self._docs_map = None
+
+        manifest_path = os.path.join(self.index_dir, MANIFEST)
+        if not os.path.exists(manifest_path):
+            return
+
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+        self.dtype = manifest["dtype"]
+        self.dim = manifest["dim"]
+        self.count = manifest["count"]
+        if not self.count:
+            return
+
+        def load(name):
+            return np.load(os.path.join(self.index_dir, name), mmap_mode="r")
+
+        self._vectors = load(VECTORS)
+        self._doc_offsets = load(DOC_OFFSETS)
+        if self.dtype == "int8":
+            self._scales = load(SCALES)
+        if manifest.get("nlist"):
+            self._centroids = np.asarray(load(CENTROIDS), dtype=np.float32)
+            self._list_offsets = np.asarray(load(LIST_OFFSETS))
+
+        with open(os.path.join(self.index_dir, DOCS), "rb") as f:
+            self._docs_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+    @staticmethod
+    def write_index(
+        index_dir: str,
+        vectors: np.ndarray,
+        records: List[dict],
+        dtype: str = "float16",
+        nlist: int = 0,
+    ):
+        """
+        Write an index directory from raw vectors and ``{"id", "page_content",
+        "metadata"}`` records. The directory is replaced atomically so readers
+        that already mapped the previous files keep working.
+        """
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported dtype: {dtype}. Use one of {SUPPORTED_DTYPES}")
+
+        vectors = _normalize(vectors)
+        if len(vectors) != len(records):
+            raise ValueError("Number of vectors and records must match")
+
+        nlist = min(nlist, len(vectors))
+        centroids = None
+        if nlist > 0:
+            centroids, assignments = _kmeans(vectors, nlist)
+            # Store rows grouped by list so each list is a contiguous slice
+            order = np.argsort(assignments, kind="stable")
+            vectors = vectors[order]
+            records = [records[i] for i in order]
+            list_offsets = np.zeros(nlist + 1, dtype=np.int64)
+            list_offsets[1:] = np.cumsum(np.bincount(assignments, minlength=nlist))
+
+        tmp_dir = f"{index_dir}.tmp-{uuid.uuid4().hex}"
+        os.makedirs(tmp_dir)
+
+        quantized, scales = _quantize(vectors, dtype)
+        np.save(os.path.join(tmp_dir, VECTORS), quantized)
+        if scales is not None:
+            np.save(os.path.join(tmp_dir, SCALES), scales)
+        if centroids is not None:
+            np.save(os.path.join(tmp_dir, CENTROIDS), centroids)
+            np.save(os.path.join(tmp_dir, LIST_OFFSETS), list_offsets)
+
+        offsets = np.zeros(len(records) + 1, dtype=np.int64)
+        with open(os.path.join(tmp_dir, DOCS), "wb") as f:
+            for i, record in enumerate(records):
+                f.write(json.dumps(record).encode("utf-8") + b"\n")
+                offsets[i + 1] = f.tell()
+        np.save(os.path.join(tmp_dir, DOC_OFFSETS), offsets)
+
+        with open(os.path.join(tmp_dir, MANIFEST), "w") as f:
+            json.dump(
+                {
+                    "dtype": dtype,
+                    "dim": int(vectors.shape[1]) if len(vectors) else 0,
+                    "count": len(records),
+                    "nlist": nlist,
+                },
+                f,
+            )
+
+        old_dir = None
+        if os.path.exists(index_dir):
+            old_dir = f"{index_dir}.old-{uuid.uuid4().hex}"
+            os.replace(index_dir, old_dir)
+        os.replace(tmp_dir, index_dir)
+        if old_dir:
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+    def _records(self) -> List[dict]:
+        return [self._read_record(i) for i in range(self.count)]
+
+    def _dequantized(self) -> np.ndarray:
+        if not self.count:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        vectors = np.asarray(self._vectors, dtype=np.float32)
+        if self._scales is not None:
+            vectors = vectors * self._scales[:, None]
+        return vectors
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """
+        Embed and append texts. The whole index is rewritten, which is fine for
+        the read-mostly policy corpora this store targets.
+        """
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [uuid.uuid4().hex for _ in texts]
+        if not texts:
+            return []
+
+        new_vectors = np.asarray(self._embedding.embed_documents(texts), dtype=np.float32)
+        new_records = [
+            {"id": i, "page_content": t, "metadata": m}
+            for i, t, m in zip(ids, texts, metadatas)
+        ]
+
+        vectors = np.vstack([self._dequantized(), new_vectors]) if self.count else new_vectors
+        records = self._records() + new_records
+        nlist = kwargs.get("nlist", len(self._centroids) if self._centroids is not None else 0)
+
+        self.close()
+        self.write_index(self.index_dir, vectors, records, kwargs.get("dtype", self.dtype), nlist)
+        self._open()
+        return ids
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        persist_directory: str = "vectorstore",
+        collection_name: str = "default",
+        dtype: str = "float16",
+        nlist: int = 0,
+        **kwargs: Any,
+    ) -> "MmapVectorStore":
+        index_dir = os.path.join(persist_directory, collection_name)
+        if os.path.exists(index_dir):
+            shutil.rmtree(index_dir)
+        os.makedirs(persist_directory, exist_ok=True)
+
+        store = cls(
+            persist_directory=persist_directory,
+            embedding_function=embedding,
+            collection_name=collection_name,
+        )
+        store.add_texts(texts, metadatas=metadatas, ids=ids, dtype=dtype, nlist=nlist)
+        return store
+
+    @classmethod
+    def from_chroma(
+        cls,
+        chroma_db,
+        persist_directory: str,
+        collection_name: str,
+        dtype: str = "float16",
+        nlist: int = 0,
+    ) -> "MmapVectorStore":
+        """Export an existing Chroma collection without re-embedding it."""
+        data = chroma_db.get(include=["embeddings", "documents", "metadatas"])
+        records = [
+            {"id": i, "page_content": d, "metadata": m or {}}
+            for i, d, m in zip(data["ids"], data["documents"], data["metadatas"])
+        ]
+        os.makedirs(persist_directory, exist_ok=True)
+        cls.write_index(
+            os.path.join(persist_directory, collection_name),
+            np.asarray(data["embeddings"], dtype=np.float32),
+            records,
+            dtype=dtype,
+            nlist=nlist,
+        )
+        return cls(
+            persist_directory=persist_directory,
+            embedding_function=chroma_db.embeddings,
+            collection_name=collection_name,
+        )
+
+    # ------------------------------------------------------------------
+    # Searching
+    # ------------------------------------------------------------------
+    def _read_record(self, row: int) -> dict:
+        start, end = int(self._doc_offsets[row]), int(self._doc_offsets[row + 1])
+        return json.loads(self._docs_map[start:end])
+
+    def _score_rows(self, query: np.ndarray, start: int, end: int) -> np.ndarray:
+        scores = np.empty(end - start, dtype=np.float32)
+        for block in range(start, end, SEARCH_BLOCK_ROWS):
+            stop = min(block + SEARCH_BLOCK_ROWS, end)
+            rows = np.asarray(self._vectors[block:stop], dtype=np.float32)
+            block_scores = rows @ query
+            if self._scales is not None:
+                block_scores *= self._scales[block:stop]
+            scores[block - start:stop - start] = block_scores
+        return scores
+
+    def _search(self, embedding: List[float], k: int) -> List[Tuple[int, float]]:
+        if not self.count or k <= 0:
+            return []
+
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+
+        if self._centroids is None:
+            scores = self._score_rows(query, 0, self.count)
+            rows = np.arange(self.count)
+        else:
+            probe = _top_k(self._centroids @ query, min(self.nprobe, len(self._centroids)))
+            spans = [
+                (int(self._list_offsets[c]), int(self._list_offsets[c + 1]))
+                for c in probe
+            ]
+            spans = [(s, e) for s, e in spans if e > s]
+            if not spans:
+                return []
+            scores = np.concatenate([self._score_rows(query, s, e) for s, e in spans])
+            rows = np.concatenate([np.arange(s, e) for s, e in spans])
+
+        best = _top_k(scores, k)
+        # float16/int8 rounding can push a perfect match slightly past 1.0
+        return [(int(rows[i]), float(np.clip(scores[i], -1.0, 1.0))) for i in best]
+
+    def _to_document(self, row: int) -> Document:
+        record = self._read_record(row)
+        return Document(
+            id=record["id"],
+            page_content=record["page_content"],
+            metadata=record["metadata"],
+        )
+
+    def similarity_search_by_vector_with_score(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Return (document, cosine distance) pairs, lowest distance first."""
+        return [(self._to_document(row), 1.0 - score) for row, score in self._search(embedding, k)]
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        embedding = self._embedding.embed_query(query)
+        return self.similarity_search_by_vector_with_score(embedding, k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        return self._cosine_relevance_score_fn
+
+    def get_by_ids(self, ids) -> List[Document]:
+        wanted = set(ids)
+        return [
+            Document(id=r["id"], page_content=r["page_content"], metadata=r["metadata"])
+            for r in self._records()
+            if r["id"] in wanted
+        ]
+
+    def close(self):
+        if self._docs_map is not None:
+            self._docs_map.close()
+        self._docs_map = None
+        self._vectors = None
+        self._scales = None
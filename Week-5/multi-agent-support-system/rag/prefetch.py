@@ -0,0 +1,182 @@
+"""
+Speculative retrieval while the supervisor classifies.
+
+With ``SPECULATIVE_RETRIEVAL=true`` the workflow's supervisor node starts a
+background prefetch before classifying: the query is embedded once and the
+top-k chunks are fetched from both the IT and finance collections by vector.
+The chosen specialist takes its domain's result (waiting for it if it is
+still in flight) and the other domain's result is discarded, unless the
+query fans out to both specialists.
+
+Inside the specialist, the prefetched documents are exposed through
+``warm_documents`` so the first internal search tool call uses them instead
+of retrieving again.
+"""
+import contextvars
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import deadline
+import metrics
+from config import get_embeddings, shared_resource
+
+SPECULATIVE_RETRIEVAL = os.environ.get("SPECULATIVE_RETRIEVAL", "false").lower() == "true"
+PREFETCH_K = 4
+# Longest a specialist waits for an in-flight prefetch before retrieving itself
+PREFETCH_WAIT_SECONDS = float(os.environ.get("PREFETCH_WAIT_SECONDS", "5"))
+# Prefetches not claimed within this many seconds are dropped
+PREFETCH_TTL = 60.0
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="prefetch")
+# Per-domain searches get their own pool: a prefetch waits on them, so running
+# them on _executor would deadlock once every worker is a waiting prefetch
+_search_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="prefetch-search")
+# normalized query -> [created, future, routes still to be claimed or None]
+_pending: Dict[str, list] = {}
+_lock = threading.Lock()
+
+_warm = contextvars.ContextVar("warm_documents", default=None)
+
+
+def _key(query: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", query.lower()))
+
+
+def _load_databases():
+    """Vector stores of both domains, shared with the specialists' tools."""
+    from rag.it_rag import load_it_rag_chain
+    from rag.finance_rag import load_finance_rag_chain
+
+    return {
+        "IT": shared_resource("it_rag", load_it_rag_chain)[1],
+        "FINANCE": shared_resource("finance_rag", load_finance_rag_chain)[1],
+    }
+
+
+def _prefetch(query: str, k: int) -> Dict[str, List]:
+    start = time.perf_counter()
+    embeddings = shared_resource("embeddings", get_embeddings)
+    databases = _load_databases()
+
+    # Both collections are built with the same embedding model, so one embedding serves both
+    vector = embeddings.embed_query(query)
+    searches = {
+        route: _search_executor.submit(db.similarity_search_by_vector, vector, k=k)
+        for route, db in databases.items()
+    }
+    results = {route: future.result() for route, future in searches.items()}
+    metrics.observe("prefetch.latency", time.perf_counter() - start)
+    return results
+
+
+def start_prefetch(query: str, k: int = PREFETCH_K) -> Future:
+    """Start prefetching both domains for ``query`` in the background."""
+    now = time.monotonic()
+    with _lock:
+        for key in [key for key, entry in _pending.items() if now - entry[0] > PREFETCH_TTL]:
+            del _pending[key]
+        entry = _pending.get(_key(query))
+        if entry is not None:
+            return entry[1]
+        future = _executor.submit(_prefetch, query, k)
+        _pending[_key(query)] = [now, future, None]
+    metrics.increment("prefetch.started")
+    return future
+
+
+def discard_prefetch(query: str):
+    with _lock:
+        entry = _pending.pop(_key(query), None)
+    if entry is not None:
+        entry[1].cancel()
+        metrics.increment("prefetch.discarded")
+
+
+def retain_prefetch(query: str, route: str):
+    """
+    Keep the prefetch only for the domains ``route`` sends the query to
+    (``"IT+FINANCE"`` keeps both); discard it if there are none.
+    """
+    routes = set(str(route).split("+")) & {"IT", "FINANCE"}
+    if not routes:
+        discard_prefetch(query)
+        return
+    with _lock:
+        entry = _pending.get(_key(query))
+        if entry is not None:
+            entry[2] = routes
+
+
+def take_prefetched(query: str, route: str, timeout: float = None) -> Optional[List]:
+    """
+    Claim the prefetched documents for ``route``. The entry is dropped once
+    every retained domain has claimed it (or on the first claim if none were
+    retained). Returns None when nothing was prefetched or it failed.
+    """
+    with _lock:
+        entry = _pending.get(_key(query))
+        if entry is None:
+            return None
+        if entry[2] is not None:
+            entry[2].discard(route)
+        if not entry[2]:
+            del _pending[_key(query)]
+
+    wait = PREFETCH_WAIT_SECONDS if timeout is None else timeout
+    left = deadline.remaining()
+    if left is not None:
+        wait = min(wait, left)
+    try:
+        results = entry[1].result(timeout=wait)
+    except Exception:
+        metrics.increment("prefetch.failed")
+        return None
+
+    metrics.increment("prefetch.used")
+    return results.get(route)
+
+
+@contextmanager
+def warm_documents(docs: Optional[List]):
+    """Make ``docs`` available to the first ``consume_warm_documents`` call in this context."""
+    token = _warm.set([docs] if docs is not None else None)
+    try:
+        yield
+    finally:
+        _warm.reset(token)
+
+
+def consume_warm_documents() -> Optional[List]:
+    # The holder list is shared by copied contexts (tool threads), so the
+    # documents are handed out once per specialist run
+    holder = _warm.get()
+    if not holder:
+        return None
+    return holder.pop()
+
+
+def with_prefetch(supervisor):
+    """Wrap a sync supervisor node so retrieval starts before classification."""
+    def node(state):
+        query = state["query"] if isinstance(state, dict) else state
+        start_prefetch(query)
+        result = supervisor(state)
+        retain_prefetch(query, result.get("route"))
+        return result
+    return node
+
+
+def with_async_prefetch(supervisor):
+    """Async counterpart of :func:`with_prefetch`."""
+    async def node(state):
+        query = state["query"] if isinstance(state, dict) else state
+        start_prefetch(query)
+        result = await supervisor(state)
+        retain_prefetch(query, result.get("route"))
+        return result
+    return node
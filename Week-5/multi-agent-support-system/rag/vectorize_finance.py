@@ -1,14 +1,20 @@
 import os
+import sys
 from dotenv import load_dotenv
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
 from langchain_aws import BedrockEmbeddings
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rag.mmap_index import MmapVectorStore
+from rag.local_embeddings import embedding_backend, get_local_embeddings, index_dir
+
 load_dotenv()
 
 PDF_PATH = "data/Finance_policy.pdf"
 CHROMA_DIR = "vectorstore/finance_chroma"
+MMAP_DIR = "vectorstore/finance_mmap"
 COLLECTION = "Finance_policy"
 
 
@@ -17,7 +23,8 @@ def vectorize():
 
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=1000,
-        chunk_overlap=150
+        chunk_overlap=150,
+        add_start_index=True
     )
 
     chunks = splitter.split_documents(docs)
@@ -29,19 +36,34 @@ def vectorize():
     if not valid_chunks:
         raise ValueError("No valid Finance text found for embedding")
 
-    embeddings = BedrockEmbeddings(
-        model_id="amazon.titan-embed-text-v1",
-        region_name=os.environ["AWS_REGION"],
-        aws_access_key_id=os.environ["AWS_ACCESS_KEY_ID"],
-        aws_secret_access_key=os.environ["AWS_SECRET_ACCESS_KEY"],
-    )
+    if embedding_backend() == "local":
+        embeddings = get_local_embeddings()
+    else:
+        embeddings = BedrockEmbeddings(
+            model_id="amazon.titan-embed-text-v1",
+            region_name=os.environ["AWS_REGION"],
+            aws_access_key_id=os.environ["AWS_ACCESS_KEY_ID"],
+            aws_secret_access_key=os.environ["AWS_SECRET_ACCESS_KEY"],
+        )
 
-    db = Chroma.from_documents(
-        documents=valid_chunks,
-        embedding=embeddings,
-        persist_directory=CHROMA_DIR,
-        collection_name=COLLECTION
-    )
+    if os.environ.get("VECTOR_BACKEND", "chroma").lower() == "mmap":
+        db = MmapVectorStore.from_documents(
+            documents=valid_chunks,
+            embedding=embeddings,
+            persist_directory=index_dir(MMAP_DIR),
+            collection_name=COLLECTION,
+            dtype=os.environ.get("MMAP_DTYPE", "float16"),
+            nlist=int(os.environ.get("MMAP_NLIST", "0"))
+        )
+    else:
+        # Cosine space so relevance scores are similarities in [0, 1]
+        db = Chroma.from_documents(
+            documents=valid_chunks,
+            embedding=embeddings,
+            persist_directory=index_dir(CHROMA_DIR),
+            collection_name=COLLECTION,
+            collection_metadata={"hnsw:space": "cosine"}
+        )
 
     print(f"Finance docs indexed: {len(valid_chunks)} chunks")
 
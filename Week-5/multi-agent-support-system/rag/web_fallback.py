@@ -0,0 +1,86 @@
+"""
+Builds the RAG prompt inputs, calling web search only when needed.
+
+Internal retrieval runs first; Tavily is only called when the best chunk's
+relevance is below ``WEB_SEARCH_THRESHOLD``. With speculative mode the web
+search is started in the background together with retrieval, so a low
+confidence result does not pay for the round trip twice, and its result is
+discarded (or the call cancelled if it has not started) when internal
+documents are sufficient.
+
+The threshold is a cosine similarity. Chroma indexes built before the
+vectorize scripts switched to ``hnsw:space=cosine`` rank by L2 distance,
+whose relevance scores are on another scale; for them the threshold is not
+applied (with a warning) and only an empty retrieval calls web search.
+"""
+import os
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from rag.context_packing import assemble_context
+from rag.mmap_index import MmapVectorStore
+
+# Relevance (cosine similarity, 0-1) of the best internal chunk at or above
+# which the internal documents are trusted and web search is skipped.
+WEB_SEARCH_THRESHOLD = float(os.environ.get("WEB_SEARCH_THRESHOLD", "0.45"))
+SPECULATIVE_WEB_SEARCH = os.environ.get("SPECULATIVE_WEB_SEARCH", "false").lower() == "true"
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="web-search")
+
+
+def distance_space(db) -> str:
+    """
+    Distance the index ranks by. Memory-mapped indexes are always cosine;
+    Chroma collections report it in their metadata and default to "l2".
+    """
+    if isinstance(db, MmapVectorStore):
+        return "cosine"
+    metadata = getattr(getattr(db, "_collection", None), "metadata", None)
+    if not isinstance(metadata, dict):
+        return "l2"
+    return metadata.get("hnsw:space", "l2")
+
+
+def relevance_threshold(db, threshold: float):
+    """``threshold`` for cosine indexes, None (with a warning) for any other distance."""
+    space = distance_space(db)
+    if space == "cosine":
+        return threshold
+    warnings.warn(
+        f"Vector index uses '{space}' distance, so WEB_SEARCH_THRESHOLD is not applied; "
+        "re-run rag/vectorize_it.py and rag/vectorize_finance.py to rebuild it with cosine distance."
+    )
+    return None
+
+
+def build_chain_inputs(db, question, web_search, k=4, threshold=None, speculative=None):
+    """
+    Return the ``context`` / ``web_context`` / ``question`` mapping for the
+    RAG prompt. ``web_search`` takes ``{"question": ...}`` like the chains'
+    ``_web_search`` helpers.
+    """
+    threshold = relevance_threshold(db, WEB_SEARCH_THRESHOLD if threshold is None else threshold)
+    speculative = SPECULATIVE_WEB_SEARCH if speculative is None else speculative
+
+    pending = _executor.submit(web_search, {"question": question}) if speculative else None
+
+    scored = db.similarity_search_with_relevance_scores(question, k=k)
+    best_score = max((score for _, score in scored), default=0.0)
+
+    if scored and (threshold is None or best_score >= threshold):
+        if pending is not None:
+            # Not started yet: dropped. Already running: result is ignored.
+            pending.cancel()
+            metrics.increment("web_search.speculative_discarded")
+        metrics.increment("web_search.skipped")
+        web_context = ""
+    else:
+        metrics.increment("web_search.used")
+        web_context = pending.result() if pending is not None else web_search({"question": question})
+
+    return {
+        "context": assemble_context([doc for doc, _ in scored], [score for _, score in scored]),
+        "web_context": web_context,
+        "question": question,
+    }
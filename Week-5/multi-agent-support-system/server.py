@@ -0,0 +1,226 @@
+# Asyncio HTTP service mode for the multi-agent support system
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+
+from aiohttp import web
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+import metrics
+from agents.route_classifier import get_classifier
+from agents.routing_agent import get_routing_report
+from config import enable_shared_resources, get_llm, shared_resource
+from deadline import get_deadline_report, new_deadline
+from graph.workflow import build_workflow
+from prompt_cache import get_prompt_cache_report
+
+logger = logging.getLogger(__name__)
+
+# Requests served at once; anything beyond this is rejected with 429
+MAX_CONCURRENCY = int(os.environ.get("SERVER_MAX_CONCURRENCY", "32"))
+# Simulated model latency per specialist answer in --stub mode
+STUB_LATENCY = float(os.environ.get("SERVER_STUB_LATENCY", "0.5"))
+
+SPECIALIST_NODES = ("it_agent", "finance_agent", "irrelevant_handler", "it_branch", "finance_branch")
+
+
+def create_stub_workflow(latency: float = STUB_LATENCY):
+    """
+    The real graph with stubbed model backends, for local load tests: the
+    supervisor uses only the local classifier and the specialists stream a
+    canned answer from a fake chat model after ``latency`` seconds.
+    """
+    async def supervisor(state):
+        route, confidence = get_classifier().classify(state["query"])
+        return {"query": state["query"], "route": route, "confidence": confidence, "response": ""}
+
+    def specialist(route):
+        async def node(state):
+            await asyncio.sleep(latency)
+            model = GenericFakeChatModel(
+                messages=iter([AIMessage(content=f"Stub {route} answer for: {state['query']}")])
+            )
+            answer = await model.ainvoke(state["query"])
+            return {"query": state["query"], "route": route, "response": answer.content}
+        return node
+
+    return build_workflow(supervisor, specialist("IT"), specialist("FINANCE"))
+
+
+def warm_resources():
+    """Build the LLM client and both retrievers once, before serving traffic."""
+    from rag.it_rag import load_it_rag_chain
+    from rag.finance_rag import load_finance_rag_chain
+
+    enable_shared_resources()
+    for name, factory in (("llm", get_llm),
+                          ("it_rag", lambda: shared_resource("it_rag", load_it_rag_chain)),
+                          ("finance_rag", lambda: shared_resource("finance_rag", load_finance_rag_chain))):
+        try:
+            factory()
+        except Exception as e:
+            logger.warning("Could not warm %s: %s", name, e)
+
+
+def _chunk_text(chunk) -> str:
+    content = getattr(chunk, "content", "")
+    if isinstance(content, str):
+        return content
+    # Converse models stream lists of content blocks
+    return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+
+
+def _is_answer_token(namespace, meta) -> bool:
+    """
+    True for model tokens of a specialist: streamed by the specialist node
+    itself, or by the ``model`` node of the agent it runs (not, say, an LLM
+    called from one of that agent's tools).
+    """
+    if not namespace:
+        return meta.get("langgraph_node") in SPECIALIST_NODES
+    return namespace[0].split(":")[0] in SPECIALIST_NODES and meta.get("langgraph_node") == "model"
+
+
+async def _stream_events(workflow, query: str):
+    """Yield NDJSON-ready events: route, answer tokens, then the final response."""
+    result = {}
+    state = {"query": query, "deadline": new_deadline()}
+    # subgraphs=True: the specialists run a nested agent graph, whose tokens
+    # are only passed up to this stream with their namespace
+    async for namespace, mode, payload in workflow.astream(
+        state, stream_mode=["updates", "messages"], subgraphs=True
+    ):
+        if mode == "messages":
+            chunk, meta = payload
+            text = _chunk_text(chunk)
+            if text and _is_answer_token(namespace, meta):
+                yield {"event": "token", "content": text}
+            continue
+        if namespace:
+            # Nested agent state; the route and answer come from the top-level nodes
+            continue
+
+        for node, update in payload.items():
+            if not isinstance(update, dict):
+                continue
+            result.update(update)
+            if node == "supervisor":
+                yield {"event": "route", "route": update.get("route"), "confidence": update.get("confidence")}
+
+    yield {"event": "done", "route": result.get("route"), "response": result.get("response", "No response generated.")}
+
+
+class SupportServer:
+    def __init__(self, workflow, max_concurrency: int = MAX_CONCURRENCY):
+        self.workflow = workflow
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+
+    async def handle_query(self, request: web.Request) -> web.StreamResponse:
+        try:
+            body = await request.json()
+            query = str(body["query"]).strip()
+        except (ValueError, KeyError, TypeError):
+            return web.json_response({"error": "Expected a JSON body with a 'query' field"}, status=400)
+        if not query:
+            return web.json_response({"error": "Query must not be empty"}, status=400)
+
+        # Backpressure: reject instead of queueing once every slot is taken
+        if self.in_flight >= self.max_concurrency:
+            metrics.increment("server.rejected")
+            return web.json_response({"error": "Server busy, retry later"}, status=429, headers={"Retry-After": "1"})
+
+        self.in_flight += 1
+        metrics.increment("server.requests")
+        start = time.perf_counter()
+        try:
+            if request.query.get("stream", "true").lower() == "false":
+                final = {}
+                async for event in _stream_events(self.workflow, query):
+                    final = event
+                return web.json_response({"route": final.get("route"), "response": final.get("response")})
+
+            response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+            await response.prepare(request)
+            try:
+                async for event in _stream_events(self.workflow, query):
+                    await response.write((json.dumps(event) + "\n").encode("utf-8"))
+            except Exception as e:
+                metrics.increment("server.errors")
+                await response.write((json.dumps({"event": "error", "error": str(e)}) + "\n").encode("utf-8"))
+            await response.write_eof()
+            return response
+        except Exception as e:
+            metrics.increment("server.errors")
+            return web.json_response({"error": f"Error processing query: {str(e)}"}, status=500)
+        finally:
+            self.in_flight -= 1
+            metrics.observe("server.request", time.perf_counter() - start)
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "routing": get_routing_report(),
+            "prompt_cache": get_prompt_cache_report(),
+            "deadlines": get_deadline_report(),
+            **metrics.snapshot(),
+        })
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok"})
+
+
+SUPPORT_SERVER = web.AppKey("support_server", SupportServer)
+
+
+def create_app(stub: bool = False, max_concurrency: int = MAX_CONCURRENCY,
+               stub_latency: float = STUB_LATENCY, workflow=None) -> web.Application:
+    """
+    Build the aiohttp application. ``workflow`` defaults to the compiled
+    async graph, or the stub graph when ``stub`` is set.
+    """
+    if workflow is None and stub:
+        workflow = create_stub_workflow(stub_latency)
+    elif workflow is None:
+        from graph.workflow import async_app
+        workflow = async_app
+
+    server = SupportServer(workflow, max_concurrency)
+    app = web.Application()
+    app[SUPPORT_SERVER] = server
+    app.router.add_post("/query", server.handle_query)
+    app.router.add_get("/metrics", server.handle_metrics)
+    app.router.add_get("/health", server.handle_health)
+
+    if not stub:
+        async def warm(app):
+            await asyncio.get_running_loop().run_in_executor(None, warm_resources)
+        app.on_startup.append(warm)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the multi-agent support system over HTTP")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-concurrency", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--stub", action="store_true", help="Use stubbed model backends for load testing")
+    parser.add_argument("--stub-latency", type=float, default=STUB_LATENCY)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    web.run_app(
+        create_app(stub=args.stub, max_concurrency=args.max_concurrency, stub_latency=args.stub_latency),
+        host=args.host,
+        port=args.port
+    )
+
+
+if __name__ == "__main__":
+    main()
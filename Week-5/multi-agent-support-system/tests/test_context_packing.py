@@ -0,0 +1,102 @@
+import pytest
+from unittest.mock import Mock
+import sys
+import os
+
+from langchain_core.documents import Document
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from rag.context_packing import assemble_context, merge_passages, pack_passages, approx_tokens
+
+
+PAGE_TEXT = (
+    "Employees must submit reimbursement claims within 30 days of the expense. "
+    "Claims above 500 USD require approval from the department head. "
+    "Receipts must be itemised and attached to the claim in the finance portal. "
+    "Late claims are reviewed case by case and may be rejected."
+)
+
+
+def _doc(text, source="Finance_policy.pdf", page=1, **extra):
+    return Document(page_content=text, metadata={"source": source, "page": page, **extra})
+
+
+class TestMergePassages:
+    """Test cases for overlap merging and near-duplicate removal"""
+
+    def test_overlapping_chunks_from_same_page_are_merged(self):
+        """Test adjacent chunks sharing an overlap span are sent once"""
+        first = _doc(PAGE_TEXT[:160], start_index=0)
+        second = _doc(PAGE_TEXT[100:], start_index=100)
+
+        passages = merge_passages([second, first])
+
+        assert len(passages) == 1
+        assert passages[0].text == PAGE_TEXT
+        assert passages[0].rank == 0
+
+    def test_chunks_from_different_pages_are_not_merged(self):
+        """Test overlap across pages does not merge passages"""
+        first = _doc(PAGE_TEXT[:160], page=1)
+        second = _doc(PAGE_TEXT[100:], page=2)
+
+        passages = merge_passages([first, second])
+
+        assert [p.text for p in passages] == [PAGE_TEXT[:160], PAGE_TEXT[100:]]
+
+    def test_near_duplicates_keep_highest_ranked(self):
+        """Test a near-identical chunk from another source is dropped"""
+        original = _doc(PAGE_TEXT, source="a.pdf")
+        duplicate = _doc(PAGE_TEXT.replace("30 days", "30  days") + " ", source="b.pdf")
+
+        passages = merge_passages([original, duplicate], scores=[0.9, 0.8])
+
+        assert len(passages) == 1
+        assert passages[0].metadata["source"] == "a.pdf"
+        assert passages[0].score == 0.9
+
+    def test_documents_without_metadata_are_kept_separate(self):
+        """Test mock-like documents without source metadata are never merged"""
+        doc1 = Mock()
+        doc1.page_content = "First document content"
+        doc2 = Mock()
+        doc2.page_content = "First document content, second half"
+
+        passages = merge_passages([doc1, doc2])
+
+        assert len(passages) == 2
+
+
+class TestPackPassages:
+    """Test cases for token-budgeted packing"""
+
+    def test_budget_keeps_most_relevant_first(self):
+        """Test passages are packed in relevance order within the budget"""
+        docs = [_doc("A" * 400, page=1), _doc("B " * 200, page=2), _doc("C " * 200, page=3)]
+
+        packed = pack_passages(docs, token_budget=approx_tokens("A" * 400) + 50)
+
+        assert packed[0].text == "A" * 400
+        assert len(packed) == 2
+        assert packed[1].text.startswith("B")
+        assert approx_tokens(packed[1].text) <= 50
+
+    def test_assemble_context_empty(self):
+        """Test empty input yields empty context"""
+        assert assemble_context([]) == ""
+        assert assemble_context(None) == ""
+
+    def test_assemble_context_reduces_prompt_size(self):
+        """Test overlap removal shrinks the prompt without losing text"""
+        docs = [_doc(PAGE_TEXT[:160]), _doc(PAGE_TEXT[100:])]
+
+        context = assemble_context(docs)
+
+        assert context == PAGE_TEXT
+        assert len(context) < sum(len(d.page_content) for d in docs)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
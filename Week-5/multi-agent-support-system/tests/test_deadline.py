@@ -0,0 +1,257 @@
+import pytest
+from unittest.mock import Mock, patch
+import sys
+import os
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+import deadline
+import metrics
+from deadline import DeadlineExceeded, deadline_scope, get_deadline_report, new_deadline, partial_answer
+from agents import pipeline
+from agents.it_agent import it_agent, ait_agent
+from agents.routing_agent import supervisor_agent, asupervisor_agent, route_cache
+from tools.tavily_tool import tavily_search, DEADLINE_MESSAGE
+
+
+def _slow(seconds, value="done"):
+    def fn(*args, **kwargs):
+        time.sleep(seconds)
+        return value
+    return fn
+
+
+class TestDeadlineCalls:
+    """Test cases for deadline-bounded sync and async calls"""
+
+    def setup_method(self):
+        metrics.reset()
+
+    def test_call_without_deadline_runs_inline(self):
+        """Test calls outside a deadline scope are not bounded"""
+        assert deadline.remaining() is None
+        assert deadline.call("stage", lambda x: x * 2, 21) == 42
+
+    def test_call_within_budget(self):
+        """Test calls that finish in time return their result"""
+        with deadline_scope(new_deadline(1.0)):
+            assert deadline.call("stage", _slow(0.01)) == "done"
+        assert get_deadline_report()["miss_rate"] == 0.0
+
+    def test_call_past_deadline_raises_and_records(self):
+        """Test a slow call is abandoned at the deadline and counted as a miss"""
+        start = time.perf_counter()
+        with deadline_scope(new_deadline(0.05)):
+            with pytest.raises(DeadlineExceeded) as exc:
+                deadline.call("supervisor", _slow(1.0))
+
+        assert time.perf_counter() - start < 0.5
+        assert exc.value.stage == "supervisor"
+        report = get_deadline_report()
+        assert report["requests"] == 1
+        assert report["miss_rate"] == 1.0
+        assert report["missed_by_stage"] == {"supervisor": 1}
+
+    def test_request_counted_once_across_stages(self):
+        """Test several stages missing the same deadline count as one missed request"""
+        with deadline_scope(new_deadline(0.0001)):
+            time.sleep(0.01)
+            for stage in ("supervisor", "retrieval"):
+                with pytest.raises(DeadlineExceeded):
+                    deadline.check(stage)
+
+        report = get_deadline_report()
+        assert report["miss_rate"] == 1.0
+        assert report["missed_by_stage"] == {"supervisor": 1, "retrieval": 1}
+
+    def test_nested_calls_do_not_starve_the_pool(self):
+        """Test retrieval nested in agent runs finishes with more requests than pool workers"""
+        def request(_):
+            with deadline_scope(new_deadline(2.0)):
+                # The agent run goes to a worker; retrieval inside it runs inline
+                return deadline.call("agent", lambda: deadline.call("retrieval", _slow(0.05)))
+
+        with ThreadPoolExecutor(max_workers=32) as clients:
+            results = list(clients.map(request, range(32)))
+
+        assert results == ["done"] * 32
+        assert get_deadline_report()["miss_rate"] == 0.0
+
+    def test_nested_call_past_deadline_raises(self):
+        """Test an inline nested call that finishes late still reports the miss"""
+        def agent_run():
+            return deadline.call("retrieval", _slow(0.1))
+
+        with deadline_scope(new_deadline(0.05)):
+            with pytest.raises(DeadlineExceeded):
+                deadline.call("agent", agent_run)
+
+        assert get_deadline_report()["miss_rate"] == 1.0
+
+    def test_acall_cancels_in_flight_call(self):
+        """Test an async call is cancelled when the budget runs out"""
+        cancelled = []
+
+        async def slow():
+            try:
+                await asyncio.sleep(1.0)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def run():
+            with deadline_scope(new_deadline(0.05)):
+                await deadline.acall("tavily", slow())
+
+        with pytest.raises(DeadlineExceeded):
+            asyncio.run(run())
+        assert cancelled == [True]
+
+    def test_scoped_reads_deadline_from_state(self):
+        """Test scoped nodes see the deadline carried in their input state"""
+        seen = []
+        node = deadline.scoped(lambda state: seen.append(deadline.current_deadline()))
+
+        node({"query": "q", "deadline": 123.0})
+        node({"query": "q"})
+
+        assert seen == [123.0, None]
+
+
+class TestPartialAnswers:
+    """Test cases for degrading interrupted agent runs"""
+
+    def test_prefers_complete_ai_answer(self):
+        """Test the last AI answer without tool calls is used"""
+        messages = [HumanMessage(content="q"), AIMessage(content="Final answer")]
+        assert partial_answer(messages) == "Final answer"
+
+    def test_falls_back_to_tool_results(self):
+        """Test tool results gathered so far are returned with a notice"""
+        messages = [
+            HumanMessage(content="q"),
+            AIMessage(content="", tool_calls=[{"name": "internal_it_search", "args": {"query": "q"}, "id": "1"}]),
+            ToolMessage(content="VPN requires MFA", tool_call_id="1"),
+        ]
+        answer = partial_answer(messages)
+        assert answer.startswith(deadline.PARTIAL_PREFIX)
+        assert "VPN requires MFA" in answer
+
+    def test_nothing_gathered(self):
+        """Test the timeout notice is returned when nothing was gathered"""
+        assert partial_answer([HumanMessage(content="q")]) == deadline.TIMEOUT_MESSAGE
+
+
+class TestDeadlinePropagation:
+    """Test cases for agents and tools honoring the request deadline"""
+
+    def setup_method(self):
+        metrics.reset()
+        route_cache.clear()
+
+    @patch('agents.routing_agent.ROUTER_FAST_PATH', 'off')
+    @patch('agents.routing_agent.get_llm')
+    def test_supervisor_falls_back_to_local_classifier(self, mock_get_llm):
+        """Test the supervisor routes locally when the LLM misses the deadline"""
+        mock_llm = Mock()
+        mock_llm.invoke.side_effect = _slow(1.0, Mock(content="IT"))
+        mock_get_llm.return_value = mock_llm
+
+        result = supervisor_agent({"query": "When is payroll processed?", "deadline": new_deadline(0.05)})
+
+        assert result["route"] == "FINANCE"
+        assert result["confidence"] == 0.0
+        assert route_cache.get("When is payroll processed?") is None
+        assert get_deadline_report()["missed_by_stage"] == {"supervisor": 1}
+
+    @patch('agents.routing_agent.ROUTER_FAST_PATH', 'off')
+    @patch('agents.routing_agent.get_llm')
+    def test_async_supervisor_falls_back_to_local_classifier(self, mock_get_llm):
+        """Test the async supervisor cancels the LLM call at the deadline"""
+        async def slow_reply(prompt):
+            await asyncio.sleep(1.0)
+            return Mock(content="IT")
+
+        mock_llm = Mock()
+        mock_llm.ainvoke = slow_reply
+        mock_get_llm.return_value = mock_llm
+
+        result = asyncio.run(asupervisor_agent({"query": "When is payroll processed?", "deadline": new_deadline(0.05)}))
+
+        assert result["route"] == "FINANCE"
+        assert result["confidence"] == 0.0
+
+    @patch('agents.it_agent.create_agent')
+    @patch('agents.it_agent.get_llm')
+    def test_it_agent_returns_partial_answer(self, mock_get_llm, mock_create_agent):
+        """Test the IT agent answers with its tool results when time runs out"""
+        def stream(inputs, stream_mode):
+            yield {"messages": [HumanMessage(content="q"), ToolMessage(content="VPN requires MFA", tool_call_id="1")]}
+            time.sleep(1.0)
+            yield {"messages": [AIMessage(content="too late")]}
+
+        mock_create_agent.return_value = Mock(stream=stream)
+
+        result = it_agent({"query": "How do I set up VPN?", "deadline": new_deadline(0.1)})
+
+        assert result["route"] == "IT"
+        assert result["response"].startswith(deadline.PARTIAL_PREFIX)
+        assert "VPN requires MFA" in result["response"]
+        assert get_deadline_report()["missed_by_stage"] == {"it_agent": 1}
+
+    @patch('agents.it_agent.create_agent')
+    @patch('agents.it_agent.get_llm')
+    def test_async_it_agent_returns_partial_answer(self, mock_get_llm, mock_create_agent):
+        """Test the async IT agent run is cancelled and degrades to its tool results"""
+        async def astream(inputs, stream_mode):
+            yield {"messages": [HumanMessage(content="q"), ToolMessage(content="VPN requires MFA", tool_call_id="1")]}
+            await asyncio.sleep(1.0)
+            yield {"messages": [AIMessage(content="too late")]}
+
+        mock_create_agent.return_value = Mock(astream=astream)
+
+        result = asyncio.run(ait_agent({"query": "How do I set up VPN?", "deadline": new_deadline(0.1)}))
+
+        assert "VPN requires MFA" in result["response"]
+        assert "too late" not in result["response"]
+
+    def test_pipeline_answers_with_context_on_deadline(self):
+        """Test the pipeline returns the retrieved context when the LLM misses the deadline"""
+        llm = Mock()
+        llm.invoke.side_effect = _slow(1.0, Mock(content="late"))
+
+        with deadline_scope(new_deadline(0.05)):
+            answer = pipeline.run_pipeline(
+                llm, "VPN?", "IT Support Agent", "Not IT.",
+                search=Mock(return_value="VPN requires MFA"), web_search=Mock()
+            )
+
+        assert answer.startswith(deadline.PARTIAL_PREFIX)
+        assert "VPN requires MFA" in answer
+
+    @patch.dict(os.environ, {"TAVILY_API_KEY": "test_api_key"})
+    @patch('tools.tavily_tool.TavilyClient')
+    def test_tavily_skipped_after_deadline(self, mock_client_class):
+        """Test Tavily is not called once the deadline has passed"""
+        with deadline_scope(new_deadline(0.0001)):
+            time.sleep(0.01)
+            assert tavily_search("query") == DEADLINE_MESSAGE
+        mock_client_class.assert_not_called()
+
+    @patch.dict(os.environ, {"TAVILY_API_KEY": "test_api_key"})
+    @patch('tools.tavily_tool.TavilyClient')
+    def test_tavily_timeout_capped_by_deadline(self, mock_client_class):
+        """Test the Tavily timeout is lowered to the time left"""
+        mock_client_class.return_value.search.return_value = {"results": []}
+
+        with deadline_scope(new_deadline(5.0)):
+            tavily_search("query")
+
+        timeout = mock_client_class.return_value.search.call_args[1]["timeout"]
+        assert 0 < timeout <= 5.0
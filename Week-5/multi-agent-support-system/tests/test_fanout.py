@@ -0,0 +1,138 @@
+import pytest
+from unittest.mock import patch
+import sys
+import os
+import asyncio
+import time
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import metrics
+from graph.fanout import merge_branches
+from graph.workflow import build_workflow, route_to_agent
+
+
+def _supervisor(state):
+    return {"query": state["query"], "route": "IT+FINANCE", "confidence": 0.9, "response": ""}
+
+
+def _specialist(route, delay=0.0, error=None):
+    def agent(state):
+        time.sleep(delay)
+        if error:
+            raise RuntimeError(error)
+        return {"query": state["query"], "route": route, "response": f"{route} answer"}
+    return agent
+
+
+def _async_specialist(route, delay=0.0):
+    async def agent(state):
+        await asyncio.sleep(delay)
+        return {"query": state["query"], "route": route, "response": f"{route} answer"}
+    return agent
+
+
+class TestRouteToAgentFanOut:
+    """Test cases for multi-label routing"""
+
+    def test_multi_route_fans_out(self):
+        """Test IT+FINANCE routes to both branches"""
+        assert route_to_agent({"route": "IT+FINANCE"}) == ["it_branch", "finance_branch"]
+
+
+class TestMergeBranches:
+    """Test cases for the merge node"""
+
+    def test_answers_are_merged_it_first(self):
+        """Test branch answers are combined in a stable order"""
+        result = merge_branches({"branch_responses": [
+            {"route": "FINANCE", "response": "Claim it within 30 days.", "error": None},
+            {"route": "IT", "response": "Order it from the IT portal.", "error": None},
+        ]})
+
+        assert result["route"] == "IT+FINANCE"
+        assert result["response"] == "IT:\nOrder it from the IT portal.\n\nFinance:\nClaim it within 30 days."
+
+    def test_timed_out_and_failed_branches_are_explained(self):
+        """Test missing answers are replaced with a short explanation"""
+        result = merge_branches({"branch_responses": [
+            {"route": "IT", "response": None, "error": "timeout"},
+            {"route": "FINANCE", "response": None, "error": "Throttled"},
+        ]})
+
+        assert "The IT specialist did not respond in time" in result["response"]
+        assert "The Finance specialist could not answer: Throttled" in result["response"]
+
+
+class TestFanOutWorkflow:
+    """Test cases for parallel specialist branches"""
+
+    def setup_method(self):
+        metrics.reset()
+
+    def test_branches_run_concurrently(self):
+        """Test both specialists run in parallel and are merged"""
+        workflow = build_workflow(_supervisor, _specialist("IT", 0.3), _specialist("FINANCE", 0.3))
+
+        start = time.perf_counter()
+        result = workflow.invoke({"query": "Reimbursement for a new laptop"})
+        elapsed = time.perf_counter() - start
+
+        assert result["route"] == "IT+FINANCE"
+        assert result["response"] == "IT:\nIT answer\n\nFinance:\nFINANCE answer"
+        assert elapsed < 0.55
+
+    def test_slow_branch_times_out(self):
+        """Test one slow specialist cannot block the response"""
+        workflow = build_workflow(_supervisor, _specialist("IT"), _specialist("FINANCE", 1.0))
+
+        with patch('graph.fanout.BRANCH_TIMEOUT_SECONDS', 0.2):
+            start = time.perf_counter()
+            result = workflow.invoke({"query": "Reimbursement for a new laptop"})
+            elapsed = time.perf_counter() - start
+
+        assert result["response"].startswith("IT:\nIT answer")
+        assert "Finance specialist did not respond in time" in result["response"]
+        assert elapsed < 0.8
+        assert metrics.get_count("fanout.timeout") == 1
+
+    def test_failing_branch_keeps_other_answer(self):
+        """Test an exception in one branch is reported next to the other answer"""
+        workflow = build_workflow(_supervisor, _specialist("IT", error="Bedrock down"), _specialist("FINANCE"))
+
+        result = workflow.invoke({"query": "Reimbursement for a new laptop"})
+
+        assert "IT specialist could not answer: Bedrock down" in result["response"]
+        assert "Finance:\nFINANCE answer" in result["response"]
+
+    def test_single_route_does_not_fan_out(self):
+        """Test single-label routes still use the plain specialist node"""
+        def supervisor(state):
+            return {"query": state["query"], "route": "FINANCE", "response": ""}
+
+        workflow = build_workflow(supervisor, _specialist("IT"), _specialist("FINANCE"))
+        result = workflow.invoke({"query": "Payroll date"})
+
+        assert result["response"] == "FINANCE answer"
+        assert metrics.get_count("fanout.merged") == 0
+
+    def test_async_branches_time_out_independently(self):
+        """Test async branches are cancelled at the timeout"""
+        async def supervisor(state):
+            return _supervisor(state)
+
+        workflow = build_workflow(supervisor, _async_specialist("IT", 0.1), _async_specialist("FINANCE", 1.0))
+
+        with patch('graph.fanout.BRANCH_TIMEOUT_SECONDS', 0.3):
+            start = time.perf_counter()
+            result = asyncio.run(workflow.ainvoke({"query": "Reimbursement for a new laptop"}))
+            elapsed = time.perf_counter() - start
+
+        assert result["response"].startswith("IT:\nIT answer")
+        assert "Finance specialist did not respond in time" in result["response"]
+        assert elapsed < 0.8
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
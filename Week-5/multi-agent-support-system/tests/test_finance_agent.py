@@ -1,5 +1,6 @@
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
+import asyncio
 import sys
 import os
 
@@ -7,6 +8,7 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from agents.finance_agent import _fetch_docs_with_fallback, internal_finance_search, web_search, finance_agent
+from agents.finance_agent import ainternal_finance_search, afinance_agent
 
 
 class TestFetchDocsWithFallback:
@@ -252,5 +254,47 @@ class TestFinanceAgentIntegration:
             assert query in result["response"] or "Finance support" in result["response"]
 
 
+class TestAsyncFinanceAgent:
+    """Test cases for the async finance agent and tools"""
+
+    @patch('agents.finance_agent.create_agent')
+    @patch('agents.finance_agent.get_llm')
+    def test_afinance_agent_awaits_agent(self, mock_get_llm, mock_create_agent):
+        """Test the async agent awaits ainvoke and returns the last AI message"""
+        mock_agent = Mock()
+        mock_agent.ainvoke = AsyncMock(return_value={"messages": [Mock(type="ai", content="Async response")]})
+        mock_create_agent.return_value = mock_agent
+
+        result = asyncio.run(afinance_agent({"query": "Test question"}))
+
+        assert result == {"query": "Test question", "route": "FINANCE", "response": "Async response"}
+        mock_agent.ainvoke.assert_awaited_once()
+        messages = mock_agent.ainvoke.await_args[0][0]["messages"]
+        assert messages[0].content == "Please help me with: Test question"
+        tool_names = [t.name for t in mock_create_agent.call_args[1]["tools"]]
+        assert tool_names == ["internal_finance_search", "web_search"]
+
+    @patch('agents.finance_agent.load_finance_rag_chain')
+    def test_ainternal_finance_search_uses_async_retrieval(self, mock_load_rag):
+        """Test the async search tool awaits the retriever"""
+        retriever = Mock()
+        retriever.ainvoke = AsyncMock(return_value=[Mock(page_content="Policy text")])
+        mock_load_rag.return_value = (retriever, Mock(), Mock())
+
+        result = asyncio.run(ainternal_finance_search.ainvoke({"query": "policy"}))
+
+        assert result == "Policy text"
+        retriever.ainvoke.assert_awaited_once_with("policy")
+
+    @patch('agents.finance_agent.atavily_search', new_callable=AsyncMock)
+    def test_async_web_search_awaits_tavily(self, mock_tavily):
+        """Test the async web search tool awaits the async Tavily client"""
+        from agents.finance_agent import aweb_search
+        mock_tavily.return_value = "web results"
+
+        assert asyncio.run(aweb_search.ainvoke({"query": "news"})) == "web results"
+        mock_tavily.assert_awaited_once_with("news")
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,170 @@
+import pytest
+from unittest.mock import patch
+import sys
+import os
+from types import SimpleNamespace
+
+import numpy as np
+from tokenizers import Tokenizer
+from tokenizers.models import WordLevel
+from tokenizers.pre_tokenizers import Whitespace
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import rag.local_embeddings as local_embeddings
+from rag.local_embeddings import OnnxEmbeddings, get_local_embeddings, index_dir
+
+
+VOCAB = ["[PAD]", "[UNK]", "vpn", "password", "laptop", "payroll", "invoice"]
+
+
+class FakeSession:
+    """Stands in for an onnxruntime session: each token's hidden state is its one-hot vocab vector"""
+
+    def __init__(self, inputs=("input_ids", "attention_mask")):
+        self.inputs = inputs
+        self.feeds = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name=name) for name in self.inputs]
+
+    def run(self, output_names, feeds):
+        self.feeds.append(feeds)
+        return [np.eye(len(VOCAB), dtype=np.float32)[feeds["input_ids"]]]
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    tokenizer = Tokenizer(WordLevel({w: i for i, w in enumerate(VOCAB)}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = Whitespace()
+    tokenizer.save(str(tmp_path / "tokenizer.json"))
+    (tmp_path / "model.onnx").write_bytes(b"")
+    return str(tmp_path)
+
+
+@pytest.fixture
+def build(model_dir):
+    def factory(session=None, **kwargs):
+        session = session or FakeSession()
+        with patch('onnxruntime.InferenceSession', return_value=session) as mock_session:
+            embeddings = OnnxEmbeddings(model_dir, **kwargs)
+        embeddings.mock_session = mock_session
+        return embeddings
+    return factory
+
+
+def _expected(counts):
+    vector = np.array([counts.get(w, 0) for w in VOCAB], dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class TestOnnxEmbeddings:
+    """Test cases for pooling, batching and session setup"""
+
+    def test_mean_pooling_ignores_padding(self, build):
+        """A short text padded next to a long one embeds the same as on its own"""
+        embeddings = build()
+
+        vectors = embeddings.embed_documents(["vpn vpn laptop", "payroll invoice invoice invoice password laptop"])
+
+        assert np.allclose(vectors[0], _expected({"vpn": 2, "laptop": 1}))
+        assert np.allclose(vectors[1], _expected({"payroll": 1, "invoice": 3, "password": 1, "laptop": 1}))
+        assert np.allclose(embeddings.embed_query("vpn vpn laptop"), vectors[0])
+
+    def test_batches_preserve_input_order(self, build):
+        """Texts are batched by length but returned in input order"""
+        session = FakeSession()
+        embeddings = build(session, batch_size=2)
+        texts = ["payroll invoice password laptop", "vpn", "invoice invoice", "laptop vpn password", "payroll"]
+
+        vectors = embeddings.embed_documents(texts)
+
+        assert len(session.feeds) == 3
+        assert all(len(feeds["input_ids"]) <= 2 for feeds in session.feeds)
+        for text, vector in zip(texts, vectors):
+            assert np.allclose(vector, embeddings.embed_query(text))
+
+    def test_token_type_ids_only_when_model_takes_them(self, build):
+        """BERT-style exports get token_type_ids; other models are not fed unknown inputs"""
+        plain = FakeSession()
+        bert = FakeSession(inputs=("input_ids", "attention_mask", "token_type_ids"))
+
+        build(plain).embed_query("vpn")
+        build(bert).embed_query("vpn")
+
+        assert set(plain.feeds[0]) == {"input_ids", "attention_mask"}
+        assert set(bert.feeds[0]) == {"input_ids", "attention_mask", "token_type_ids"}
+
+    def test_thread_count_is_applied(self, build):
+        """LOCAL_EMBEDDING_THREADS maps to the session's intra-op thread count"""
+        embeddings = build(threads=3)
+
+        options = embeddings.mock_session.call_args.kwargs["sess_options"]
+        assert options.intra_op_num_threads == 3
+        assert options.inter_op_num_threads == 1
+
+    def test_quantized_model_must_exist(self, build, model_dir):
+        """The int8 model is loaded only once it has been written"""
+        with pytest.raises(FileNotFoundError, match="quantize"):
+            build(quantized=True)
+
+        open(os.path.join(model_dir, "model_int8.onnx"), "wb").close()
+        embeddings = build(quantized=True)
+        assert embeddings.model_path.endswith("model_int8.onnx")
+
+
+class TestEmbeddingBackend:
+    """Test cases for choosing between Titan and the local model"""
+
+    def test_index_dir_per_backend(self):
+        """Local vectors have their own index directories"""
+        with patch.dict(os.environ, {"EMBEDDING_BACKEND": "titan"}):
+            assert index_dir("vectorstore/it_chroma") == "vectorstore/it_chroma"
+        with patch.dict(os.environ, {"EMBEDDING_BACKEND": "local"}):
+            assert index_dir("vectorstore/it_chroma") == "vectorstore/it_chroma_local"
+
+    @patch('rag.local_embeddings.OnnxEmbeddings')
+    def test_local_embeddings_loaded_once_per_settings(self, mock_onnx):
+        """The session is built once per process and settings"""
+        local_embeddings._instances.clear()
+        with patch.dict(os.environ, {"LOCAL_EMBEDDING_THREADS": "2"}):
+            first = get_local_embeddings()
+            second = get_local_embeddings()
+        with patch.dict(os.environ, {"LOCAL_EMBEDDING_THREADS": "4"}):
+            get_local_embeddings()
+        local_embeddings._instances.clear()
+
+        assert first is second
+        assert mock_onnx.call_count == 2
+
+    @patch('rag.it_rag.ChatBedrock')
+    @patch('rag.it_rag.Chroma')
+    @patch('rag.it_rag.BedrockEmbeddings')
+    @patch('rag.it_rag.get_local_embeddings')
+    def test_it_chain_uses_local_backend(self, mock_local, mock_bedrock, mock_chroma, mock_llm):
+        """The IT chain embeds locally and reads the local index without calling Bedrock embeddings"""
+        from rag.it_rag import load_it_rag_chain
+
+        with patch.dict(os.environ, {
+            "EMBEDDING_BACKEND": "local",
+            "AWS_REGION": "us-east-1",
+            "AWS_ACCESS_KEY_ID": "key",
+            "AWS_SECRET_ACCESS_KEY": "secret",
+        }):
+            load_it_rag_chain()
+
+        mock_bedrock.assert_not_called()
+        mock_chroma.assert_called_once_with(
+            persist_directory="vectorstore/it_chroma_local",
+            embedding_function=mock_local.return_value,
+            collection_name="IT_policy"
+        )
+
+    @patch('rag.local_embeddings.get_local_embeddings')
+    def test_prefetch_embeddings_follow_backend(self, mock_local):
+        """The speculative prefetch embeds queries with the same backend as the indexes"""
+        from config import get_embeddings
+
+        with patch.dict(os.environ, {"EMBEDDING_BACKEND": "local"}):
+            assert get_embeddings() is mock_local.return_value
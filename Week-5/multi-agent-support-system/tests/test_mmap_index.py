@@ -0,0 +1,184 @@
+import pytest
+from unittest.mock import Mock, patch
+import sys
+import os
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from rag.mmap_index import MmapVectorStore
+
+
+VOCAB = ["vpn", "password", "laptop", "payroll", "reimbursement", "budget", "invoice", "network"]
+
+
+class KeywordEmbeddings(Embeddings):
+    """Deterministic bag-of-words embeddings so search results are predictable"""
+
+    def _embed(self, text):
+        words = text.lower().split()
+        return [float(sum(w.startswith(v) for w in words)) + 0.01 for v in VOCAB]
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+TEXTS = [
+    "Connect to the VPN before accessing the network",
+    "Password resets require a ticket",
+    "Laptop requests go through the IT portal",
+    "Payroll is processed monthly",
+    "Reimbursement claims need receipts",
+    "Budget approvals are quarterly",
+    "Invoice processing takes five days",
+]
+
+
+@pytest.fixture
+def store_factory(tmp_path):
+    def build(**kwargs):
+        return MmapVectorStore.from_texts(
+            TEXTS,
+            KeywordEmbeddings(),
+            metadatas=[{"page": i} for i in range(len(TEXTS))],
+            persist_directory=str(tmp_path),
+            collection_name="policies",
+            **kwargs
+        )
+    return build
+
+
+class TestMmapVectorStoreBuild:
+    """Test cases for writing and reopening the memory-mapped index"""
+
+    def test_reopen_uses_memory_mapped_files(self, store_factory, tmp_path):
+        """Test a reopened store maps the persisted matrix instead of loading it"""
+        store_factory()
+        reopened = MmapVectorStore(
+            persist_directory=str(tmp_path),
+            embedding_function=KeywordEmbeddings(),
+            collection_name="policies"
+        )
+
+        assert reopened.count == len(TEXTS)
+        assert isinstance(reopened._vectors, np.memmap)
+        assert reopened._vectors.dtype == np.float16
+
+    def test_missing_index_returns_no_results(self, tmp_path):
+        """Test opening a collection that was never built behaves like an empty store"""
+        store = MmapVectorStore(
+            persist_directory=str(tmp_path),
+            embedding_function=KeywordEmbeddings(),
+            collection_name="missing"
+        )
+
+        assert store.similarity_search("vpn") == []
+
+    def test_unsupported_dtype_raises(self, store_factory):
+        """Test only float16 and int8 storage are accepted"""
+        with pytest.raises(ValueError):
+            store_factory(dtype="float64")
+
+    def test_add_texts_appends_rows(self, store_factory):
+        """Test appending keeps existing rows and metadata"""
+        store = store_factory()
+        store.add_texts(["Network outage escalation path"], metadatas=[{"page": 99}])
+
+        assert store.count == len(TEXTS) + 1
+        docs = store.similarity_search("payroll", k=1)
+        assert docs[0].metadata == {"page": 3}
+
+
+class TestMmapVectorStoreSearch:
+    """Test cases for exact, int8 and IVF search"""
+
+    @pytest.mark.parametrize("kwargs", [{}, {"dtype": "int8"}, {"nlist": 3}])
+    def test_similarity_search_returns_best_match(self, store_factory, kwargs):
+        """Test the most similar chunk ranks first for every storage layout"""
+        store = store_factory(**kwargs)
+        store.nprobe = 3
+
+        docs = store.similarity_search("How do I submit a reimbursement?", k=2)
+
+        assert docs[0].page_content == "Reimbursement claims need receipts"
+        assert docs[0].metadata == {"page": 4}
+        assert len(docs) == 2
+
+    def test_relevance_scores_are_cosine_similarity(self, store_factory):
+        """Test relevance scores are highest for the matching chunk"""
+        store = store_factory()
+
+        results = store.similarity_search_with_relevance_scores("vpn network", k=3)
+
+        assert results[0][0].page_content.startswith("Connect to the VPN")
+        assert results[0][1] > results[1][1]
+        assert 0.0 <= results[-1][1] <= 1.0
+
+    def test_as_retriever_honours_k(self, store_factory):
+        """Test the store plugs into as_retriever like Chroma"""
+        retriever = store_factory().as_retriever(search_kwargs={"k": 4})
+
+        docs = retriever.invoke("laptop")
+
+        assert len(docs) == 4
+        assert docs[0].page_content.startswith("Laptop requests")
+
+
+class TestMmapVectorStoreFromChroma:
+    """Test cases for exporting an existing Chroma collection"""
+
+    def test_from_chroma_reuses_stored_embeddings(self, tmp_path):
+        """Test export does not call the embedding model for documents"""
+        embeddings = Mock(spec=KeywordEmbeddings)
+        embeddings.embed_query.side_effect = KeywordEmbeddings().embed_query
+        chroma_db = Mock()
+        chroma_db.embeddings = embeddings
+        chroma_db.get.return_value = {
+            "ids": ["a", "b"],
+            "documents": TEXTS[:2],
+            "metadatas": [{"page": 0}, None],
+            "embeddings": KeywordEmbeddings().embed_documents(TEXTS[:2]),
+        }
+
+        store = MmapVectorStore.from_chroma(chroma_db, str(tmp_path), "exported")
+
+        assert store.similarity_search("password", k=1)[0].id == "b"
+        embeddings.embed_documents.assert_not_called()
+
+
+class TestRagBackendSelection:
+    """Test cases for choosing the vector backend in the RAG loaders"""
+
+    @patch('rag.it_rag.ChatBedrock')
+    @patch('rag.it_rag.MmapVectorStore')
+    @patch('rag.it_rag.Chroma')
+    @patch('rag.it_rag.BedrockEmbeddings')
+    def test_it_rag_uses_mmap_backend(self, mock_embeddings, mock_chroma, mock_mmap, mock_llm):
+        """Test VECTOR_BACKEND=mmap opens the memory-mapped index instead of Chroma"""
+        from rag.it_rag import load_it_rag_chain, MMAP_DIR, COLLECTION
+
+        with patch.dict(os.environ, {
+            "AWS_REGION": "us-east-1",
+            "AWS_ACCESS_KEY_ID": "test_key_id",
+            "AWS_SECRET_ACCESS_KEY": "test_secret_key",
+            "VECTOR_BACKEND": "mmap"
+        }):
+            _, db, _ = load_it_rag_chain()
+
+        mock_chroma.assert_not_called()
+        mock_mmap.assert_called_once_with(
+            persist_directory=MMAP_DIR,
+            embedding_function=mock_embeddings.return_value,
+            collection_name=COLLECTION
+        )
+        assert db == mock_mmap.return_value
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
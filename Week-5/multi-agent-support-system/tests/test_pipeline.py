@@ -0,0 +1,117 @@
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+import sys
+import os
+import asyncio
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import metrics
+from agents import pipeline
+from agents.pipeline import run_pipeline, arun_pipeline, get_specialist_report, count_llm_calls, NEED_WEB_SEARCH
+
+
+def _llm(*replies):
+    llm = Mock()
+    llm.invoke.side_effect = [Mock(content=reply) for reply in replies]
+    return llm
+
+
+class TestRunPipeline:
+    """Test cases for the retrieve-then-answer pipeline"""
+
+    def setup_method(self):
+        metrics.reset()
+
+    def test_answers_from_internal_documents_in_one_call(self):
+        """Test retrieval runs first and the LLM is called once"""
+        llm = _llm("Use the VPN client.")
+        search = Mock(return_value="VPN requires MFA")
+        web_search = Mock()
+
+        answer = run_pipeline(llm, "VPN?", "IT Support Agent", "Not IT.", search, web_search)
+
+        assert answer == "Use the VPN client."
+        search.assert_called_once_with("VPN?")
+        web_search.assert_not_called()
+        assert llm.invoke.call_count == 1
+        assert "VPN requires MFA" in llm.invoke.call_args[0][0]
+        assert get_specialist_report()["pipeline"]["llm_calls_per_request"] == 1.0
+
+    def test_sentinel_triggers_web_search(self):
+        """Test web search and a second call happen only on NEED_WEB_SEARCH"""
+        llm = _llm(f" {NEED_WEB_SEARCH}\n", "Answer with web context")
+        web_search = Mock(return_value="web results")
+
+        answer = run_pipeline(llm, "Latest zero-day?", "IT Support Agent", "Not IT.", Mock(return_value=""), web_search)
+
+        assert answer == "Answer with web context"
+        web_search.assert_called_once_with("Latest zero-day?")
+        assert "web results" in llm.invoke.call_args[0][0]
+        report = get_specialist_report()["pipeline"]
+        assert report["llm_calls_per_request"] == 2.0
+        assert report["web_search_rate"] == 1.0
+
+    def test_async_pipeline(self):
+        """Test the async pipeline awaits search, web search and the LLM"""
+        llm = Mock()
+        llm.ainvoke = AsyncMock(side_effect=[Mock(content=NEED_WEB_SEARCH), Mock(content="Final")])
+        search = AsyncMock(return_value="")
+        web_search = AsyncMock(return_value="web results")
+
+        answer = asyncio.run(arun_pipeline(llm, "q", "IT Support Agent", "Not IT.", search, web_search))
+
+        assert answer == "Final"
+        web_search.assert_awaited_once_with("q")
+        assert llm.ainvoke.await_count == 2
+
+
+class TestSpecialistModes:
+    """Test cases for switching the specialists between modes"""
+
+    def setup_method(self):
+        metrics.reset()
+
+    @patch('agents.it_agent.create_agent')
+    @patch('agents.it_agent._fetch_docs_with_fallback')
+    @patch('agents.it_agent.load_it_rag_chain')
+    @patch('agents.it_agent.get_llm')
+    def test_it_agent_pipeline_mode_skips_agent_loop(self, mock_get_llm, mock_load_rag,
+                                                     mock_fetch_docs, mock_create_agent):
+        """Test pipeline mode answers without building a tool-calling agent"""
+        mock_get_llm.return_value = _llm("Reset it from the portal.")
+        mock_load_rag.return_value = (Mock(), Mock(), Mock())
+        mock_fetch_docs.return_value = [Mock(page_content="Passwords reset via portal")]
+
+        with patch.object(pipeline, "SPECIALIST_MODE", "pipeline"):
+            from agents.it_agent import it_agent
+            result = it_agent({"query": "How do I reset my password?"})
+
+        assert result == {"query": "How do I reset my password?", "route": "IT", "response": "Reset it from the portal."}
+        mock_create_agent.assert_not_called()
+        assert "Passwords reset via portal" in mock_get_llm.return_value.invoke.call_args[0][0]
+
+    @patch('agents.finance_agent.create_agent')
+    @patch('agents.finance_agent.get_llm')
+    def test_agent_mode_records_llm_calls(self, mock_get_llm, mock_create_agent):
+        """Test the agent loop's LLM round trips are counted for comparison"""
+        from agents.finance_agent import finance_agent
+        mock_agent = Mock()
+        mock_agent.invoke.return_value = {"messages": [
+            Mock(type="human"), Mock(type="ai", content=""), Mock(type="tool"), Mock(type="ai", content="Answer")
+        ]}
+        mock_create_agent.return_value = mock_agent
+
+        finance_agent({"query": "Payroll date?"})
+
+        assert get_specialist_report()["agent"]["llm_calls_per_request"] == 2.0
+
+    def test_count_llm_calls(self):
+        """Test only AI messages count as LLM calls"""
+        assert count_llm_calls({"messages": [Mock(type="ai"), Mock(type="tool"), Mock(type="ai")]}) == 2
+        assert count_llm_calls({}) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
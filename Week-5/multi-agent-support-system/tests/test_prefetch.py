@@ -0,0 +1,170 @@
+import pytest
+from unittest.mock import Mock, patch
+import sys
+import os
+import time
+
+from langchain_core.documents import Document
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import metrics
+from rag import prefetch
+from rag.prefetch import (
+    start_prefetch, take_prefetched, discard_prefetch, warm_documents,
+    consume_warm_documents, with_prefetch
+)
+
+IT_DOCS = [Document(page_content="VPN requires MFA")]
+FINANCE_DOCS = [Document(page_content="Claims within 30 days")]
+
+
+@pytest.fixture
+def stores():
+    it_db, finance_db = Mock(), Mock()
+    it_db.similarity_search_by_vector.return_value = IT_DOCS
+    finance_db.similarity_search_by_vector.return_value = FINANCE_DOCS
+    embeddings = Mock()
+    embeddings.embed_query.return_value = [0.1, 0.2]
+
+    with patch('rag.prefetch._load_databases', return_value={"IT": it_db, "FINANCE": finance_db}), \
+         patch('rag.prefetch.get_embeddings', return_value=embeddings):
+        metrics.reset()
+        yield it_db, finance_db, embeddings
+
+
+class TestPrefetch:
+    """Test cases for speculative two-domain retrieval"""
+
+    def test_embeds_once_and_searches_both_domains(self, stores):
+        """Test one embedding is reused for both collections"""
+        it_db, finance_db, embeddings = stores
+
+        start_prefetch("VPN help").result(timeout=5)
+
+        embeddings.embed_query.assert_called_once_with("VPN help")
+        it_db.similarity_search_by_vector.assert_called_once_with([0.1, 0.2], k=4)
+        finance_db.similarity_search_by_vector.assert_called_once_with([0.1, 0.2], k=4)
+        discard_prefetch("VPN help")
+
+    def test_take_returns_chosen_domain_once(self, stores):
+        """Test the specialist gets its domain and the entry is consumed"""
+        start_prefetch("Expense claims?")
+
+        assert take_prefetched("expense claims", "FINANCE") == FINANCE_DOCS
+        assert take_prefetched("expense claims", "FINANCE") is None
+        assert metrics.get_count("prefetch.used") == 1
+
+    def test_take_without_prefetch_returns_none(self):
+        """Test non-speculative runs fall through to normal retrieval"""
+        assert take_prefetched("never prefetched", "IT") is None
+
+    def test_failed_prefetch_returns_none(self, stores):
+        """Test a failing embedding call does not break the specialist"""
+        stores[2].embed_query.side_effect = Exception("Throttled")
+        start_prefetch("VPN help")
+
+        assert take_prefetched("VPN help", "IT") is None
+        assert metrics.get_count("prefetch.failed") == 1
+
+    def test_retrieval_overlaps_classification(self, stores):
+        """Test the wrapped supervisor runs concurrently with retrieval"""
+        it_db = stores[0]
+        it_db.similarity_search_by_vector.side_effect = lambda *a, **k: time.sleep(0.3) or IT_DOCS
+
+        def slow_supervisor(state):
+            time.sleep(0.3)
+            return {"query": state["query"], "route": "IT", "response": ""}
+
+        start = time.perf_counter()
+        result = with_prefetch(slow_supervisor)({"query": "VPN help"})
+        docs = take_prefetched("VPN help", result["route"])
+        elapsed = time.perf_counter() - start
+
+        assert docs == IT_DOCS
+        assert elapsed < 0.55
+
+    def test_irrelevant_route_discards_prefetch(self, stores):
+        """Test no specialist claim is left pending for off-topic queries"""
+        supervisor = Mock(return_value={"query": "weather", "route": "IRRELEVANT", "response": ""})
+
+        with_prefetch(supervisor)({"query": "weather"})
+
+        assert take_prefetched("weather", "IT") is None
+        assert metrics.get_count("prefetch.discarded") == 1
+
+
+    def test_multi_route_keeps_both_domains(self, stores):
+        """Test a fanned-out query lets both specialists claim their domain"""
+        supervisor = Mock(return_value={"query": "laptop claim", "route": "IT+FINANCE", "response": ""})
+
+        with_prefetch(supervisor)({"query": "laptop claim"})
+
+        assert take_prefetched("laptop claim", "IT") == IT_DOCS
+        assert take_prefetched("laptop claim", "FINANCE") == FINANCE_DOCS
+        assert take_prefetched("laptop claim", "IT") is None
+
+    def test_concurrent_prefetches_do_not_starve_the_pool(self, stores):
+        """Test a full pool of prefetches still runs its per-domain searches"""
+        for db, docs in ((stores[0], IT_DOCS), (stores[1], FINANCE_DOCS)):
+            db.similarity_search_by_vector.side_effect = lambda *a, docs=docs, **k: time.sleep(0.05) or docs
+        queries = [f"VPN help {i}" for i in range(2 * prefetch._executor._max_workers)]
+
+        futures = [start_prefetch(query) for query in queries]
+
+        for future in futures:
+            assert future.result(timeout=2) == {"IT": IT_DOCS, "FINANCE": FINANCE_DOCS}
+        for query in queries:
+            discard_prefetch(query)
+
+
+class TestWarmDocuments:
+    """Test cases for handing prefetched documents to the search tools"""
+
+    def test_documents_are_consumed_once(self):
+        """Test only the first internal search uses the warm result"""
+        with warm_documents(IT_DOCS):
+            assert consume_warm_documents() == IT_DOCS
+            assert consume_warm_documents() is None
+        assert consume_warm_documents() is None
+
+    @patch('agents.it_agent.load_it_rag_chain')
+    @patch('agents.it_agent._fetch_docs_with_fallback')
+    def test_internal_search_uses_warm_documents(self, mock_fetch_docs, mock_load_rag):
+        """Test the IT search tool skips retrieval when documents are warm"""
+        from agents.it_agent import internal_it_search
+        mock_load_rag.return_value = (Mock(), Mock(), Mock())
+        mock_fetch_docs.return_value = [Document(page_content="Fresh retrieval")]
+
+        with warm_documents(IT_DOCS):
+            first = internal_it_search.invoke({"query": "VPN"})
+            second = internal_it_search.invoke({"query": "VPN client download"})
+
+        assert first == "VPN requires MFA"
+        assert second == "Fresh retrieval"
+        mock_fetch_docs.assert_called_once()
+
+
+class TestSpeculativeWorkflow:
+    """Test cases for enabling speculation in the workflow"""
+
+    @patch('graph.workflow.StateGraph')
+    def test_speculative_workflow_wraps_supervisor(self, mock_state_graph):
+        """Test the supervisor node is wrapped only in speculative mode"""
+        from graph.workflow import create_supervisor_workflow, supervisor_agent
+        graph = mock_state_graph.return_value
+
+        create_supervisor_workflow(speculative=False)
+        plain = graph.add_node.call_args_list[0][0][1]
+        graph.reset_mock()
+        create_supervisor_workflow(speculative=True)
+        wrapped = graph.add_node.call_args_list[0][0][1]
+
+        assert plain is supervisor_agent
+        assert wrapped is not supervisor_agent
+        assert wrapped.__qualname__.startswith("with_prefetch")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
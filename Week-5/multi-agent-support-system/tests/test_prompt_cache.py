@@ -0,0 +1,122 @@
+import pytest
+from unittest.mock import Mock, patch
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+import metrics
+import prompt_cache
+from prompt_cache import (
+    cacheable_prompt, cacheable_system_prompt, get_prompt_cache_report,
+    record_agent_usage, record_usage, supports_prompt_cache
+)
+from agents.routing_agent import SUPERVISOR_PROMPT, _supervisor_prompt
+from agents import it_agent, finance_agent
+
+CACHING_MODEL = "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
+LEGACY_MODEL = "anthropic.claude-3-5-sonnet-20240620-v1:0"
+
+
+def _usage_message(input_tokens, cache_read=0, cache_creation=0):
+    return AIMessage(content="ok", usage_metadata={
+        "input_tokens": input_tokens,
+        "output_tokens": 5,
+        "total_tokens": input_tokens + 5,
+        "input_token_details": {"cache_read": cache_read, "cache_creation": cache_creation},
+    })
+
+
+class TestCacheablePrompts:
+    """Test cases for the static prefix / dynamic suffix prompt split"""
+
+    def test_model_support(self):
+        """Test only models with Bedrock prompt caching get checkpoints"""
+        assert supports_prompt_cache(CACHING_MODEL)
+        assert not supports_prompt_cache(LEGACY_MODEL)
+
+    def test_prompt_cache_off(self):
+        """Test PROMPT_CACHE=off disables checkpoints for every model"""
+        with patch.object(prompt_cache, "PROMPT_CACHE", "off"):
+            assert not supports_prompt_cache(CACHING_MODEL)
+
+    def test_unsupported_model_gets_plain_string(self):
+        """Test the static prefix comes first and the dynamic part last"""
+        prompt = cacheable_prompt("Static rules", "User Query: \"vpn\"", LEGACY_MODEL)
+
+        assert prompt == "Static rules\n\nUser Query: \"vpn\""
+
+    def test_supported_model_gets_cache_checkpoint(self):
+        """Test the static prefix becomes a system message ending in a cache point"""
+        system, human = cacheable_prompt("Static rules", "User Query: \"vpn\"", CACHING_MODEL)
+
+        assert isinstance(system, SystemMessage)
+        assert system.content[0] == {"type": "text", "text": "Static rules"}
+        assert system.content[-1] == {"cachePoint": {"type": "default"}}
+        assert isinstance(human, HumanMessage)
+        assert human.content == "User Query: \"vpn\""
+
+    def test_system_prompt_for_agents(self):
+        """Test agent system prompts are plain strings unless caching is supported"""
+        assert cacheable_system_prompt("Rules", LEGACY_MODEL) == "Rules"
+        assert isinstance(cacheable_system_prompt("Rules", CACHING_MODEL), SystemMessage)
+
+    def test_supervisor_prompt_keeps_query_out_of_prefix(self):
+        """Test the supervisor prefix is identical for every query"""
+        first = _supervisor_prompt("How do I set up VPN?")
+        second = _supervisor_prompt("When is payroll processed?")
+
+        assert first.startswith(SUPERVISOR_PROMPT)
+        assert second.startswith(SUPERVISOR_PROMPT)
+        assert first.endswith('User Query: "How do I set up VPN?"')
+        assert "How do I set up VPN?" not in SUPERVISOR_PROMPT
+
+    @pytest.mark.parametrize("module", [it_agent, finance_agent])
+    def test_agent_system_prompts_are_static(self, module):
+        """Test the specialist system prompts no longer embed the query"""
+        assert "{query}" not in module.SYSTEM_PROMPT
+        assert "has asked" not in module.SYSTEM_PROMPT
+        assert module.REFUSAL in module.SYSTEM_PROMPT
+
+
+class TestCacheUsage:
+    """Test cases for per-call cached token reporting"""
+
+    def setup_method(self):
+        metrics.reset()
+
+    def test_record_usage(self):
+        """Test input, cache read and cache write tokens are recorded per call"""
+        counts = record_usage("supervisor", _usage_message(1500, cache_creation=1200))
+        record_usage("supervisor", _usage_message(1500, cache_read=1200))
+
+        assert counts == {"input_tokens": 1500, "cache_read_tokens": 0, "cache_write_tokens": 1200}
+        report = get_prompt_cache_report()["supervisor"]
+        assert report["calls"] == 2
+        assert report["input_tokens"] == 3000
+        assert report["cache_read_tokens"] == 1200
+        assert report["cache_write_tokens"] == 1200
+        assert report["cache_read_ratio"] == pytest.approx(0.4)
+
+    def test_responses_without_usage_are_ignored(self):
+        """Test mocks and plain strings do not create report entries"""
+        assert record_usage("supervisor", Mock(content="IT")) == {}
+        assert record_usage("supervisor", "IT") == {}
+        assert get_prompt_cache_report() == {}
+
+    def test_record_agent_usage_counts_each_ai_message(self):
+        """Test every LLM round trip of an agent run is recorded"""
+        result = {"messages": [
+            HumanMessage(content="Please help me with: VPN"),
+            _usage_message(1300, cache_read=1100),
+            _usage_message(1400, cache_read=1100),
+        ]}
+
+        record_agent_usage("it_agent", result)
+
+        report = get_prompt_cache_report()["it_agent"]
+        assert report["calls"] == 2
+        assert report["cache_read_tokens"] == 2200
@@ -0,0 +1,82 @@
+import pytest
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from agents.route_classifier import RouteClassifier, get_classifier, tokenize
+
+
+class TestTokenize:
+    """Test cases for query tokenization"""
+
+    def test_tokenize_drops_stopwords_and_folds_plurals(self):
+        """Test stopwords are removed and simple plurals folded"""
+        assert tokenize("What are the expenses for my laptops?") == ["expense", "laptop"]
+
+    def test_tokenize_keeps_double_s_words(self):
+        """Test words ending in 'ss' are not truncated"""
+        assert tokenize("Access process") == ["access", "process"]
+
+
+class TestRouteClassifier:
+    """Test cases for the TF-IDF nearest-centroid classifier"""
+
+    @pytest.mark.parametrize("query,label", [
+        ("How do I set up VPN on my laptop?", "IT"),
+        ("Outlook keeps crashing", "IT"),
+        ("When is payroll processed each month?", "FINANCE"),
+        ("Is my expense claim approved?", "FINANCE"),
+        ("What's the weather today?", "IRRELEVANT"),
+    ])
+    def test_confident_labels(self, query, label):
+        """Test clear-cut queries are classified with high confidence"""
+        predicted, confidence = get_classifier().classify(query)
+
+        assert predicted == label
+        assert confidence >= 0.75
+
+    def test_unknown_vocabulary_has_zero_confidence(self):
+        """Test queries with no known words are left to the LLM"""
+        _, confidence = get_classifier().classify("Test query")
+        assert confidence == 0.0
+
+    def test_cross_domain_query_is_uncertain(self):
+        """Test queries mixing IT and finance terms are not decided locally"""
+        _, confidence = get_classifier().classify("Reimbursement for a new laptop")
+        assert confidence < 0.75
+
+    def test_weak_match_has_zero_confidence(self):
+        """Test one known word among unknown ones does not decide the route locally"""
+        classifier = get_classifier()
+        label, confidence = classifier.classify("Can I get reimbursed for buying a laptop?")
+
+        assert label == "IT"
+        assert classifier.scores("Can I get reimbursed for buying a laptop?")["IT"] < classifier.min_similarity
+        assert confidence == 0.0
+
+    def test_it_and_finance_terms_have_zero_confidence(self):
+        """Test a query using both domains' own words is left to the LLM, however large the margin"""
+        classifier = RouteClassifier({
+            "IT": ["vpn access", "vpn client"],
+            "FINANCE": ["payroll date"],
+            "IRRELEVANT": ["weather today"],
+        })
+
+        assert classifier.classify("vpn vpn client access")[1] == 1.0
+        assert classifier.is_cross_domain("vpn client for payroll")
+        assert classifier.classify("vpn client for payroll") == ("IT", 0.0)
+
+    def test_custom_examples(self):
+        """Test the classifier can be trained on other labeled examples"""
+        classifier = RouteClassifier({
+            "HR": ["annual leave request", "parental leave policy"],
+            "IT": ["vpn access", "password reset"],
+        })
+
+        assert classifier.classify("How much annual leave do I get?")[0] == "HR"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
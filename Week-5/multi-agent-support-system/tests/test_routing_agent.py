@@ -1,16 +1,26 @@
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
+import asyncio
 import sys
 import os
 
 # Add the project root to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from agents.routing_agent import supervisor_agent, dynamic_routing_agent
+from agents.routing_agent import (
+    supervisor_agent, dynamic_routing_agent, get_routing_report, classify_queries,
+    parse_route, route_cache, RouteCache, asupervisor_agent
+)
+import json
+import metrics
 
 
+@patch('agents.routing_agent.ROUTER_FAST_PATH', "off")
 class TestSupervisorAgent:
-    """Test cases for the supervisor_agent function"""
+    """Test cases for the supervisor_agent function (LLM classification tier)"""
+
+    def setup_method(self):
+        route_cache.clear()
     
     @patch('agents.routing_agent.get_llm')
     def test_supervisor_agent_it_query(self, mock_get_llm):
@@ -48,8 +58,8 @@ class TestSupervisorAgent:
         assert result["response"] == ""
     
     @patch('agents.routing_agent.get_llm')
-    def test_supervisor_agent_irrelevant_query_defaults_to_it(self, mock_get_llm):
-        """Test supervisor agent defaults to IT for irrelevant queries"""
+    def test_supervisor_agent_irrelevant_query(self, mock_get_llm):
+        """Test supervisor agent routes irrelevant queries to the irrelevant handler"""
         mock_llm = Mock()
         mock_response = Mock()
         mock_response.content = "IRRELEVANT"
@@ -60,7 +70,8 @@ class TestSupervisorAgent:
         result = supervisor_agent(state)
         
         assert result["query"] == "What's the weather today?"
-        assert result["route"] == "IT"  # Should default to IT for invalid routes
+        assert result["route"] == "IRRELEVANT"
+        assert result["confidence"] == 1.0
         assert result["response"] == ""
     
     @patch('agents.routing_agent.get_llm')
@@ -135,6 +146,46 @@ class TestSupervisorAgent:
         result = supervisor_agent(state)
         
         assert result["route"] == "IT"  # Should default to IT for unknown categories
+        assert result["confidence"] == 0.0
+
+    @patch('agents.routing_agent.get_llm')
+    def test_supervisor_agent_label_with_confidence(self, mock_get_llm):
+        """Test supervisor agent reads the confidence after the label"""
+        mock_llm = Mock()
+        mock_llm.invoke.return_value = Mock(content="FINANCE 0.65")
+        mock_get_llm.return_value = mock_llm
+
+        result = supervisor_agent({"query": "Payroll question"})
+
+        assert result["route"] == "FINANCE"
+        assert result["confidence"] == 0.65
+
+    @patch('agents.routing_agent.get_llm')
+    def test_repeat_query_uses_routing_cache(self, mock_get_llm):
+        """Test a repeat of a normalized query skips classification"""
+        mock_llm = Mock()
+        mock_llm.invoke.return_value = Mock(content="IRRELEVANT 0.95")
+        mock_get_llm.return_value = mock_llm
+
+        supervisor_agent({"query": "Who won the match?"})
+        result = supervisor_agent({"query": "  who WON the match "})
+
+        assert result["route"] == "IRRELEVANT"
+        assert result["confidence"] == 0.95
+        mock_llm.invoke.assert_called_once()
+
+    @patch('agents.routing_agent.get_llm')
+    def test_routing_errors_are_not_cached(self, mock_get_llm):
+        """Test a failed classification is retried on the next request"""
+        mock_llm = Mock()
+        mock_llm.invoke.side_effect = [Exception("Throttled"), Mock(content="FINANCE")]
+        mock_get_llm.return_value = mock_llm
+
+        supervisor_agent({"query": "Payroll question"})
+        result = supervisor_agent({"query": "Payroll question"})
+
+        assert result["route"] == "FINANCE"
+        assert mock_llm.invoke.call_count == 2
     
     def test_supervisor_agent_system_prompt_content(self):
         """Test that system prompt contains expected classification categories"""
@@ -159,6 +210,209 @@ class TestSupervisorAgent:
             assert "Payroll" in call_args
 
 
+class TestParseRoute:
+    """Test cases for parsing the supervisor LLM reply"""
+
+    @pytest.mark.parametrize("content,expected", [
+        ("IT", ("IT", 1.0)),
+        ("finance 0.8", ("FINANCE", 0.8)),
+        ("IRRELEVANT: 0.35", ("IRRELEVANT", 0.35)),
+        ("IT (0.7)", ("IT", 0.7)),
+        ("IT+FINANCE 0.85", ("IT+FINANCE", 0.85)),
+        ("finance + it", ("IT+FINANCE", 1.0)),
+        ("I think it is IT", ("IT", 0.0)),
+        ("", ("IT", 0.0)),
+    ])
+    def test_parse_route(self, content, expected):
+        """Test labels with and without confidence values are parsed"""
+        assert parse_route(content) == expected
+
+
+class TestRouteCache:
+    """Test cases for the TTL routing cache"""
+
+    def test_entries_expire_after_ttl(self):
+        """Test cached routes are dropped once their TTL has passed"""
+        cache = RouteCache(ttl=10, max_size=10)
+        with patch('agents.routing_agent.time.monotonic', return_value=100.0):
+            cache.put("VPN help", "IT", 0.9)
+        with patch('agents.routing_agent.time.monotonic', return_value=105.0):
+            assert cache.get("vpn help?") == ("IT", 0.9)
+        with patch('agents.routing_agent.time.monotonic', return_value=111.0):
+            assert cache.get("vpn help?") is None
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test the cache stays within its size bound"""
+        cache = RouteCache(ttl=60, max_size=2)
+        cache.put("a", "IT", 1.0)
+        cache.put("b", "FINANCE", 1.0)
+        cache.get("a")
+        cache.put("c", "IRRELEVANT", 1.0)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == ("IT", 1.0)
+
+    def test_zero_ttl_disables_cache(self):
+        """Test a TTL of zero never stores routes"""
+        cache = RouteCache(ttl=0)
+        cache.put("a", "IT", 1.0)
+        assert cache.get("a") is None
+
+
+class TestSupervisorFastPath:
+    """Test cases for the local fast-path in front of the LLM"""
+
+    def setup_method(self):
+        metrics.reset()
+        route_cache.clear()
+
+    @patch('agents.routing_agent.ROUTER_FAST_PATH', "on")
+    @patch('agents.routing_agent.get_llm')
+    def test_confident_query_skips_llm(self, mock_get_llm):
+        """Test confident local classification returns without an LLM call"""
+        result = supervisor_agent({"query": "When is payroll processed each month?"})
+
+        assert result["route"] == "FINANCE"
+        assert result["confidence"] >= 0.75
+        mock_get_llm.assert_not_called()
+        assert get_routing_report()["fast_path_rate"] == 1.0
+
+    @patch('agents.routing_agent.ROUTER_FAST_PATH', "on")
+    @patch('agents.routing_agent.get_llm')
+    def test_uncertain_query_falls_back_to_llm(self, mock_get_llm):
+        """Test low-confidence queries are classified by the LLM"""
+        mock_llm = Mock()
+        mock_llm.invoke.return_value = Mock(content="FINANCE")
+        mock_get_llm.return_value = mock_llm
+
+        result = supervisor_agent({"query": "Reimbursement for a new laptop"})
+
+        assert result["route"] == "FINANCE"
+        mock_llm.invoke.assert_called_once()
+        report = get_routing_report()
+        assert report["fallback_rate"] == 1.0
+        assert report["latency"]["llm"]["count"] == 1
+
+    @patch('agents.routing_agent.ROUTER_FAST_PATH', "shadow")
+    @patch('agents.routing_agent.get_llm')
+    def test_shadow_mode_records_agreement(self, mock_get_llm):
+        """Test shadow mode always asks the LLM and tracks agreement"""
+        mock_llm = Mock()
+        mock_llm.invoke.side_effect = [Mock(content="IT"), Mock(content="FINANCE")]
+        mock_get_llm.return_value = mock_llm
+
+        supervisor_agent({"query": "VPN connection keeps dropping"})
+        supervisor_agent({"query": "My laptop is not working"})
+
+        assert mock_llm.invoke.call_count == 2
+        assert get_routing_report()["agreement_rate"] == 0.5
+
+    @patch('agents.routing_agent.ROUTER_FAST_PATH', "on")
+    @patch('agents.routing_agent.get_llm')
+    def test_irrelevant_fast_path(self, mock_get_llm):
+        """Test confidently off-topic queries are routed as IRRELEVANT locally"""
+        result = supervisor_agent({"query": "What's the weather today?"})
+
+        assert result["route"] == "IRRELEVANT"
+        mock_get_llm.assert_not_called()
+
+
+def _batch_reply(prompt, labels):
+    """Label every numbered query in a batch prompt with ``labels(query)``."""
+    queries = [json.loads(line.split(". ", 1)[1]) for line in prompt.split("User Queries:\n")[1].splitlines()
+               if line[:1].isdigit()]
+    return Mock(content=json.dumps({str(i): labels(q) for i, q in enumerate(queries, 1)}))
+
+
+@patch('agents.routing_agent.ROUTER_FAST_PATH', "off")
+class TestClassifyQueries:
+    """Test cases for batched classification"""
+
+    def setup_method(self):
+        metrics.reset()
+        route_cache.clear()
+
+    @patch('agents.routing_agent.get_llm')
+    def test_batches_queries_into_few_calls(self, mock_get_llm):
+        """Test many queries are classified with one call per batch"""
+        mock_llm = Mock()
+        mock_llm.invoke.side_effect = lambda prompt: _batch_reply(
+            prompt, lambda q: "FINANCE" if "payroll" in q else "IT")
+        mock_get_llm.return_value = mock_llm
+
+        queries = [f"payroll question {i}" if i % 2 else f"vpn question {i}" for i in range(250)]
+        results = classify_queries(queries, batch_size=100, max_concurrency=2)
+
+        assert mock_llm.invoke.call_count == 3
+        assert [r["query"] for r in results] == queries
+        assert results[0]["route"] == "IT"
+        assert results[1]["route"] == "FINANCE"
+        assert all(r["error"] is None for r in results)
+
+    @patch('agents.routing_agent.get_llm')
+    def test_missing_labels_are_retried(self, mock_get_llm):
+        """Test queries left out of a batch response are classified on retry"""
+        mock_llm = Mock()
+        mock_llm.invoke.side_effect = [
+            Mock(content='{"1": "FINANCE", "3": "IT"}'),
+            Mock(content='Here you go: {"1": "FINANCE"}'),
+        ]
+        mock_get_llm.return_value = mock_llm
+
+        results = classify_queries(["a", "b", "c"])
+
+        assert [r["route"] for r in results] == ["FINANCE", "FINANCE", "IT"]
+        assert mock_llm.invoke.call_count == 2
+
+    @patch('agents.routing_agent.time.sleep')
+    @patch('agents.routing_agent.get_llm')
+    def test_failed_batch_call_is_retried_whole(self, mock_get_llm, mock_sleep):
+        """Test a throttled batch call is retried as one batch after a backoff"""
+        mock_llm = Mock()
+        mock_llm.invoke.side_effect = [
+            Exception("Throttled"),
+            Mock(content='{"1": "FINANCE", "2": "FINANCE", "3": "FINANCE"}'),
+        ]
+        mock_get_llm.return_value = mock_llm
+
+        results = classify_queries(["a", "b", "c"])
+
+        assert [r["route"] for r in results] == ["FINANCE"] * 3
+        assert mock_llm.invoke.call_count == 2
+        mock_sleep.assert_called_once_with(1.0)
+
+    @patch('agents.routing_agent.time.sleep')
+    @patch('agents.routing_agent.get_llm')
+    def test_persistent_failure_does_not_split_batch(self, mock_get_llm, mock_sleep):
+        """Test an outage costs a bounded number of calls and errors every query in the batch"""
+        mock_llm = Mock()
+        mock_llm.invoke.side_effect = Exception("Throttled")
+        mock_get_llm.return_value = mock_llm
+
+        results = classify_queries([f"query {i}" for i in range(100)])
+
+        assert mock_llm.invoke.call_count == 3
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [1.0, 2.0]
+        assert all(r["error"] == "Error in routing: Throttled" for r in results)
+        assert all(r["route"] == "IT" for r in results)
+
+    @patch('agents.routing_agent.get_llm')
+    def test_fast_path_queries_skip_llm(self, mock_get_llm):
+        """Test confidently classified queries never reach the batch prompt"""
+        mock_llm = Mock()
+        mock_llm.invoke.side_effect = lambda prompt: _batch_reply(prompt, lambda q: "FINANCE")
+        mock_get_llm.return_value = mock_llm
+
+        with patch('agents.routing_agent.ROUTER_FAST_PATH', "on"):
+            results = classify_queries(["When is payroll processed each month?", "Reimbursement for a new laptop"])
+
+        assert results[0]["source"] == "fast_path"
+        assert results[1]["source"] == "llm"
+        prompt = mock_llm.invoke.call_args[0][0]
+        assert "payroll processed" not in prompt
+        assert "Reimbursement for a new laptop" in prompt
+
+
 class TestDynamicRoutingAgent:
     """Test cases for the dynamic_routing_agent function"""
     
@@ -177,6 +431,9 @@ class TestDynamicRoutingAgent:
 
 class TestRoutingAgentIntegration:
     """Integration tests for routing agent functionality"""
+
+    def setup_method(self):
+        route_cache.clear()
     
     @patch('agents.routing_agent.get_llm')
     def test_it_queries_routing(self, mock_get_llm):
@@ -223,5 +480,38 @@ class TestRoutingAgentIntegration:
             assert result["route"] == "FINANCE", f"Query '{query}' should route to FINANCE"
 
 
+@patch('agents.routing_agent.ROUTER_FAST_PATH', "off")
+class TestAsyncSupervisorAgent:
+    """Test cases for asupervisor_agent"""
+
+    def setup_method(self):
+        route_cache.clear()
+
+    @patch('agents.routing_agent.get_llm')
+    def test_asupervisor_agent_awaits_llm(self, mock_get_llm):
+        """Test the async supervisor awaits the LLM and parses its reply"""
+        mock_llm = Mock()
+        mock_llm.ainvoke = AsyncMock(return_value=Mock(content="FINANCE 0.8"))
+        mock_get_llm.return_value = mock_llm
+
+        result = asyncio.run(asupervisor_agent({"query": "Payroll question"}))
+
+        assert result == {"query": "Payroll question", "route": "FINANCE", "confidence": 0.8, "response": ""}
+        mock_llm.ainvoke.assert_awaited_once()
+        mock_llm.invoke.assert_not_called()
+
+    @patch('agents.routing_agent.get_llm')
+    def test_asupervisor_agent_error(self, mock_get_llm):
+        """Test async routing errors default to IT"""
+        mock_llm = Mock()
+        mock_llm.ainvoke = AsyncMock(side_effect=Exception("LLM connection failed"))
+        mock_get_llm.return_value = mock_llm
+
+        result = asyncio.run(asupervisor_agent({"query": "Test query"}))
+
+        assert result["route"] == "IT"
+        assert "Error in routing" in result["response"]
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
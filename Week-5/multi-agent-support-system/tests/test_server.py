@@ -0,0 +1,241 @@
+import pytest
+from unittest.mock import patch
+import sys
+import os
+import asyncio
+import itertools
+import json
+
+from aiohttp.test_utils import TestClient, TestServer
+from langchain.agents import create_agent
+from langchain.tools import tool
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.messages.tool import tool_call_chunk
+from langchain_core.outputs import ChatGenerationChunk
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import deadline
+import metrics
+from graph.workflow import build_workflow
+from server import create_app, SUPPORT_SERVER
+
+
+def _run(coroutine_fn, **app_kwargs):
+    """Run ``coroutine_fn(client)`` against a stub-mode server."""
+    async def main():
+        app = create_app(stub=True, **app_kwargs)
+        async with TestClient(TestServer(app)) as client:
+            return await coroutine_fn(client)
+    return asyncio.run(main())
+
+
+class TestQueryEndpoint:
+    """Test cases for POST /query"""
+
+    def setup_method(self):
+        metrics.reset()
+
+    def test_streams_route_tokens_and_final_response(self):
+        """Test the response is NDJSON: route, answer tokens, then done"""
+        async def call(client):
+            response = await client.post("/query", json={"query": "How do I set up VPN on my laptop?"})
+            return response.status, response.headers["Content-Type"], await response.text()
+
+        status, content_type, body = _run(call, stub_latency=0)
+        events = [json.loads(line) for line in body.splitlines()]
+
+        assert status == 200
+        assert content_type.startswith("application/x-ndjson")
+        assert events[0]["event"] == "route"
+        assert events[0]["route"] == "IT"
+        assert any(e["event"] == "token" for e in events)
+        assert events[-1] == {
+            "event": "done",
+            "route": "IT",
+            "response": "Stub IT answer for: How do I set up VPN on my laptop?"
+        }
+        assert "".join(e["content"] for e in events if e["event"] == "token") == events[-1]["response"]
+
+    def test_non_streaming_response(self):
+        """Test stream=false returns a single JSON document"""
+        async def call(client):
+            response = await client.post("/query?stream=false", json={"query": "When is payroll processed each month?"})
+            return response.status, await response.json()
+
+        status, body = _run(call, stub_latency=0)
+
+        assert status == 200
+        assert body["route"] == "FINANCE"
+        assert body["response"].startswith("Stub FINANCE answer")
+
+    def test_irrelevant_query_is_answered_by_handler(self):
+        """Test off-topic queries end at the irrelevant handler"""
+        async def call(client):
+            response = await client.post("/query?stream=false", json={"query": "What's the weather today?"})
+            return await response.json()
+
+        body = _run(call, stub_latency=0)
+
+        assert body["route"] == "IRRELEVANT"
+        assert "corporate support system" in body["response"]
+
+    @pytest.mark.parametrize("payload", [{}, {"query": "   "}, ["not", "an", "object"]])
+    def test_invalid_body_is_rejected(self, payload):
+        """Test requests without a usable query get 400"""
+        async def call(client):
+            response = await client.post("/query", json=payload)
+            return response.status
+
+        assert _run(call) == 400
+
+    def test_saturated_server_returns_429(self):
+        """Test requests beyond max concurrency are rejected, not queued"""
+        async def call(client):
+            responses = await asyncio.gather(*(
+                client.post("/query?stream=false", json={"query": f"payroll question {i}"}) for i in range(4)
+            ))
+            return sorted(r.status for r in responses), responses[-1].headers.get("Retry-After")
+
+        statuses, _ = _run(call, max_concurrency=2, stub_latency=0.3)
+
+        assert statuses == [200, 200, 429, 429]
+        assert metrics.get_count("server.rejected") == 2
+
+    def test_workflow_error_returns_500(self):
+        """Test a failing workflow is reported without leaking the slot"""
+        class FailingWorkflow:
+            async def astream(self, *args, **kwargs):
+                raise RuntimeError("Bedrock unavailable")
+                yield
+
+        app = create_app(stub=True, workflow=FailingWorkflow())
+
+        async def main():
+            async with TestClient(TestServer(app)) as client:
+                response = await client.post("/query?stream=false", json={"query": "anything"})
+                return response.status, await response.json()
+
+        status, body = asyncio.run(main())
+
+        assert status == 500
+        assert "Bedrock unavailable" in body["error"]
+        assert app[SUPPORT_SERVER].in_flight == 0
+
+
+class ToolCallingFakeModel(GenericFakeChatModel):
+    """Fake chat model that accepts tools so it can drive create_agent."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        reply = next(self.messages)
+        if not reply.tool_calls:
+            self.messages = itertools.chain([reply], self.messages)
+            yield from super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+            return
+        # GenericFakeChatModel streams content only, so tool calls go out as one chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+            tool_call_chunk(name=call["name"], args=json.dumps(call["args"]), id=call["id"], index=i)
+            for i, call in enumerate(reply.tool_calls)
+        ]))
+
+
+@tool
+async def summarize_policy(query: str) -> str:
+    """Summarize the VPN policy with an LLM."""
+    model = GenericFakeChatModel(messages=iter([AIMessage(content="internal summary")]))
+    return (await model.ainvoke(query)).content
+
+
+def _nested_agent_workflow():
+    """Specialists that run a nested create_agent graph, like the real IT and Finance agents."""
+    async def supervisor(state):
+        return {"query": state["query"], "route": "IT", "confidence": 1.0, "response": ""}
+
+    def specialist(route):
+        async def node(state):
+            agent = create_agent(ToolCallingFakeModel(messages=iter([
+                AIMessage(content="", tool_calls=[{"name": "summarize_policy", "args": {"query": "vpn"}, "id": "1"}]),
+                AIMessage(content="Use the company VPN client."),
+            ])), tools=[summarize_policy])
+            result = await deadline.ainvoke_agent(
+                "it_agent", agent, {"messages": [HumanMessage(content=state["query"])]}
+            )
+            return {"query": state["query"], "route": route, "response": result["messages"][-1].content}
+        return node
+
+    return build_workflow(supervisor, specialist("IT"), specialist("FINANCE"))
+
+
+class TestNestedAgentStreaming:
+    """Test cases for token streaming from specialists that run their own agent graph"""
+
+    def setup_method(self):
+        metrics.reset()
+
+    def test_nested_agent_tokens_are_streamed(self):
+        """Test the nested agent's answer tokens reach the client, but not its tools' LLM output"""
+        app = create_app(stub=True, workflow=_nested_agent_workflow())
+
+        async def main():
+            async with TestClient(TestServer(app)) as client:
+                response = await client.post("/query", json={"query": "How do I connect to VPN?"})
+                return await response.text()
+
+        events = [json.loads(line) for line in asyncio.run(main()).splitlines()]
+
+        assert events[0]["event"] == "route"
+        tokens = "".join(e["content"] for e in events if e["event"] == "token")
+        assert tokens == "Use the company VPN client."
+        assert events[-1] == {"event": "done", "route": "IT", "response": "Use the company VPN client."}
+
+
+class TestMetricsEndpoint:
+    """Test cases for GET /metrics"""
+
+    def setup_method(self):
+        metrics.reset()
+
+    def test_metrics_report_requests_and_latency(self):
+        """Test /metrics exposes in-flight, counters and request latency"""
+        async def call(client):
+            await client.post("/query?stream=false", json={"query": "VPN connection keeps dropping"})
+            response = await client.get("/metrics")
+            return await response.json()
+
+        body = _run(call, max_concurrency=8, stub_latency=0)
+
+        assert body["in_flight"] == 0
+        assert body["max_concurrency"] == 8
+        assert body["counters"]["server.requests"] == 1
+        assert body["latency"]["server.request"]["count"] == 1
+        assert "fast_path_rate" in body["routing"]
+
+
+class TestWarmResources:
+    """Test cases for warming shared resources at startup"""
+
+    @patch('config.get_llm')
+    def test_warm_resources_shares_clients(self, _):
+        """Test warmed clients are reused by later calls"""
+        import config
+        from server import warm_resources
+
+        with patch('config._shared_resources', None), \
+             patch('config._create_llm', side_effect=[object(), object()]), \
+             patch('rag.it_rag.load_it_rag_chain', return_value=("it",)), \
+             patch('rag.finance_rag.load_finance_rag_chain', return_value=("finance",)):
+            warm_resources()
+            llm = config.get_llm()
+
+            assert config.get_llm() is llm
+            assert config.shared_resource("it_rag", lambda: None) == ("it",)
+            assert config.shared_resource("finance_rag", lambda: None) == ("finance",)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -1,12 +1,13 @@
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
+import asyncio
 import sys
 import os
 
 # Add the project root to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from tools.tavily_tool import tavily_search
+from tools.tavily_tool import tavily_search, atavily_search
 
 
 class TestTavilySearch:
@@ -105,5 +106,35 @@ class TestTavilySearch:
         assert result == "{}"
 
 
+class TestAsyncTavilySearch:
+    """Test cases for the atavily_search coroutine"""
+
+    @patch('tools.tavily_tool.AsyncTavilyClient')
+    def test_atavily_search_success(self, mock_client_class):
+        """Test the async client is awaited with the same parameters"""
+        mock_client = Mock()
+        mock_client.search = AsyncMock(return_value={"answer": "Async answer"})
+        mock_client_class.return_value = mock_client
+
+        with patch.dict(os.environ, {"TAVILY_API_KEY": "test_api_key"}):
+            result = asyncio.run(atavily_search("test query"))
+
+        mock_client_class.assert_called_once_with(api_key="test_api_key")
+        mock_client.search.assert_awaited_once_with(query="test query", max_results=5, include_answer=True)
+        assert result == str({"answer": "Async answer"})
+
+    @patch('tools.tavily_tool.AsyncTavilyClient')
+    def test_atavily_search_error(self, mock_client_class):
+        """Test async search failures are reported like the sync version"""
+        mock_client = Mock()
+        mock_client.search = AsyncMock(side_effect=Exception("Timeout"))
+        mock_client_class.return_value = mock_client
+
+        with patch.dict(os.environ, {"TAVILY_API_KEY": "test_api_key"}):
+            result = asyncio.run(atavily_search("test query"))
+
+        assert result == "Tavily search unavailable: Timeout"
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
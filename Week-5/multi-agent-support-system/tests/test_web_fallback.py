@@ -0,0 +1,135 @@
+import pytest
+from unittest.mock import Mock, patch
+import sys
+import os
+import threading
+
+from langchain_core.documents import Document
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import metrics
+from rag.web_fallback import build_chain_inputs, distance_space
+
+
+def _db(score, text="VPN requires MFA", space="cosine"):
+    db = Mock()
+    db.similarity_search_with_relevance_scores.return_value = [(Document(page_content=text), score)]
+    db._collection.metadata = {"hnsw:space": space}
+    return db
+
+
+class TestBuildChainInputs:
+    """Test cases for confidence-gated web search"""
+
+    def setup_method(self):
+        metrics.reset()
+
+    def test_confident_retrieval_skips_web_search(self):
+        """Test Tavily is not called when internal documents are relevant"""
+        web_search = Mock(return_value="web results")
+
+        inputs = build_chain_inputs(_db(0.9), "How do I connect to VPN?", web_search, threshold=0.5)
+
+        web_search.assert_not_called()
+        assert inputs == {
+            "context": "VPN requires MFA",
+            "web_context": "",
+            "question": "How do I connect to VPN?"
+        }
+        assert metrics.get_count("web_search.skipped") == 1
+
+    def test_low_confidence_falls_back_to_web_search(self):
+        """Test Tavily is called when the best internal chunk is weak"""
+        web_search = Mock(return_value="web results")
+
+        inputs = build_chain_inputs(_db(0.1), "Latest zero-day news?", web_search, threshold=0.5)
+
+        web_search.assert_called_once_with({"question": "Latest zero-day news?"})
+        assert inputs["web_context"] == "web results"
+        assert metrics.get_count("web_search.used") == 1
+
+    def test_empty_retrieval_falls_back_to_web_search(self):
+        """Test no internal results at all triggers web search"""
+        db = _db(0.0)
+        db.similarity_search_with_relevance_scores.return_value = []
+        web_search = Mock(return_value="web results")
+
+        inputs = build_chain_inputs(db, "question", web_search, threshold=0.5)
+
+        assert inputs["context"] == ""
+        assert inputs["web_context"] == "web results"
+
+    def test_l2_index_ignores_threshold_with_warning(self):
+        """Test an index built before the switch to cosine is not compared with the cosine threshold"""
+        web_search = Mock(return_value="web results")
+
+        with pytest.warns(UserWarning, match="re-run"):
+            inputs = build_chain_inputs(_db(0.1, space="l2"), "How do I connect to VPN?", web_search, threshold=0.5)
+
+        web_search.assert_not_called()
+        assert inputs["context"] == "VPN requires MFA"
+
+    def test_chroma_without_space_metadata_is_l2(self):
+        """Test a collection created without hnsw:space is treated as L2, Chroma's default"""
+        db = _db(0.9)
+        db._collection.metadata = None
+
+        assert distance_space(db) == "l2"
+        assert distance_space(_db(0.9)) == "cosine"
+
+    def test_speculative_search_reuses_in_flight_result(self):
+        """Test speculative mode starts web search once and uses its result"""
+        web_search = Mock(return_value="speculative results")
+
+        inputs = build_chain_inputs(_db(0.1), "question", web_search, threshold=0.5, speculative=True)
+
+        web_search.assert_called_once()
+        assert inputs["web_context"] == "speculative results"
+
+    def test_speculative_search_discarded_when_confident(self):
+        """Test speculative result is ignored when internal documents suffice"""
+        release = threading.Event()
+
+        def slow_web_search(_):
+            release.wait(timeout=5)
+            return "late web results"
+
+        inputs = build_chain_inputs(_db(0.9), "question", slow_web_search, threshold=0.5, speculative=True)
+        release.set()
+
+        assert inputs["web_context"] == ""
+        assert metrics.get_count("web_search.speculative_discarded") == 1
+
+
+class TestRagChainWebSearch:
+    """Test cases for the IT RAG chain wiring"""
+
+    @patch('rag.it_rag.tavily_search')
+    @patch('rag.it_rag.ChatBedrock')
+    @patch('rag.it_rag.Chroma')
+    @patch('rag.it_rag.BedrockEmbeddings')
+    def test_chain_does_not_call_tavily_for_confident_question(self, mock_embeddings, mock_chroma,
+                                                               mock_llm, mock_tavily):
+        """Test the common path of the IT chain avoids the Tavily round trip"""
+        from langchain_core.messages import AIMessage
+        from rag.it_rag import load_it_rag_chain
+
+        mock_chroma.return_value = _db(0.95)
+        mock_llm.return_value = Mock(return_value=AIMessage(content="Use the VPN client"))
+
+        with patch.dict(os.environ, {
+            "AWS_REGION": "us-east-1",
+            "AWS_ACCESS_KEY_ID": "test_key_id",
+            "AWS_SECRET_ACCESS_KEY": "test_secret_key"
+        }):
+            _, _, chain = load_it_rag_chain()
+            result = chain.invoke("How do I connect to VPN?")
+
+        assert result.content == "Use the VPN client"
+        mock_tavily.assert_not_called()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
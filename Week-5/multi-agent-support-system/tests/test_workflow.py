@@ -1,5 +1,7 @@
 import pytest
 from unittest.mock import Mock, patch
+import asyncio
+import time
 import sys
 import os
 
@@ -11,7 +13,10 @@ from graph.workflow import (
     irrelevant_handler, 
     create_supervisor_workflow, 
     create_dynamic_workflow,
-    app
+    create_async_supervisor_workflow,
+    SupportState,
+    app,
+    async_app
 )
 
 
@@ -117,8 +122,8 @@ class TestCreateSupervisorWorkflow:
         # Call the function
         result = create_supervisor_workflow()
         
-        # Verify StateGraph was initialized with dict
-        mock_state_graph.assert_called_once_with(dict)
+        # Verify StateGraph was initialized with the typed state
+        mock_state_graph.assert_called_once_with(SupportState)
         
         # Verify nodes were added
         expected_nodes = [
@@ -137,7 +142,7 @@ class TestCreateSupervisorWorkflow:
         # Verify finish points were set
         finish_point_calls = mock_graph_instance.set_finish_point.call_args_list
         finish_points = [call[0][0] for call in finish_point_calls]
-        expected_finish_points = ["it_agent", "finance_agent", "irrelevant_handler"]
+        expected_finish_points = ["it_agent", "finance_agent", "irrelevant_handler", "merge"]
         
         for point in expected_finish_points:
             assert point in finish_points
@@ -169,7 +174,9 @@ class TestCreateSupervisorWorkflow:
         expected_mapping = {
             "it_agent": "it_agent",
             "finance_agent": "finance_agent", 
-            "irrelevant_handler": "irrelevant_handler"
+            "irrelevant_handler": "irrelevant_handler",
+            "it_branch": "it_branch",
+            "finance_branch": "finance_branch"
         }
         assert call_args[0][2] == expected_mapping
 
@@ -246,6 +253,23 @@ class TestWorkflowApp:
         # App should be a compiled StateGraph
         assert hasattr(app, 'invoke') or hasattr(app, '__call__')
 
+    @patch('graph.workflow.it_agent')
+    @patch('agents.routing_agent.get_llm')
+    def test_irrelevant_query_skips_specialist_agents(self, mock_get_llm, mock_it_agent):
+        """Test an off-topic query ends at the irrelevant handler"""
+        from agents.routing_agent import route_cache
+        route_cache.clear()
+        mock_llm = Mock()
+        mock_llm.invoke.return_value = Mock(content="IRRELEVANT 0.9")
+        mock_get_llm.return_value = mock_llm
+
+        with patch('agents.routing_agent.ROUTER_FAST_PATH', "off"):
+            result = create_supervisor_workflow().invoke({"query": "Who won the match?"})
+
+        assert result["route"] == "IRRELEVANT"
+        assert "corporate support system" in result["response"]
+        mock_it_agent.assert_not_called()
+
 
 class TestWorkflowEdgeCases:
     """Test edge cases and error scenarios"""
@@ -288,5 +312,36 @@ class TestWorkflowEdgeCases:
             assert result == case["expected"], f"Route '{case['route']}' should map to '{case['expected']}'"
 
 
+class TestAsyncWorkflow:
+    """Test cases for the async workflow"""
+
+    def test_async_app_exists(self):
+        """Test the async app is compiled alongside the sync app"""
+        assert hasattr(async_app, 'ainvoke')
+
+    def test_concurrent_queries_share_one_event_loop(self):
+        """Test slow async nodes for many queries overlap instead of queueing"""
+        async def supervisor(state):
+            return {"query": state["query"], "route": "FINANCE", "response": ""}
+
+        async def finance(state):
+            await asyncio.sleep(0.2)
+            return {"query": state["query"], "route": "FINANCE", "response": f"answer: {state['query']}"}
+
+        with patch('graph.workflow.asupervisor_agent', supervisor), \
+             patch('graph.workflow.afinance_agent', finance):
+            workflow = create_async_supervisor_workflow()
+
+        async def run_all():
+            return await asyncio.gather(*(workflow.ainvoke({"query": f"q{i}"}) for i in range(20)))
+
+        start = time.perf_counter()
+        results = asyncio.run(run_all())
+        elapsed = time.perf_counter() - start
+
+        assert [r["response"] for r in results] == [f"answer: q{i}" for i in range(20)]
+        assert elapsed < 2.0
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
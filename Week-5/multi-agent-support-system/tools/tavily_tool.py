@@ -1,14 +1,45 @@
 import os
-from tavily import TavilyClient
+from tavily import AsyncTavilyClient, TavilyClient
+
+import deadline
+
+# Tavily's own default timeout, lowered to the time left under a request deadline
+SEARCH_TIMEOUT_SECONDS = 60.0
+DEADLINE_MESSAGE = "Tavily search skipped: the request deadline was reached."
+
+
+def _timeout_kwargs():
+    left = deadline.remaining()
+    return {} if left is None else {"timeout": min(SEARCH_TIMEOUT_SECONDS, left)}
+
 
 def tavily_search(query: str) -> str:
     try:
+        deadline.check("tavily")
         client = TavilyClient(api_key=os.environ["TAVILY_API_KEY"])
         result = client.search(
             query=query,
             max_results=5,
-            include_answer=True
+            include_answer=True,
+            **_timeout_kwargs()
         )
         return str(result)
+    except deadline.DeadlineExceeded:
+        return DEADLINE_MESSAGE
+    except Exception as e:
+        return f"Tavily search unavailable: {str(e)}"
+
+async def atavily_search(query: str) -> str:
+    try:
+        client = AsyncTavilyClient(api_key=os.environ["TAVILY_API_KEY"])
+        result = await deadline.acall("tavily", client.search(
+            query=query,
+            max_results=5,
+            include_answer=True,
+            **_timeout_kwargs()
+        ))
+        return str(result)
+    except deadline.DeadlineExceeded:
+        return DEADLINE_MESSAGE
     except Exception as e:
         return f"Tavily search unavailable: {str(e)}"
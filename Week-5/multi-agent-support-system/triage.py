@@ -0,0 +1,53 @@
+# Bulk ticket triage: route an exported ticket list with batched classification
+import argparse
+import csv
+import sys
+import time
+
+from agents.routing_agent import classify_queries, get_routing_report
+import metrics
+
+
+def read_tickets(path: str, column: str = None) -> list:
+    """One ticket per line, or the given column of a CSV export."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if column:
+            return [row[column] for row in csv.DictReader(f)]
+        return [line.strip() for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Route a ticket export to IT or Finance")
+    parser.add_argument("input", help="Text file with one ticket per line, or a CSV export")
+    parser.add_argument("--column", help="CSV column holding the ticket text")
+    parser.add_argument("--output", help="CSV file for the routes (default: stdout)")
+    parser.add_argument("--batch-size", type=int, help="Tickets per LLM call")
+    parser.add_argument("--concurrency", type=int, help="LLM calls in flight")
+    args = parser.parse_args()
+
+    tickets = read_tickets(args.input, args.column)
+    start = time.perf_counter()
+    results = classify_queries(tickets, batch_size=args.batch_size, max_concurrency=args.concurrency)
+    elapsed = time.perf_counter() - start
+
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        writer = csv.DictWriter(out, fieldnames=["query", "route", "source", "error"])
+        writer.writeheader()
+        writer.writerows(results)
+    finally:
+        if args.output:
+            out.close()
+
+    report = get_routing_report()
+    print(
+        f"\nTriaged {len(tickets)} tickets in {elapsed:.1f}s: "
+        f"{metrics.get_count('router.batch_calls')} LLM calls, "
+        f"{report['fast_path_rate']:.0%} fast path, "
+        f"{sum(1 for r in results if r['error'])} failed",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
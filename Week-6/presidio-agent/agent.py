@@ -4,11 +4,15 @@ from langchain.tools import tool
 from langchain.agents import create_agent
 from langchain_aws import ChatBedrock
 from tools.tavily_search import tavily_search_tool
-from tools.rag_tool import load_rag_chain
+from tools import rag_tool
+from tools.rag_tool import load_rag_chain, search_policy_excerpts
 from langchain_mcp_adapters.client import MultiServerMCPClient
-from langchain.agents.middleware import PIIMiddleware
 from langchain.agents.middleware import HumanInTheLoopMiddleware
 from guardrails import content_filter, safety_guardrail
+from deadline import DeadlineMiddleware
+from parallel_tools import ParallelToolsMiddleware
+from pii_scanner import PIIScannerMiddleware
+from memory import checkpointer, memory_middleware
 
 
 
@@ -31,6 +35,8 @@ def tavily_search(query: str) -> str:
 @tool
 def rag_search(query: str) -> str:
     """Search internal HR policy documents using RAG."""
+    if rag_tool.RAG_TOOL_MODE == "context":
+        return search_policy_excerpts(query)
     rag_chain = load_rag_chain()
     return rag_chain.invoke(query)
 
@@ -43,10 +49,19 @@ RULES:
 - External industry/regulatory/trend queries → use tavily_search tool.
 - Insurance questions → use MCP Google Docs tool.
 - Always answer based on tool results; if multiple tools, synthesize coherently.
+- rag_search may return numbered policy excerpts with source and page; answer from them and cite the page.
 - If result is "Not found" or outside Presidio, say so explicitly.
 - Keep answers concise and relevant.
 """
 
+# PII protection (input and output), all types in one pass.
+# Module level so app.py can apply the same scanner to streamed replies.
+pii_protection = PIIScannerMiddleware(
+    ["email", "phone", "ssn", "employee_id", "credit_card"],
+    apply_to_input=True,
+    apply_to_output=True,
+)
+
 # Async function to create the agent
 async def create_presidio_agent():
     # Initialize MCP client for Google Docs tool
@@ -71,15 +86,28 @@ async def create_presidio_agent():
             # Layer 1: Deterministic input filter (before agent)
             content_filter,
 
-            # Layer 2: PII protection (input and output)
-            PIIMiddleware("email", strategy="redact", apply_to_input=True, apply_to_output=True),
+            # Layer 2: PII protection (input and output), all types in one pass
+            pii_protection,
+
+            # Session memory: rolling summary once history passes the token budget
+            # (after PII redaction, so summaries never see raw PII)
+            memory_middleware(llm),
 
             # Layer 3: Human approval for sensitive tools
             HumanInTheLoopMiddleware(interrupt_on={"send_email": True}),
 
             # Layer 4: Model-based safety check (after agent)
             safety_guardrail,
+
+            # Request deadline: bounds every model and tool call
+            DeadlineMiddleware(),
+
+            # Same-turn tool calls run concurrently, each within its own timeout
+            # (inside the deadline, so a tool stops at whichever comes first)
+            ParallelToolsMiddleware(),
         ],
+        # Per-thread history with LRU/TTL eviction of idle sessions
+        checkpointer=checkpointer,
     )
     return agent
 
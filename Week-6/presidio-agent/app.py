@@ -1,11 +1,68 @@
-from agent import agent
+from agent import agent, pii_protection
+import argparse
 import asyncio
 
+from langchain.messages import AIMessage, AIMessageChunk
 from langfuse.langchain import CallbackHandler
 
+from guardrails import UNSAFE_MESSAGE
+from memory import new_session_config
+from pii_scanner import StreamingPIIRedactor
+from streaming_guardrail import StreamingSafetyGuard
 
-async def main():
+
+async def stream_reply(user_input: str, config: dict):
+    """
+    Print the reply as it is generated, checked chunk by chunk by the streaming guardrail.
+
+    The PII middleware only redacts the finished message, so with output
+    redaction on the deltas are redacted here before they are checked or shown.
+    """
+    final_state = {}
+    message_ids = []
+    redactor = StreamingPIIRedactor(pii_protection.scanner) if pii_protection.apply_to_output else None
+
+    async def deltas():
+        async for mode, payload in agent.astream(
+            {"messages": [("user", user_input)]},
+            config,
+            stream_mode=["messages", "values"],
+        ):
+            if mode == "values":
+                final_state.update(payload)
+                continue
+            chunk, meta = payload
+            if meta.get("langgraph_node") == "model" and isinstance(chunk, AIMessageChunk):
+                message_ids.append(chunk.id)
+                yield redactor.feed(chunk.text) if redactor else chunk.text
+        if redactor:
+            yield redactor.flush()
+
+    guard = StreamingSafetyGuard()
+    printed = False
+    print("\nAgent: ", end="", flush=True)
+    async for text in guard.guard(deltas()):
+        print(text, end="", flush=True)
+        printed = True
+
+    if guard.blocked:
+        print(("\n" if printed else "") + UNSAFE_MESSAGE, "\n")
+        # Keep the blocked reply out of the session's history
+        await agent.aupdate_state(config, {"messages": [AIMessage(content=UNSAFE_MESSAGE, id=message_ids[-1])]})
+    elif not printed:
+        # Nothing was generated token by token (e.g. the input filter answered)
+        final_message = next(
+            (msg.content for msg in reversed(final_state.get("messages", [])) if msg.type == "ai"), ""
+        )
+        print(final_message, "\n")
+    else:
+        print("\n")
+
+
+async def main(stream: bool = False):
     print("🧠 Agent is running. Type 'exit' to quit.\n")
+    # One conversation per CLI session; earlier turns are kept by the checkpointer
+    session = new_session_config()
 
     while True:
         user_input = input("You: ").strip()
@@ -16,12 +73,20 @@ async def main():
 
         langfuse_handler = CallbackHandler()
 
+        if stream:
+            await stream_reply(user_input, {
+                "callbacks": [langfuse_handler],
+                # The after_agent safety check is skipped; the stream is checked instead
+                "configurable": {**session["configurable"], "safety_streamed": True},
+            })
+            continue
+
         response = await agent.ainvoke({
             "messages": [
                 ("user", user_input)
             ]
         },
-        {"callbacks": [langfuse_handler]},)
+        {**session, "callbacks": [langfuse_handler]},)
 
         final_message = next(
             msg.content for msg in reversed(response["messages"])
@@ -32,4 +97,8 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Presidio agent CLI")
+    parser.add_argument("--stream", action="store_true",
+                        help="stream replies and check them incrementally instead of after completion")
+    args = parser.parse_args()
+    asyncio.run(main(stream=args.stream))
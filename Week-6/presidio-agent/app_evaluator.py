@@ -1,12 +1,22 @@
+import argparse
 import asyncio
 import json
 import time
 from datetime import datetime
 
+from langchain_core.callbacks import get_usage_metadata_callback
 from agentevals.trajectory.llm import create_async_trajectory_llm_as_judge
 from agentevals.trajectory.match import create_async_trajectory_match_evaluator
 
 from agent import agent  
+from deadline import get_deadline_report
+from tools import rag_tool
+from metrics import reset as reset_metrics
+import parallel_tools
+from parallel_tools import get_tool_report
+from safety_scorer import get_safety_report
+from tools.rag_tool import get_rag_metrics
+from memory import new_session_config
 
 
 def compute_test_score(result):
@@ -79,10 +89,18 @@ def compute_metrics(results):
 
     overall_pass = sum(1 for r in results if r["eval_score"])
 
+    avg_input_tokens = sum(r["input_tokens"] for r in results) / total
+    avg_output_tokens = sum(r["output_tokens"] for r in results) / total
+
+    # Cases that need several tools: parallel tool calls should save whole model turns
+    multi_tool = [r for r in results if r["multi_tool"]]
+
     return {
         "overall_pass_rate": overall_pass / total,
         "avg_correctness": correctness_avg,
         "avg_latency": avg_latency,
+        "avg_input_tokens": avg_input_tokens,
+        "avg_output_tokens": avg_output_tokens,
         "tool_success_rate": tool_success / tool_required if tool_required else 1.0,
         "hallucination_rate": hallucinations / refusal_cases if refusal_cases else 0.0,
         "total_tests": total,
@@ -90,8 +108,25 @@ def compute_metrics(results):
         "hallucinations_detected": hallucinations,
         "tool_required": tool_required,
         "tool_success": tool_success,
+        "multi_tool_cases": len(multi_tool),
+        "multi_tool_avg_latency": sum(r["latency"] for r in multi_tool) / len(multi_tool) if multi_tool else 0.0,
+        "multi_tool_avg_tool_turns": sum(r["tool_turns"] for r in multi_tool) / len(multi_tool) if multi_tool else 0.0,
+        # Tiered safety guardrail over this run's turns
+        "safety": get_safety_report(),
+        # Tool calls per model turn, timeouts and per-tool p95
+        "tools": get_tool_report(),
+        # rag_search questions answered from context vs short-circuited as not found
+        "rag": get_rag_metrics(),
+        # Turns that ran out of their request deadline, by stage
+        "deadline": get_deadline_report(),
     }
 
+def _by_stage(missed):
+    """``{"model": 2, "rag_search": 1}`` -> ``"(model: 2, rag_search: 1)"``"""
+    if not missed:
+        return ""
+    return "(" + ", ".join(f"{stage}: {count}" for stage, count in missed.items()) + ")"
+
 def generate_markdown_report(results, metrics):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
@@ -110,9 +145,18 @@ def generate_markdown_report(results, metrics):
 | **Overall Pass Rate** | {metrics['overall_pass_rate']:.1%} |
 | **Average Correctness** | {metrics['avg_correctness']:.2f} |
 | **Average Latency** | {metrics['avg_latency']:.2f}s |
+| **Average Tokens (in / out)** | {metrics['avg_input_tokens']:.0f} / {metrics['avg_output_tokens']:.0f} |
 | **Tool Usage Success** | {metrics['tool_success_rate']:.1%} |
 | **Hallucination Rate** | {metrics['hallucination_rate']:.1%} |
 | **Total Test Cases** | {metrics['total_tests']} |
+| **Safety Checks Escalated to LLM** | {metrics['safety']['escalation_rate']:.1%} |
+| **Safety Check p95 (all / LLM-judged)** | {metrics['safety']['p95_seconds']:.2f}s / {metrics['safety']['p95_llm_seconds']:.2f}s |
+| **Multi-Tool Latency (avg, {metrics['multi_tool_cases']} cases)** | {metrics['multi_tool_avg_latency']:.2f}s |
+| **Model Turns with Tool Calls (multi-tool avg)** | {metrics['multi_tool_avg_tool_turns']:.1f} |
+| **Tool Calls per Turn** | {metrics['tools']['calls_per_turn']:.2f} |
+| **Tool Timeouts** | {sum(metrics['tools']['timeouts'].values())} |
+| **RAG Relevant Context (hit / skip)** | {metrics['rag']['hit_rate']:.1%} / {metrics['rag']['skip_rate']:.1%} |
+| **Deadline Misses** | {metrics['deadline']['miss_rate']:.1%} {_by_stage(metrics['deadline']['missed_by_stage'])} |
 
 ---
 
@@ -130,6 +174,8 @@ def generate_markdown_report(results, metrics):
 | Metric | Value |
 |------|------|
 | Latency | {r['latency']:.2f}s |
+| Tool Turns / Calls | {r['tool_turns']} / {r['tool_call_count']} |
+| Tokens (in / out) | {r['input_tokens']} / {r['output_tokens']} |
 | Correctness | {r['correctness_score']:.2f} |
 | Trajectory Match | {'✅' if r['trajectory_match'] else '❌'} |
 | Relevance | {r['relevance_score']:.2f} |
@@ -206,7 +252,7 @@ TEST_DATA = [
     {
         "input": "How does Presidio's PTO carryover policy compare to industry standards in the U.S. and globally?",
         "expected_answer": "Presidio's PTO carryover policy aligns with common U.S. industry practices by allowing limited carryover, while globally PTO policies vary by country and regulation.",
-        "expected_tool_calls": ["tavily_search"],
+        "expected_tool_calls": ["rag_search", "tavily_search"],
     },
     {
         "input": "What is the disciplinary process if an employee repeatedly violates company policy for 3rd time?",
@@ -217,19 +263,41 @@ TEST_DATA = [
         "input": "What is Presidio's Equal Employment Opportunity (EEO) policy, and how can employees report discrimination?",
         "expected_answer": "All recruitment decisions are based solely on qualifications, skills, and cultural alignment.",
         "expected_tool_calls": ["rag_search"],
-    }
+    },
+    {
+        "input": "How does Presidio's remote work policy compare with current industry trends for hybrid work?",
+        "expected_answer": "Presidio's remote work policy compared with hybrid work trends reported across the industry ...",
+        "expected_tool_calls": ["rag_search", "tavily_search"],
+    },
+    {
+        "input": "What does Presidio's leave policy say about medical leave, and what hospitalization does our insurance cover?",
+        "expected_answer": "Medical leave per the HR policy, and hospitalization coverage per the insurance documents ...",
+        "expected_tool_calls": ["rag_search", "doc_search"],
+    },
 ]
 
 
 
+def sum_token_usage(usage_by_model):
+    """Total input/output tokens across every model called during a run."""
+    input_tokens = sum(u.get("input_tokens", 0) for u in usage_by_model.values())
+    output_tokens = sum(u.get("output_tokens", 0) for u in usage_by_model.values())
+    return input_tokens, output_tokens
+
+
 async def run_and_evaluate(test_case):
     start_time = time.time()
 
-    result = await agent.ainvoke(
-        {"messages": [("user", test_case["input"])]}
-    )
+    # Counts every LLM call in the run, including the one nested inside rag_search
+    with get_usage_metadata_callback() as usage_cb:
+        # A fresh thread per case, so cases do not share session memory
+        result = await agent.ainvoke(
+            {"messages": [("user", test_case["input"])]},
+            new_session_config(),
+        )
 
     latency = time.time() - start_time
+    input_tokens, output_tokens = sum_token_usage(usage_cb.usage_metadata)
 
     raw_msgs = result["messages"]
     final_ai_msgs = [m for m in raw_msgs if m.type == "ai"]
@@ -251,6 +319,7 @@ async def run_and_evaluate(test_case):
     ]
 
     requires_tool = len(test_case["expected_tool_calls"]) > 0
+    tool_call_count = sum(len(m.tool_calls) for m in tool_calls)
     tool_success = (
         not requires_tool
         or len(tool_calls) > 0
@@ -288,15 +357,14 @@ async def run_and_evaluate(test_case):
         print(f"Expected tools: {test_case['expected_tool_calls']}")
         print(f"Actual tool names: {actual_tool_names}")
         
-        # Check if expected tools match actual tools (flexible matching)
-        trajectory_match_score = False
-        for expected_tool in test_case['expected_tool_calls']:
-            for actual_tool in actual_tool_names:
-                if expected_tool.lower() in actual_tool.lower() or actual_tool.lower() in expected_tool.lower():
-                    trajectory_match_score = True
-                    break
-            if trajectory_match_score:
-                break
+        # Every expected tool must be called (flexible name matching)
+        trajectory_match_score = all(
+            any(
+                expected_tool.lower() in actual_tool.lower() or actual_tool.lower() in expected_tool.lower()
+                for actual_tool in actual_tool_names
+            )
+            for expected_tool in test_case['expected_tool_calls']
+        )
                 
         trajectory_match_result = {
             "score": trajectory_match_score,
@@ -336,8 +404,14 @@ async def run_and_evaluate(test_case):
         "trajectory_match_reasoning": trajectory_match_result.get("reasoning"),
 
         "latency": latency,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
         "requires_tool": requires_tool,
         "tool_success": tool_success,
+        "multi_tool": len(test_case["expected_tool_calls"]) > 1,
+        # Model turns that requested tools; same-turn calls make this 1 for multi-tool cases
+        "tool_turns": len(tool_calls),
+        "tool_call_count": tool_call_count,
 
         "hallucination": hallucination,
         "is_refusal_case": "don't have" in final_answer.lower(),
@@ -346,9 +420,9 @@ async def run_and_evaluate(test_case):
 
 
 
-async def main():
+async def run_suite(cases=TEST_DATA):
     results = []
-    for case in TEST_DATA:
+    for case in cases:
         res = await run_and_evaluate(case)
         results.append(res)
 
@@ -358,7 +432,127 @@ async def main():
         r["final_score"] = final_score
         r["suggestions"] = suggestions
 
-    metrics = compute_metrics(results)
+    return results, compute_metrics(results)
+
+
+def generate_rag_mode_comparison(runs):
+    """Markdown table comparing latency and tokens of each rag_search mode."""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    report = f"""# rag_search Mode Comparison
+
+**Generated:** {timestamp}  
+**Modes:** `generate` (RAG chain answers, agent re-answers) vs `context` (raw excerpts, single generation)
+
+| Mode | Pass Rate | Avg Latency | Avg Input Tokens | Avg Output Tokens | RAG Skip Rate |
+|------|------|------|------|------|------|
+"""
+    for mode, (_, metrics) in runs.items():
+        report += (
+            f"| {mode} | {metrics['overall_pass_rate']:.1%} | {metrics['avg_latency']:.2f}s "
+            f"| {metrics['avg_input_tokens']:.0f} | {metrics['avg_output_tokens']:.0f} "
+            f"| {metrics['rag']['skip_rate']:.1%} |\n"
+        )
+
+    report += """
+## Per Test Case
+
+| Query | Mode | Latency | Tokens (in / out) | Judge |
+|------|------|------|------|------|
+"""
+    for i, case in enumerate(TEST_DATA):
+        for mode, (results, _) in runs.items():
+            r = results[i]
+            report += (
+                f"| {case['input'][:60]} | {mode} | {r['latency']:.2f}s "
+                f"| {r['input_tokens']} / {r['output_tokens']} | {'✅' if r['eval_score'] else '❌'} |\n"
+            )
+
+    return report
+
+
+async def compare_rag_modes():
+    runs = {}
+    original_mode = rag_tool.RAG_TOOL_MODE
+    try:
+        for mode in ("generate", "context"):
+            rag_tool.RAG_TOOL_MODE = mode
+            # RAG, safety and tool metrics per mode
+            reset_metrics()
+            runs[mode] = await run_suite()
+    finally:
+        rag_tool.RAG_TOOL_MODE = original_mode
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    md_path = f"rag_mode_comparison_{timestamp}.md"
+    with open(md_path, "w") as f:
+        f.write(generate_rag_mode_comparison(runs))
+
+    print(f"📄 rag_search mode comparison saved: {md_path}")
+    return runs
+
+
+def generate_tool_mode_comparison(runs, cases):
+    """Markdown table comparing multi-tool latency with parallel tool calls on and off."""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    report = f"""# Parallel Tool Calls Comparison
+
+**Generated:** {timestamp}  
+**Modes:** `on` (same-turn tool calls run concurrently) vs `off` (one tool at a time, no same-turn prompt rule)  
+**Cases:** {len(cases)} multi-tool test cases
+
+| Mode | Pass Rate | Avg Latency | Avg Tool Turns | Tool Calls per Turn | Tool Timeouts |
+|------|------|------|------|------|------|
+"""
+    for mode, (_, metrics) in runs.items():
+        report += (
+            f"| {mode} | {metrics['overall_pass_rate']:.1%} | {metrics['avg_latency']:.2f}s "
+            f"| {metrics['multi_tool_avg_tool_turns']:.1f} | {metrics['tools']['calls_per_turn']:.2f} "
+            f"| {sum(metrics['tools']['timeouts'].values())} |\n"
+        )
+
+    report += """
+## Per Test Case
+
+| Query | Mode | Latency | Tool Turns / Calls | Judge |
+|------|------|------|------|------|
+"""
+    for i, case in enumerate(cases):
+        for mode, (results, _) in runs.items():
+            r = results[i]
+            report += (
+                f"| {case['input'][:60]} | {mode} | {r['latency']:.2f}s "
+                f"| {r['tool_turns']} / {r['tool_call_count']} | {'✅' if r['eval_score'] else '❌'} |\n"
+            )
+
+    return report
+
+
+async def compare_tool_modes():
+    cases = [case for case in TEST_DATA if len(case["expected_tool_calls"]) > 1]
+    runs = {}
+    original_mode = parallel_tools.PARALLEL_TOOL_CALLS
+    try:
+        for mode in ("off", "on"):
+            parallel_tools.PARALLEL_TOOL_CALLS = mode
+            # Tool metrics per mode
+            reset_metrics()
+            runs[mode] = await run_suite(cases)
+    finally:
+        parallel_tools.PARALLEL_TOOL_CALLS = original_mode
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    md_path = f"tool_mode_comparison_{timestamp}.md"
+    with open(md_path, "w") as f:
+        f.write(generate_tool_mode_comparison(runs, cases))
+
+    print(f"📄 Parallel tool calls comparison saved: {md_path}")
+    return runs
+
+
+async def main():
+    results, metrics = await run_suite()
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
@@ -388,4 +582,23 @@ async def main():
     return results
 
 # run
-results = asyncio.run(main())
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate the Presidio agent")
+    parser.add_argument(
+        "--compare-rag-modes",
+        action="store_true",
+        help="Run the test set with rag_search in 'generate' and 'context' mode and compare latency/tokens",
+    )
+    parser.add_argument(
+        "--compare-tool-modes",
+        action="store_true",
+        help="Run the multi-tool test cases with parallel tool calls on and off and compare latency",
+    )
+    args = parser.parse_args()
+
+    if args.compare_rag_modes:
+        asyncio.run(compare_rag_modes())
+    elif args.compare_tool_modes:
+        asyncio.run(compare_tool_modes())
+    else:
+        results = asyncio.run(main())
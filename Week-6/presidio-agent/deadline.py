@@ -0,0 +1,222 @@
+"""
+Per-request deadline for the Presidio agent.
+
+``DeadlineMiddleware`` stamps each agent run with an absolute deadline
+(``REQUEST_DEADLINE_SECONDS`` from the start of the run, or the caller's
+``deadline_scope``) and bounds every model and tool call by the time left.
+A call still running at the deadline is cancelled: a tool answers with a
+timeout message and the model is replaced by a partial answer built from
+the tool results gathered so far, which ends the run.
+
+Tools that accept a ``timeout_seconds`` argument (the MCP ``doc_search``
+tool) also get the time left passed in, so work in another process can
+stop early too.
+"""
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from typing import Annotated, Any, Optional
+
+from langchain.agents.middleware import AgentMiddleware, AgentState
+from langchain.agents.middleware.types import PrivateStateAttr
+from langchain_core.messages import AIMessage, ToolMessage
+from langgraph.channels.untracked_value import UntrackedValue
+from langgraph.runtime import Runtime
+from typing_extensions import NotRequired
+
+import metrics
+
+# End-to-end budget for one agent run, in seconds (0 disables deadlines)
+REQUEST_DEADLINE_SECONDS = float(os.environ.get("REQUEST_DEADLINE_SECONDS", "60"))
+
+TIMEOUT_MESSAGE = "I couldn't finish answering within the time limit. Please try again or narrow the question."
+PARTIAL_PREFIX = "I ran out of time before finishing. Here is what I found so far:"
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="deadline")
+_current = contextvars.ContextVar("request_deadline", default=None)
+# Recently missed deadlines, so a run is counted once however many calls miss
+_missed = deque(maxlen=1024)
+_missed_lock = threading.Lock()
+
+
+def new_deadline(budget: float = None) -> Optional[float]:
+    """Absolute ``time.monotonic()`` deadline ``budget`` seconds from now, or None if disabled."""
+    budget = REQUEST_DEADLINE_SECONDS if budget is None else budget
+    if budget <= 0:
+        return None
+    metrics.increment("deadline.requests")
+    return time.monotonic() + budget
+
+
+def current_deadline() -> Optional[float]:
+    return _current.get()
+
+
+def remaining(deadline: float = None) -> Optional[float]:
+    """Seconds left before ``deadline`` (default: the current scope's), or None without one."""
+    deadline = current_deadline() if deadline is None else deadline
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[float]):
+    """Make ``deadline`` the current deadline; None keeps the enclosing one."""
+    if deadline is None:
+        yield
+        return
+    token = _current.set(deadline)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def record_miss(stage: str, deadline: float = None):
+    """Count a miss for ``stage``, and for the run the first time its deadline is missed."""
+    metrics.increment(f"deadline.missed.{stage}")
+    deadline = current_deadline() if deadline is None else deadline
+    with _missed_lock:
+        if deadline in _missed:
+            return
+        _missed.append(deadline)
+    metrics.increment("deadline.missed")
+
+
+def partial_answer(messages) -> str:
+    """
+    Best answer available from an interrupted run: the tool results gathered
+    so far, or a timeout notice when there are none.
+    """
+    findings = [
+        msg.content for msg in messages or []
+        if getattr(msg, "type", None) == "tool" and getattr(msg, "status", "success") == "success"
+        and isinstance(msg.content, str) and msg.content.strip()
+    ]
+    if findings:
+        return PARTIAL_PREFIX + "\n\n" + "\n\n".join(findings)
+    return TIMEOUT_MESSAGE
+
+
+def get_deadline_report() -> dict:
+    """Runs with a deadline, overall miss rate and misses per stage (model or tool name)."""
+    counters = metrics.snapshot()["counters"]
+    prefix = "deadline.missed."
+    return {
+        "requests": counters.get("deadline.requests", 0),
+        "miss_rate": metrics.ratio("deadline.missed", "deadline.requests"),
+        "missed_by_stage": {
+            name[len(prefix):]: count for name, count in counters.items() if name.startswith(prefix)
+        },
+    }
+
+
+class DeadlineState(AgentState):
+    # Per run only: never checkpointed, so each turn gets a fresh budget
+    deadline: NotRequired[Annotated[Optional[float], UntrackedValue, PrivateStateAttr]]
+
+
+class DeadlineMiddleware(AgentMiddleware):
+    """Bound every model and tool call of an agent run by one request deadline."""
+
+    state_schema = DeadlineState
+
+    def __init__(self, budget: float = None):
+        super().__init__()
+        self.budget = budget
+
+    def before_agent(self, state, runtime: Runtime) -> dict[str, Any] | None:
+        return {"deadline": current_deadline() or new_deadline(self.budget)}
+
+    async def abefore_agent(self, state, runtime: Runtime) -> dict[str, Any] | None:
+        return self.before_agent(state, runtime)
+
+    # Model calls: on timeout the partial answer becomes the final AI message
+
+    def _model_timeout(self, request, deadline) -> AIMessage:
+        record_miss("model", deadline)
+        return AIMessage(content=partial_answer(request.messages))
+
+    def wrap_model_call(self, request, handler):
+        deadline = request.state.get("deadline")
+        left = remaining(deadline)
+        if left is None:
+            return handler(request)
+        if left <= 0:
+            return self._model_timeout(request, deadline)
+        # Python threads cannot be interrupted; a late reply is dropped
+        future = _executor.submit(contextvars.copy_context().run, handler, request)
+        try:
+            return future.result(timeout=left)
+        except FutureTimeout:
+            return self._model_timeout(request, deadline)
+
+    async def awrap_model_call(self, request, handler):
+        deadline = request.state.get("deadline")
+        left = remaining(deadline)
+        if left is None:
+            return await handler(request)
+        if left <= 0:
+            return self._model_timeout(request, deadline)
+        try:
+            return await asyncio.wait_for(handler(request), timeout=left)
+        except asyncio.TimeoutError:
+            return self._model_timeout(request, deadline)
+
+    # Tool calls: on timeout the tool answers with an error message
+
+    def _tool_timeout(self, request, deadline) -> ToolMessage:
+        name = request.tool_call["name"]
+        record_miss(name, deadline)
+        return ToolMessage(
+            content=f"{name} did not finish before the request deadline.",
+            tool_call_id=request.tool_call["id"],
+            name=name,
+            status="error",
+        )
+
+    def _with_time_left(self, request, left: float):
+        """Pass the time left to tools that take a ``timeout_seconds`` argument."""
+        if request.tool is None or "timeout_seconds" not in request.tool.args:
+            return request
+        args = {**request.tool_call["args"], "timeout_seconds": left}
+        return request.override(tool_call={**request.tool_call, "args": args})
+
+    def wrap_tool_call(self, request, handler):
+        deadline = request.state.get("deadline")
+        left = remaining(deadline)
+        if left is None:
+            return handler(request)
+        if left <= 0:
+            return self._tool_timeout(request, deadline)
+        request = self._with_time_left(request, left)
+
+        def run():
+            with deadline_scope(deadline):
+                return handler(request)
+
+        future = _executor.submit(contextvars.copy_context().run, run)
+        try:
+            return future.result(timeout=left)
+        except FutureTimeout:
+            return self._tool_timeout(request, deadline)
+
+    async def awrap_tool_call(self, request, handler):
+        deadline = request.state.get("deadline")
+        left = remaining(deadline)
+        if left is None:
+            return await handler(request)
+        if left <= 0:
+            return self._tool_timeout(request, deadline)
+        request = self._with_time_left(request, left)
+        try:
+            with deadline_scope(deadline):
+                return await asyncio.wait_for(handler(request), timeout=left)
+        except asyncio.TimeoutError:
+            return self._tool_timeout(request, deadline)
@@ -2,36 +2,124 @@ from typing import Any
 from langchain.agents.middleware import before_agent, AgentState
 from langgraph.runtime import Runtime
 from langchain.agents.middleware import after_agent
-from langchain.messages import AIMessage
+from langchain.messages import AIMessage, HumanMessage
 from langchain.chat_models import init_chat_model
+from langgraph.config import get_config
 from dotenv import load_dotenv
+import os
+import threading
+from collections import OrderedDict
+import metrics
+from keyword_matcher import KeywordRegistry
+import safety_scorer
+from safety_scorer import is_clearly_safe, verdict_cache
 load_dotenv()
 
 banned_keywords = ["hack", "exploit", "malware"]
 
+# Term files: default.txt for everyone plus <tenant_id>.txt per tenant
+BANNED_TERMS_DIR = os.environ.get(
+    "BANNED_TERMS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "guardrail_terms")
+)
+keyword_registry = KeywordRegistry(BANNED_TERMS_DIR, defaults=banned_keywords)
+
+BLOCKED_MESSAGE = "Sorry, I cannot process requests containing inappropriate content."
+UNSAFE_MESSAGE = "Sorry, I cannot provide that response."
+# Stands in for a blocked request in the session's history
+BLOCKED_REQUEST = "[Request removed by the content filter]"
+
+# Sessions whose content filter scan offset is remembered
+SCAN_OFFSET_SESSIONS = int(os.environ.get("GUARDRAIL_SCAN_SESSIONS", "10000"))
+
+
+def _configurable(key: str) -> Any:
+    """A value from the run config's ``configurable`` section, if any."""
+    try:
+        return get_config().get("configurable", {}).get(key)
+    except RuntimeError:
+        # Called outside a runnable (e.g. directly from tests)
+        return None
+
+
+def _tenant_id() -> str | None:
+    """Tenant from the run config (``configurable.tenant_id``), if any."""
+    return _configurable("tenant_id")
+
+
+class SessionScanOffsets:
+    """
+    Id of the last message the content filter has seen, per session
+    (``thread_id``), so each turn only scans messages added since. Bounded
+    LRU: an evicted session has its history scanned once more on its next
+    turn.
+    """
+
+    def __init__(self, max_sessions: int = SCAN_OFFSET_SESSIONS):
+        self.max_sessions = max_sessions
+        self._offsets: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def first_unscanned(self, session: str | None, messages: list) -> int:
+        """Index of the first message not yet scanned for ``session``."""
+        if session is None:
+            return 0
+        with self._lock:
+            last_id = self._offsets.get(session)
+        if last_id is not None:
+            # Walk back from the end, so the cost is the number of new messages
+            for i in range(len(messages) - 1, -1, -1):
+                if messages[i].id == last_id:
+                    return i + 1
+        return 0
+
+    def mark(self, session: str | None, message_id: str | None):
+        if session is None or message_id is None:
+            return
+        with self._lock:
+            self._offsets[session] = message_id
+            self._offsets.move_to_end(session)
+            while len(self._offsets) > self.max_sessions:
+                self._offsets.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._offsets.clear()
+
+
+scan_offsets = SessionScanOffsets()
+
+
 def _content_filter_logic(state: AgentState, runtime: Runtime) -> dict[str, Any] | None:
     """Deterministic guardrail logic: Block requests containing banned keywords."""
-    # Get the first user message
-    if not state["messages"]:
+    messages = state["messages"]
+    if not messages:
         return None
 
-    first_message = state["messages"][0]
-    if first_message.type != "human":
+    # Only human messages added since this session's last turn are scanned
+    session = _configurable("thread_id")
+    new_human = [m for m in messages[scan_offsets.first_unscanned(session, messages):] if m.type == "human"]
+    # Advance even when blocking, so a blocked message does not block later turns
+    scan_offsets.mark(session, messages[-1].id)
+    if not new_human:
         return None
 
-    content = first_message.content.lower()
+    # One pass over each message for the tenant's whole term list, on word boundaries
+    metrics.increment("guardrail.content_filter.messages", len(new_human))
+    with metrics.timer("guardrail.content_filter"):
+        matcher = keyword_registry.matcher(_tenant_id())
+        blocked = [m for m in new_human if matcher.search(m.text) is not None]
 
-    # Check for banned keywords
-    for keyword in banned_keywords:
-        if keyword in content:
-            # Block execution before any processing
-            return {
-                "messages": [{
-                    "role": "assistant",
-                    "content": "Sorry, I cannot process requests containing inappropriate content."
-                }],
-                "jump_to": "end"
-            }
+    if blocked:
+        metrics.increment("guardrail.content_filter.blocked")
+        # Block execution before any processing. The same ids replace the blocked
+        # requests, so later turns (scanned from the offset) never send them to the model
+        return {
+            "messages": [{
+                "role": "assistant",
+                "content": BLOCKED_MESSAGE
+            }] + [HumanMessage(content=BLOCKED_REQUEST, id=m.id) for m in blocked if m.id is not None],
+            "jump_to": "end"
+        }
 
     return None
 
@@ -44,8 +132,41 @@ def content_filter(state: AgentState, runtime: Runtime) -> dict[str, Any] | None
 # Use the same Bedrock model for consistency
 safety_model = init_chat_model("gpt-4o-mini")
 
+def _llm_safety_verdict(content: str) -> str:
+    """Ask the safety model; returns "SAFE" or "UNSAFE"."""
+    safety_prompt = f"""Evaluate if this response is safe and appropriate.
+    Respond with only 'SAFE' or 'UNSAFE'.
+
+    Response: {content}"""
+
+    with metrics.timer("safety.latency.llm"):
+        result = safety_model.invoke([{"role": "user", "content": safety_prompt}])
+    return "UNSAFE" if "UNSAFE" in result.content else "SAFE"
+
+
+def _judge_response(content: str) -> str:
+    """
+    Tiered verdict: cached verdict by hash, then the local rule scorer for
+    clearly safe responses, then the LLM judge for everything uncertain.
+    """
+    verdict = verdict_cache.get(content)
+    if verdict is not None:
+        metrics.increment("safety.tier.cache")
+        return verdict
+
+    if safety_scorer.SAFETY_TIERING == "on" and is_clearly_safe(content):
+        metrics.increment("safety.tier.local")
+        verdict = "SAFE"
+    else:
+        metrics.increment("safety.tier.llm")
+        verdict = _llm_safety_verdict(content)
+
+    verdict_cache.put(content, verdict)
+    return verdict
+
+
 def _safety_guardrail_logic(state: AgentState, runtime: Runtime) -> dict[str, Any] | None:
-    """Model-based guardrail logic: Use an LLM to evaluate response safety."""
+    """Model-based guardrail logic: Use an LLM to evaluate response safety, after a local pre-check."""
     # Get the final AI response
     if not state["messages"]:
         return None
@@ -54,20 +175,23 @@ def _safety_guardrail_logic(state: AgentState, runtime: Runtime) -> dict[str, An
     if not isinstance(last_message, AIMessage):
         return None
 
-    # Use a model to evaluate safety
-    safety_prompt = f"""Evaluate if this response is safe and appropriate.
-    Respond with only 'SAFE' or 'UNSAFE'.
-
-    Response: {last_message.content}"""
+    # Streamed runs were already checked chunk by chunk (streaming_guardrail.py)
+    if _configurable("safety_streamed"):
+        return None
 
-    result = safety_model.invoke([{"role": "user", "content": safety_prompt}])
+    # Only responses the local scorer cannot clear reach the safety model
+    with metrics.timer("safety.latency"):
+        verdict = _judge_response(last_message.text)
 
-    if "UNSAFE" in result.content:
-        # Properly stop execution and return safe response
+    if verdict == "UNSAFE":
+        metrics.increment("safety.unsafe")
+        # Properly stop execution and return safe response; the same id replaces
+        # the unsafe message, so it does not stay in the session's history
         return {
             "messages": state["messages"][:-1] + [{
-                "role": "assistant", 
-                "content": "Sorry, I cannot provide that response."
+                "role": "assistant",
+                "content": UNSAFE_MESSAGE,
+                "id": last_message.id
             }],
             "jump_to": "end"
         }
@@ -0,0 +1,140 @@
+"""
+Compiled keyword matching for the content filter.
+
+``KeywordMatcher`` builds a trie of the banned terms (the goto structure of
+an Aho-Corasick automaton) and compiles it into a single regular
+expression. Sibling branches start with distinct characters, so each input
+position follows at most one trie path. The whole term list is checked in
+one pass of the C regex engine instead of one substring scan per term. A
+match only counts on word boundaries, optionally followed by a common
+inflection. So "exploits" and "hacking" are caught, but "exploitation" and
+"hackathon" are not.
+
+``KeywordRegistry`` keeps one matcher per tenant, built from the default
+term list plus the tenant's own file, and rebuilds it when a term file
+changes on disk.
+"""
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Suffixes a term may carry and still match ("exploit" -> "exploits", "hacking")
+INFLECTIONS = ("ers", "er", "ing", "ed", "es", "s")
+
+# Seconds between checks of the term files for changes
+RELOAD_INTERVAL_SECONDS = float(os.environ.get("BANNED_TERMS_RELOAD_SECONDS", "5"))
+
+DEFAULT_TENANT = "default"
+
+_END = ""
+
+
+def normalize(text: str) -> str:
+    """Lowercase and collapse whitespace so multi-word terms match across spacing."""
+    return re.sub(r"\s+", " ", text.lower())
+
+
+def _trie_pattern(node: dict) -> str:
+    """Regex for a trie node: one branch per next character, optional where a term ends."""
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch != _END]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    return f"(?:{body})?" if _END in node else body
+
+
+class KeywordMatcher:
+    """All banned terms compiled into one word-boundary-aware trie regex."""
+
+    def __init__(self, terms: Iterable[str]):
+        self.terms = sorted({normalize(t).strip() for t in terms if t and t.strip()})
+        trie: dict = {}
+        for term in self.terms:
+            node = trie
+            for ch in term:
+                node = node.setdefault(ch, {})
+            node[_END] = True
+
+        suffixes = "|".join(INFLECTIONS)
+        self._pattern = re.compile(rf"(?<!\w)({_trie_pattern(trie)})(?:{suffixes})?(?!\w)") if self.terms else None
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        """``(start, end, term)`` for every match in the normalized ``text``."""
+        if self._pattern is None:
+            return []
+        return [(m.start(), m.end(), m.group(1)) for m in self._pattern.finditer(normalize(text))]
+
+    def search(self, text: str) -> Optional[str]:
+        """The first banned term found in ``text``, or None."""
+        if self._pattern is None:
+            return None
+        match = self._pattern.search(normalize(text))
+        return match.group(1) if match else None
+
+
+def load_terms(path: str) -> List[str]:
+    """One term per line; blank lines and ``#`` comments are ignored."""
+    with open(path, encoding="utf-8") as f:
+        return [line.split("#", 1)[0].strip() for line in f if line.split("#", 1)[0].strip()]
+
+
+class KeywordRegistry:
+    """
+    Per-tenant matchers over ``<directory>/default.txt`` plus
+    ``<directory>/<tenant>.txt``, rebuilt when either file changes.
+    ``defaults`` are always included, so the filter works without files.
+    """
+
+    def __init__(self, directory: str, defaults: Iterable[str] = (),
+                 reload_interval: float = RELOAD_INTERVAL_SECONDS):
+        self.directory = directory
+        self.defaults = list(defaults)
+        self.reload_interval = reload_interval
+        # tenant -> (file mtimes, matcher, last checked)
+        self._matchers: Dict[str, Tuple[tuple, KeywordMatcher, float]] = {}
+        self._lock = threading.Lock()
+
+    def _paths(self, tenant: str) -> List[str]:
+        names = [DEFAULT_TENANT] if tenant == DEFAULT_TENANT else [DEFAULT_TENANT, tenant]
+        return [os.path.join(self.directory, f"{name}.txt") for name in names]
+
+    @staticmethod
+    def _mtimes(paths: List[str]) -> tuple:
+        return tuple(os.path.getmtime(p) if os.path.exists(p) else None for p in paths)
+
+    def _build(self, paths: List[str]) -> KeywordMatcher:
+        terms = list(self.defaults)
+        for path in paths:
+            if os.path.exists(path):
+                terms.extend(load_terms(path))
+        return KeywordMatcher(terms)
+
+    def matcher(self, tenant: str = None) -> KeywordMatcher:
+        """The tenant's matcher, rebuilt if its term files changed since the last check."""
+        tenant = re.sub(r"[^A-Za-z0-9_-]", "", tenant or DEFAULT_TENANT) or DEFAULT_TENANT
+        now = time.monotonic()
+        entry = self._matchers.get(tenant)
+        if entry is not None and now - entry[2] < self.reload_interval:
+            return entry[1]
+
+        paths = self._paths(tenant)
+        mtimes = self._mtimes(paths)
+        with self._lock:
+            entry = self._matchers.get(tenant)
+            if entry is None or entry[0] != mtimes:
+                entry = (mtimes, self._build(paths), now)
+            else:
+                entry = (entry[0], entry[1], now)
+            # Readers keep using the old matcher until this swap
+            self._matchers[tenant] = entry
+        return entry[1]
+
+    def reload(self):
+        """Drop all compiled matchers so the next lookup reads the files again."""
+        with self._lock:
+            self._matchers.clear()
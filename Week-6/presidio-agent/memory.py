@@ -0,0 +1,109 @@
+"""
+Bounded multi-turn session memory for the Presidio agent.
+
+Conversation state lives in a LangGraph checkpointer keyed by ``thread_id``,
+so each turn only sends the new user message. Two limits keep memory and
+prompt size bounded however many users are active:
+
+- ``BoundedInMemorySaver`` evicts whole sessions: the least recently used
+  once there are more than ``MEMORY_MAX_SESSIONS``, and any idle for
+  ``MEMORY_SESSION_TTL_SECONDS``.
+- ``memory_middleware`` summarizes old turns once a thread's history passes
+  ``MEMORY_MAX_TOKENS``, keeping the most recent ``MEMORY_KEEP_TOKENS``
+  verbatim. Earlier summaries are folded into the next one.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import List, Optional
+
+from langchain.agents.middleware import SummarizationMiddleware
+from langgraph.checkpoint.memory import InMemorySaver
+
+import metrics
+
+# Sessions kept in memory; the least recently used are dropped first
+MEMORY_MAX_SESSIONS = int(os.environ.get("MEMORY_MAX_SESSIONS", "1000"))
+# Sessions idle for longer than this are dropped (0 disables)
+MEMORY_SESSION_TTL_SECONDS = float(os.environ.get("MEMORY_SESSION_TTL_SECONDS", "1800"))
+# History size that triggers summarization, and how much recent history stays verbatim
+MEMORY_MAX_TOKENS = int(os.environ.get("MEMORY_MAX_TOKENS", "6000"))
+MEMORY_KEEP_TOKENS = int(os.environ.get("MEMORY_KEEP_TOKENS", "2000"))
+
+
+def new_session_config(thread_id: str = None, **configurable) -> dict:
+    """Run config for one conversation; a fresh ``thread_id`` starts a new one."""
+    return {"configurable": {"thread_id": thread_id or str(uuid.uuid4()), **configurable}}
+
+
+class BoundedInMemorySaver(InMemorySaver):
+    """``InMemorySaver`` that drops idle and least recently used threads."""
+
+    def __init__(self, max_sessions: int = MEMORY_MAX_SESSIONS,
+                 ttl_seconds: float = MEMORY_SESSION_TTL_SECONDS):
+        super().__init__()
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        # thread_id -> last use, oldest first
+        self._last_used: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _touch(self, config, create: bool = True) -> None:
+        thread_id = config.get("configurable", {}).get("thread_id")
+        if thread_id is None:
+            return
+        now = time.monotonic()
+        evicted: List[str] = []
+        with self._lock:
+            if not create and thread_id not in self._last_used:
+                # Lookups of unknown threads do not create sessions
+                return
+            self._last_used[thread_id] = now
+            self._last_used.move_to_end(thread_id)
+            # Oldest first, so stop at the first session that is still fresh and within the limit
+            while self._last_used:
+                oldest, last_used = next(iter(self._last_used.items()))
+                expired = self.ttl_seconds > 0 and now - last_used > self.ttl_seconds
+                if oldest == thread_id or not (expired or len(self._last_used) > self.max_sessions):
+                    break
+                self._last_used.popitem(last=False)
+                evicted.append(oldest)
+        for old in evicted:
+            metrics.increment("memory.sessions.evicted")
+            super().delete_thread(old)
+
+    def session_count(self) -> int:
+        with self._lock:
+            return len(self._last_used)
+
+    def get_tuple(self, config):
+        self._touch(config, create=False)
+        return super().get_tuple(config)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        self._touch(config)
+        return super().put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        self._touch(config)
+        return super().put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._last_used.pop(thread_id, None)
+        super().delete_thread(thread_id)
+
+
+checkpointer = BoundedInMemorySaver()
+
+
+def memory_middleware(model, max_tokens: Optional[int] = None,
+                      keep_tokens: Optional[int] = None) -> SummarizationMiddleware:
+    """Rolling summary of old turns once history passes ``max_tokens``."""
+    return SummarizationMiddleware(
+        model,
+        trigger=("tokens", max_tokens or MEMORY_MAX_TOKENS),
+        keep=("tokens", keep_tokens or MEMORY_KEEP_TOKENS),
+    )
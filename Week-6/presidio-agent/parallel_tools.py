@@ -0,0 +1,191 @@
+"""
+Same-turn tool calls and per-tool timeouts for the Presidio agent.
+
+The agent runs every tool call of one model turn concurrently, so a
+comparative question ("how does our PTO policy compare to industry?") costs
+one round of tools instead of one model turn per tool. ``ParallelToolsMiddleware``:
+
+- adds ``PARALLEL_TOOLS_RULE`` to the system prompt, asking the model to
+  request all independent lookups in the same turn;
+- bounds each tool call by its own timeout (``TOOL_TIMEOUTS``, else
+  ``TOOL_TIMEOUT_SECONDS``), so one slow source does not hold up the others.
+  A timed-out tool answers with an error message and the model works with
+  the rest;
+- records tool calls per model turn and per-tool latency for
+  ``get_tool_report``.
+
+``PARALLEL_TOOL_CALLS=off`` drops the prompt rule and runs tool calls one at
+a time, the previous behaviour, for comparison in ``app_evaluator.py``.
+"""
+import asyncio
+import contextvars
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Dict, Optional
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import AIMessage, SystemMessage, ToolMessage
+from langgraph.runtime import Runtime
+
+import metrics
+
+# "on": same-turn tool calls run concurrently; "off": one at a time, no prompt rule.
+# Read at call time so the evaluator can switch it.
+PARALLEL_TOOL_CALLS = os.environ.get("PARALLEL_TOOL_CALLS", "on").lower()
+
+# Seconds a tool call may take before it is abandoned (0 disables)
+TOOL_TIMEOUT_SECONDS = float(os.environ.get("TOOL_TIMEOUT_SECONDS", "30"))
+
+
+def _parse_timeouts(value: str) -> Dict[str, float]:
+    """``"rag_search=20,tavily_search=15"`` -> ``{"rag_search": 20.0, "tavily_search": 15.0}``"""
+    timeouts = {}
+    for item in value.split(","):
+        name, _, seconds = item.partition("=")
+        if name.strip() and seconds.strip():
+            timeouts[name.strip()] = float(seconds)
+    return timeouts
+
+
+# Per-tool overrides of TOOL_TIMEOUT_SECONDS
+TOOL_TIMEOUTS = _parse_timeouts(os.environ.get("TOOL_TIMEOUTS", ""))
+
+PARALLEL_TOOLS_RULE = """
+- When a question needs several sources (e.g. Presidio policy AND industry practice, or policy AND insurance),
+  call every tool you need in the SAME turn; they run in parallel. Only wait for a result first when
+  the next call depends on it.
+"""
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="tool-timeout")
+
+
+def parallel_enabled() -> bool:
+    return PARALLEL_TOOL_CALLS != "off"
+
+
+def get_tool_report() -> dict:
+    """Tool calls per model turn, share of turns with several calls, timeouts and p95 per tool."""
+    snapshot = metrics.snapshot()
+    counters = snapshot["counters"]
+    turns = counters.get("tools.turns", 0)
+    timeout_prefix = "tools.timeout."
+    return {
+        "tool_turns": turns,
+        "calls_per_turn": counters.get("tools.calls", 0) / turns if turns else 0.0,
+        "parallel_turn_rate": metrics.ratio("tools.parallel_turns", "tools.turns"),
+        "timeouts": {
+            name[len(timeout_prefix):]: count for name, count in counters.items() if name.startswith(timeout_prefix)
+        },
+        "p95_seconds": {
+            name[len("tools.seconds."):]: stats["p95"]
+            for name, stats in snapshot["latency"].items() if name.startswith("tools.seconds.")
+        },
+    }
+
+
+class ParallelToolsMiddleware(AgentMiddleware):
+    """Ask for same-turn tool calls and bound each call by its tool's timeout."""
+
+    def __init__(self, timeouts: Optional[Dict[str, float]] = None, default_timeout: float = None):
+        super().__init__()
+        self.timeouts = TOOL_TIMEOUTS if timeouts is None else timeouts
+        self.default_timeout = TOOL_TIMEOUT_SECONDS if default_timeout is None else default_timeout
+        # Sequential mode: one tool call at a time per event loop / across threads
+        self._async_locks = weakref.WeakKeyDictionary()
+        self._sync_lock = threading.Lock()
+
+    def timeout_for(self, name: str) -> Optional[float]:
+        seconds = self.timeouts.get(name, self.default_timeout)
+        return seconds if seconds and seconds > 0 else None
+
+    # Prompt and per-turn counts
+
+    def _with_rule(self, request):
+        if not parallel_enabled() or not request.tools:
+            return request
+        prompt = request.system_prompt or ""
+        return request.override(system_message=SystemMessage(content=prompt + PARALLEL_TOOLS_RULE))
+
+    def wrap_model_call(self, request, handler):
+        return handler(self._with_rule(request))
+
+    async def awrap_model_call(self, request, handler):
+        return await handler(self._with_rule(request))
+
+    def after_model(self, state, runtime: Runtime) -> dict[str, Any] | None:
+        last = state["messages"][-1] if state["messages"] else None
+        if isinstance(last, AIMessage) and last.tool_calls:
+            metrics.increment("tools.turns")
+            metrics.increment("tools.calls", len(last.tool_calls))
+            if len(last.tool_calls) > 1:
+                metrics.increment("tools.parallel_turns")
+        return None
+
+    async def aafter_model(self, state, runtime: Runtime) -> dict[str, Any] | None:
+        return self.after_model(state, runtime)
+
+    # Tool calls: on timeout the tool answers with an error message
+
+    def _tool_timeout(self, request, seconds: float) -> ToolMessage:
+        name = request.tool_call["name"]
+        metrics.increment(f"tools.timeout.{name}")
+        return ToolMessage(
+            content=f"{name} did not respond within {seconds:g}s; answer from the other results.",
+            tool_call_id=request.tool_call["id"],
+            name=name,
+            status="error",
+        )
+
+    def _with_timeout_arg(self, request, seconds: float):
+        """Tools with a ``timeout_seconds`` argument get the smaller of theirs and ours."""
+        if request.tool is None or "timeout_seconds" not in request.tool.args:
+            return request
+        current = request.tool_call["args"].get("timeout_seconds")
+        args = {**request.tool_call["args"], "timeout_seconds": min(current or seconds, seconds)}
+        return request.override(tool_call={**request.tool_call, "args": args})
+
+    def _call(self, request, handler):
+        name = request.tool_call["name"]
+        seconds = self.timeout_for(name)
+        if seconds is not None:
+            request = self._with_timeout_arg(request, seconds)
+
+        def run():
+            with metrics.timer(f"tools.seconds.{name}"):
+                return handler(request)
+
+        if seconds is None:
+            return run()
+        # Python threads cannot be interrupted; a late result is dropped
+        future = _executor.submit(contextvars.copy_context().run, run)
+        try:
+            return future.result(timeout=seconds)
+        except FutureTimeout:
+            return self._tool_timeout(request, seconds)
+
+    async def _acall(self, request, handler):
+        name = request.tool_call["name"]
+        seconds = self.timeout_for(name)
+        if seconds is not None:
+            request = self._with_timeout_arg(request, seconds)
+        try:
+            with metrics.timer(f"tools.seconds.{name}"):
+                return await asyncio.wait_for(handler(request), timeout=seconds)
+        except asyncio.TimeoutError:
+            return self._tool_timeout(request, seconds)
+
+    def wrap_tool_call(self, request, handler):
+        if parallel_enabled():
+            return self._call(request, handler)
+        # Waiting for the lock does not count against the tool's timeout
+        with self._sync_lock:
+            return self._call(request, handler)
+
+    async def awrap_tool_call(self, request, handler):
+        if parallel_enabled():
+            return await self._acall(request, handler)
+        lock = self._async_locks.setdefault(asyncio.get_running_loop(), asyncio.Lock())
+        async with lock:
+            return await self._acall(request, handler)
@@ -0,0 +1,296 @@
+"""
+Single-pass PII detection and redaction for the Presidio agent.
+
+``PIIScanner`` compiles every configured detector (email, phone, SSN,
+employee ID, credit card) into one alternation regex, so a message is read
+once whatever the number of PII types. Every PII value holds an "@" or a
+digit near its start. So the alternation only runs in windows around those
+characters, and plain prose is skipped by a one-character scan. The output
+is built in the same pass, instead of re-slicing the string for each match.
+Card candidates must pass the Luhn check. ``StreamingPIIRedactor`` applies a
+scanner to streamed text, holding back only what a split value could reach.
+
+``PIIScannerMiddleware`` replaces one ``PIIMiddleware`` per type. It
+remembers the id of the last message it scanned in private state, so each
+hook only reads the messages added since then, not the whole history.
+"""
+import hashlib
+import os
+import re
+from typing import Annotated, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langchain.agents.middleware import AgentMiddleware, AgentState
+from langchain.agents.middleware.types import PrivateStateAttr
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langgraph.runtime import Runtime
+from typing_extensions import NotRequired
+
+import metrics
+
+# Order matters where patterns overlap: a 16-digit card is tried before a phone number.
+# Each pattern must match at most MAX_MATCH characters, with an "@" or a digit
+# within the first MAX_PREFIX of them.
+PII_PATTERNS: Dict[str, str] = {
+    "email": r"(?<![\w.%+-])[\w.%+-]{1,64}+@(?:[A-Za-z0-9-]{1,63}\.){1,4}[A-Za-z]{2,24}",
+    "credit_card": r"(?<![\d-])\d(?:[ -]?\d){12,18}(?![\d-])",
+    "ssn": r"(?<![\d-])\d{3}-\d{2}-\d{4}(?![\d-])",
+    "phone": r"(?<![\w+])(?:\+?1[ .-]?)?(?:\(\d{3}\) ?|\d{3}[ .-]?)\d{3}[ .-]?\d{4}(?!\d)",
+    "employee_id": os.environ.get("PII_EMPLOYEE_ID_PATTERN", r"\b(?i:emp)-?\d{4,8}\b"),
+}
+
+MAX_PREFIX = 65
+MAX_MATCH = 352
+# Characters searched per window; only matches starting in the first
+# WINDOW - MAX_MATCH are kept, the rest are found by the next window
+WINDOW = 4 * MAX_MATCH
+_TRIGGER = re.compile(r"[\d@]")
+
+DEFAULT_PII_TYPES = tuple(PII_PATTERNS)
+STRATEGIES = ("redact", "mask", "hash")
+
+# "redact", "mask" or "hash"
+PII_STRATEGY = os.environ.get("PII_STRATEGY", "redact")
+
+
+def passes_luhn(number: str) -> bool:
+    digits = [int(c) for c in number if c.isdigit()]
+    checksum = 0
+    for i, digit in enumerate(reversed(digits)):
+        if i % 2:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        checksum += digit
+    return checksum % 10 == 0
+
+
+def _mask(pii_type: str, value: str) -> str:
+    """Hide all but a few characters, keeping the value recognisable in form."""
+    if pii_type == "email":
+        local, _, domain = value.partition("@")
+        return f"{local[:1]}***@****.{domain.rsplit('.', 1)[-1]}"
+    digits = "".join(c for c in value if c.isdigit())
+    if pii_type == "credit_card":
+        return f"****-****-****-{digits[-4:]}"
+    if pii_type == "ssn":
+        return f"***-**-{digits[-4:]}"
+    if pii_type == "phone":
+        return f"***-***-{digits[-4:]}"
+    return f"****{value[-2:]}" if len(value) > 4 else "****"
+
+
+class PIIScanner:
+    """All configured PII detectors compiled into one pattern, applied in one pass."""
+
+    def __init__(self, pii_types: Iterable[str] = DEFAULT_PII_TYPES, strategy: str = "redact"):
+        pii_types = list(pii_types)
+        unknown = [t for t in pii_types if t not in PII_PATTERNS]
+        if unknown:
+            raise ValueError(f"Unknown PII types: {unknown}")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown PII strategy: {strategy}")
+        self.pii_types = [t for t in PII_PATTERNS if t in pii_types]
+        self.strategy = strategy
+        self._pattern = re.compile("|".join(f"(?P<{t}>{PII_PATTERNS[t]})" for t in self.pii_types))
+
+    def _replacement(self, pii_type: str, value: str) -> str:
+        if self.strategy == "mask":
+            return _mask(pii_type, value)
+        if self.strategy == "hash":
+            return f"<{pii_type}_hash:{hashlib.sha256(value.encode()).hexdigest()[:8]}>"
+        return f"[REDACTED_{pii_type.upper()}]"
+
+    def _matches(self, text: str, pos: int = 0) -> Iterator[Tuple[int, int, str, bool]]:
+        """Every pattern match from ``pos`` on; the flag is False for card numbers failing Luhn."""
+        size = len(text)
+        while True:
+            trigger = _TRIGGER.search(text, pos)
+            if trigger is None:
+                return
+            low = max(pos, trigger.start() - MAX_PREFIX)
+            high = min(size, low + WINDOW)
+            # A match starting before this point fits inside the window, so it is not cut short
+            settled = size if high == size else high - MAX_MATCH
+            match = self._pattern.search(text, low, high)
+            if match is None or match.start() >= settled:
+                pos = settled
+                continue
+            pos = match.end()
+            pii_type = match.lastgroup
+            valid = pii_type != "credit_card" or passes_luhn(match.group())
+            yield match.start(), match.end(), pii_type, valid
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        """``(start, end, type)`` for every PII value in ``text``."""
+        return [(start, end, pii_type) for start, end, pii_type, valid in self._matches(text) if valid]
+
+    def scan(self, text: str) -> Tuple[str, List[str]]:
+        """``text`` with every PII value replaced, and the types found in order."""
+        pieces = []
+        types = []
+        last = 0
+        for start, end, pii_type in self.find_all(text):
+            pieces.append(text[last:start])
+            pieces.append(self._replacement(pii_type, text[start:end]))
+            types.append(pii_type)
+            last = end
+        if not types:
+            return text, types
+        pieces.append(text[last:])
+        return "".join(pieces), types
+
+    def scan_content(self, content: Any) -> Tuple[Any, List[str]]:
+        """Redact a message's content, keeping block lists as block lists."""
+        if isinstance(content, str):
+            return self.scan(content)
+        if not isinstance(content, list):
+            return content, []
+
+        blocks = []
+        types = []
+        for block in content:
+            text = block if isinstance(block, str) else block.get("text") if isinstance(block, dict) else None
+            if isinstance(text, str):
+                redacted, found = self.scan(text)
+                if found:
+                    block = redacted if isinstance(block, str) else {**block, "text": redacted}
+                    types.extend(found)
+            blocks.append(block)
+        return (blocks if types else content), types
+
+
+class StreamingPIIRedactor:
+    """
+    Redacts PII in a stream of text deltas, for replies shown as they are generated.
+
+    A value can be split across deltas, so ``feed`` holds back the tail that a
+    value still being written could reach into: the last ``MAX_MATCH``
+    characters, or only ``MAX_PREFIX`` when they hold no "@" or digit.
+    ``flush`` releases the rest once the stream ends.
+    """
+
+    def __init__(self, scanner: PIIScanner):
+        self.scanner = scanner
+        self.found: List[str] = []
+        # Last released character, kept for the patterns' look-behinds
+        self._context = ""
+        self._held = ""
+
+    def _release(self, final: bool) -> str:
+        text = self._context + self._held
+        skip = len(self._context)
+        size = len(text)
+        cut = size
+        if not final:
+            # No value can start before this point and still grow with later text
+            cut = size - MAX_PREFIX
+            trigger = _TRIGGER.search(text, max(skip, size - MAX_MATCH))
+            if trigger is not None:
+                cut = min(cut, max(size - MAX_MATCH, trigger.start() - MAX_PREFIX + 1))
+        if cut <= skip:
+            return ""
+
+        pieces = []
+        last = skip
+        resume = skip
+        for start, end, pii_type, valid in self.scanner._matches(text, skip):
+            if start >= cut:
+                break
+            # A rejected card number is skipped whole, as in a scan of the full text
+            resume = end
+            if not valid:
+                continue
+            pieces.append(text[last:start])
+            pieces.append(self.scanner._replacement(pii_type, text[start:end]))
+            self.found.append(pii_type)
+            last = end
+        cut = max(cut, resume)
+        pieces.append(text[last:cut])
+        self._context = text[cut - 1:cut]
+        self._held = text[cut:]
+        return "".join(pieces)
+
+    def feed(self, delta: str) -> str:
+        """Add a delta; returns the redacted text that is now safe to show."""
+        self._held += delta
+        return self._release(final=False)
+
+    def flush(self) -> str:
+        """Redacted text still held back at the end of the stream."""
+        return self._release(final=True)
+
+
+class PIIScannerState(AgentState):
+    # Id of the newest message already scanned; persisted so resumed threads stay incremental
+    pii_scanned_id: NotRequired[Annotated[Optional[str], PrivateStateAttr]]
+
+
+class PIIScannerMiddleware(AgentMiddleware):
+    """Redacts PII in new user, AI and (optionally) tool messages with one ``PIIScanner``."""
+
+    state_schema = PIIScannerState
+
+    def __init__(self, pii_types: Iterable[str] = DEFAULT_PII_TYPES, strategy: str = PII_STRATEGY,
+                 apply_to_input: bool = True, apply_to_output: bool = False,
+                 apply_to_tool_results: bool = False):
+        super().__init__()
+        self.scanner = PIIScanner(pii_types, strategy)
+        self.apply_to_input = apply_to_input
+        self.apply_to_output = apply_to_output
+        self.apply_to_tool_results = apply_to_tool_results
+
+    def _applies(self, message: BaseMessage) -> bool:
+        if isinstance(message, HumanMessage):
+            return self.apply_to_input
+        if isinstance(message, AIMessage):
+            return self.apply_to_output
+        if isinstance(message, ToolMessage):
+            return self.apply_to_tool_results
+        return False
+
+    @staticmethod
+    def _first_unscanned(messages: List[BaseMessage], scanned_id: Optional[str]) -> int:
+        if scanned_id is not None:
+            for i in range(len(messages) - 1, -1, -1):
+                if messages[i].id == scanned_id:
+                    return i + 1
+        # Unknown or rewritten history: scan everything once
+        return 0
+
+    def _scan_new(self, state) -> dict[str, Any] | None:
+        messages = state["messages"]
+        if not messages:
+            return None
+
+        scanned_id = state.get("pii_scanned_id")
+        updates = []
+        with metrics.timer("pii.scan"):
+            for message in messages[self._first_unscanned(messages, scanned_id):]:
+                if not message.content or not self._applies(message):
+                    continue
+                metrics.increment("pii.messages")
+                content, found = self.scanner.scan_content(message.content)
+                if found:
+                    for pii_type in found:
+                        metrics.increment(f"pii.found.{pii_type}")
+                    # Same id, so the redacted copy replaces the original in state
+                    updates.append(message.model_copy(update={"content": content}))
+
+        result: dict[str, Any] = {}
+        if updates:
+            result["messages"] = updates
+        if messages[-1].id != scanned_id:
+            result["pii_scanned_id"] = messages[-1].id
+        return result or None
+
+    def before_model(self, state, runtime: Runtime) -> dict[str, Any] | None:
+        return self._scan_new(state)
+
+    async def abefore_model(self, state, runtime: Runtime) -> dict[str, Any] | None:
+        return self._scan_new(state)
+
+    def after_model(self, state, runtime: Runtime) -> dict[str, Any] | None:
+        return self._scan_new(state)
+
+    async def aafter_model(self, state, runtime: Runtime) -> dict[str, Any] | None:
+        return self._scan_new(state)
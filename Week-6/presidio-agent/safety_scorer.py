@@ -0,0 +1,121 @@
+"""
+Local first tier for the response safety guardrail.
+
+``score_response`` is a weighted rule scorer over patterns that signal
+harmful content: intrusion, malware, weapons, self-harm, fraud and leaked
+credentials or personal data. Responses that trigger nothing score 0.0 and
+are cleared locally. Anything scoring ``LOCAL_SAFE_THRESHOLD`` or more is
+escalated to the LLM judge, so the scorer only needs to be good at
+recognising clearly safe answers.
+
+``VerdictCache`` remembers final verdicts by the SHA-256 of the response,
+so repeated answers (refusals, "Not found in policy documents.") skip
+both tiers.
+"""
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import metrics
+
+# "on": local scorer first, LLM only when uncertain; "off": every response goes to the LLM
+SAFETY_TIERING = os.environ.get("SAFETY_TIERING", "on").lower()
+# Responses scoring below this are cleared without the LLM judge
+LOCAL_SAFE_THRESHOLD = float(os.environ.get("SAFETY_LOCAL_THRESHOLD", "0.1"))
+SAFETY_CACHE_SIZE = int(os.environ.get("SAFETY_CACHE_SIZE", "4096"))
+
+# (category, weight, pattern); weights combine as independent probabilities
+RISK_PATTERNS: List[Tuple[str, float, re.Pattern]] = [
+    ("intrusion", 0.6, re.compile(
+        r"\b(break(ing)?|broke|get(ting)?) into\b.*\b(system|server|network|account|computer)s?\b"
+        r"|\bbypass(ing)?\b.*\b(security|authentication|login|firewall|antivirus|2fa|mfa)\b"
+        r"|\b(crack(ing)?|brute[- ]?forc(e|ing))\b.*\b(password|hash|login)s?\b"
+        r"|\b(privilege escalation|sql injection|reverse shell|keylogger|rootkit|botnet|zero[- ]day)\b")),
+    ("intrusion_terms", 0.4, re.compile(r"\b(hack(ing|er|ers|ed)?|exploit(s|ing|ed)?|malware|ransomware|phishing)\b")),
+    ("weapons", 0.6, re.compile(r"\b(bombs?|explosives?|detonat\w*|firearms?|ammunition|nerve agent|poison(ing)?)\b")),
+    ("violence", 0.4, re.compile(r"\b(kill(ing)?|murder|assault|attack(ing)? (him|her|them|someone|people))\b")),
+    ("self_harm", 0.8, re.compile(r"\b(suicide|self[- ]harm|kill (yourself|myself)|end (your|my) life)\b")),
+    ("fraud", 0.5, re.compile(r"\b(launder(ing)?|evade (taxes|tax)|tax evasion|forg(e|ed|ing) (a |the )?\w+|fake (invoice|receipt)s?|embezzl\w*)\b")),
+    ("credentials", 0.5, re.compile(r"\b(password|passcode|api[_ ]?key|secret key|access token)\s*(is|:|=)")),
+    ("personal_data", 0.5, re.compile(r"\b\d{3}-\d{2}-\d{4}\b|\b(?:\d[ -]?){13,16}\b")),
+    ("harassment", 0.3, re.compile(r"\b(idiot|stupid|worthless|inferior|disgusting)\b")),
+    # Instructional framing on its own is normal for policy answers; it only tips mixed cases
+    ("instructions", 0.05, re.compile(r"\b(here'?s how|step[- ]by[- ]step|step \d)\b")),
+]
+
+
+def score_response(text: str) -> Tuple[float, List[str]]:
+    """Risk in [0, 1] and the categories that contributed to it."""
+    content = text.lower()
+    clear = 1.0
+    reasons = []
+    for category, weight, pattern in RISK_PATTERNS:
+        if pattern.search(content):
+            clear *= 1.0 - weight
+            reasons.append(category)
+    return 1.0 - clear, reasons
+
+
+def is_clearly_safe(text: str) -> bool:
+    risk, _ = score_response(text)
+    return risk < LOCAL_SAFE_THRESHOLD
+
+
+class VerdictCache:
+    """Bounded LRU of safety verdicts keyed by the SHA-256 of the response text."""
+
+    def __init__(self, max_size: int = SAFETY_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Optional[str]:
+        key = self.key(text)
+        with self._lock:
+            verdict = self._entries.get(key)
+            if verdict is not None:
+                self._entries.move_to_end(key)
+            return verdict
+
+    def put(self, text: str, verdict: str):
+        key = self.key(text)
+        with self._lock:
+            self._entries[key] = verdict
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+verdict_cache = VerdictCache()
+
+
+def get_safety_report() -> dict:
+    """Share of turns per tier, escalation rate and p95 latency overall vs. LLM-judged turns."""
+    cached = metrics.get_count("safety.tier.cache")
+    local = metrics.get_count("safety.tier.local")
+    llm = metrics.get_count("safety.tier.llm")
+    total = cached + local + llm
+    p95 = metrics.percentile("safety.latency", 95)
+    p95_llm = metrics.percentile("safety.latency.llm", 95)
+    return {
+        "turns": total,
+        "cache_rate": cached / total if total else 0.0,
+        "local_rate": local / total if total else 0.0,
+        "escalation_rate": llm / total if total else 0.0,
+        "unsafe": metrics.get_count("safety.unsafe"),
+        "p95_seconds": p95,
+        "p95_llm_seconds": p95_llm,
+        # What every turn would cost at p95 if it went to the LLM judge
+        "p95_saved_seconds": max(0.0, p95_llm - p95),
+    }
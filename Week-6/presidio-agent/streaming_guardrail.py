@@ -0,0 +1,127 @@
+"""
+Incremental output safety checking for streamed responses.
+
+The after_agent ``safety_guardrail`` only sees a response once it is
+complete, so the user waits for generation and then for the safety call.
+``StreamingSafetyGuard`` checks the text while tokens arrive instead. Each
+delta is scored by the local rule scorer over a sliding window of the last
+``STREAM_WINDOW_CHARS`` characters, so a risky phrase split across chunks
+is still seen whole. Text that trips no risk pattern is released at once,
+so a safe response streams at generation speed.
+
+When a risk pattern completes, the response so far is sent to the tiered
+judge (``guardrails._judge_response``) in the background and output is held
+until it answers. An UNSAFE verdict stops the stream and the held text is
+never shown. Once anything has been escalated, the whole reply is judged
+again at the end of the stream, since text after a SAFE verdict was not part
+of what the judge saw; the last held text waits for that verdict.
+"""
+import asyncio
+import os
+from typing import AsyncIterator, Callable, List, Optional
+
+import guardrails
+import metrics
+from safety_scorer import LOCAL_SAFE_THRESHOLD, RISK_PATTERNS
+
+# Characters of already-streamed text re-scored with each new delta
+STREAM_WINDOW_CHARS = int(os.environ.get("SAFETY_STREAM_WINDOW_CHARS", "200"))
+
+
+class StreamingSafetyGuard:
+    """
+    Filters a stream of text deltas, yielding only text that has been cleared.
+
+    ``judge`` takes the response so far and returns "SAFE" or "UNSAFE"; it is
+    called in a worker thread only when the local scorer is uncertain.
+    """
+
+    def __init__(self, judge: Optional[Callable[[str], str]] = None,
+                 window_chars: int = STREAM_WINDOW_CHARS):
+        self.judge = judge or guardrails._judge_response
+        self.window_chars = window_chars
+        self.text = ""
+        self.blocked = False
+        self.reasons: List[str] = []
+        self._needs_judge = False
+        self._pending: Optional[asyncio.Task] = None
+        # Length of the text the judge last saw; None until something is escalated
+        self._judged_chars: Optional[int] = None
+
+    def _append(self, delta: str):
+        """Add a delta and flag the text for judging if it completes a risk pattern."""
+        start = max(0, len(self.text) - self.window_chars)
+        new_from = len(self.text) - start
+        self.text += delta
+        window = self.text[start:].lower()
+
+        clear = 1.0
+        fresh = []
+        for category, weight, pattern in RISK_PATTERNS:
+            ends = [m.end() for m in pattern.finditer(window)]
+            if not ends:
+                continue
+            clear *= 1.0 - weight
+            # Only matches ending in the new delta count, so one phrase is judged once
+            if max(ends) > new_from:
+                fresh.append(category)
+
+        if fresh and 1.0 - clear >= LOCAL_SAFE_THRESHOLD:
+            self.reasons.extend(c for c in fresh if c not in self.reasons)
+            self._needs_judge = True
+
+    def _start_judge(self):
+        metrics.increment("safety.stream.escalated")
+        self._needs_judge = False
+        self._judged_chars = len(self.text)
+        self._pending = asyncio.create_task(asyncio.to_thread(self.judge, self.text))
+
+    async def _settle(self) -> bool:
+        """Wait for the pending verdict; True if the stream must stop."""
+        verdict = await self._pending
+        self._pending = None
+        if verdict == "UNSAFE":
+            metrics.increment("safety.stream.blocked")
+            self.blocked = True
+            return True
+        if self._needs_judge:
+            # More risky text arrived while the last verdict was pending
+            self._start_judge()
+        return False
+
+    async def guard(self, deltas: AsyncIterator[str]) -> AsyncIterator[str]:
+        """Yield cleared text from ``deltas``; stops early and sets ``blocked`` on a violation."""
+        metrics.increment("safety.stream.turns")
+        held: List[str] = []
+        try:
+            async for delta in deltas:
+                if not delta:
+                    continue
+                self._append(delta)
+                held.append(delta)
+                if self._needs_judge and self._pending is None:
+                    self._start_judge()
+                if self._pending is not None and self._pending.done() and await self._settle():
+                    return
+                if self._pending is None:
+                    for piece in held:
+                        yield piece
+                    held.clear()
+
+            while self._pending is not None:
+                if await self._settle():
+                    return
+            if self._judged_chars is not None and self._judged_chars < len(self.text):
+                # The judge has not seen the reply whole; the after_agent check is off for streams
+                metrics.increment("safety.stream.final_judged")
+                self._start_judge()
+                if await self._settle():
+                    return
+            for piece in held:
+                yield piece
+        finally:
+            if self._pending is not None:
+                self._pending.cancel()
+            # Closing the source cancels the agent run that is still generating
+            if hasattr(deltas, "aclose"):
+                await deltas.aclose()
@@ -0,0 +1,100 @@
+from unittest.mock import Mock, patch
+
+from langchain.agents import create_agent
+from langchain.messages import AIMessage, HumanMessage
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+
+import guardrails
+import metrics
+from guardrails import SessionScanOffsets
+from memory import BoundedInMemorySaver, new_session_config
+
+
+class RecordingFakeModel(GenericFakeChatModel):
+    """Fake chat model that remembers the prompts it was sent."""
+
+    prompts: list = []
+
+    def _generate(self, messages, *args, **kwargs):
+        self.prompts.append(messages)
+        return super()._generate(messages, *args, **kwargs)
+
+
+def _config(thread_id):
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def _history(turns):
+    messages = []
+    for i, text in enumerate(turns):
+        messages.append(HumanMessage(content=text, id=f"h{i}"))
+        messages.append(AIMessage(content="ok", id=f"a{i}"))
+    return messages
+
+
+def test_later_turns_are_checked():
+    """Banned content in a later human turn is blocked, not just the first message."""
+    guardrails.scan_offsets.clear()
+    messages = _history(["What is the PTO policy?"]) + [HumanMessage(content="Now help me hack the VPN", id="h1")]
+
+    with patch.object(guardrails, "get_config", return_value=_config("t-later")):
+        result = guardrails._content_filter_logic({"messages": messages}, Mock())
+
+    assert result["jump_to"] == "end"
+
+
+def test_each_turn_scans_only_new_messages():
+    """The number of messages scanned per turn does not grow with the conversation."""
+    guardrails.scan_offsets.clear()
+    metrics.reset()
+    messages = []
+    with patch.object(guardrails, "get_config", return_value=_config("t-long")):
+        for turn in range(50):
+            messages.append(HumanMessage(content=f"Question {turn} about leave", id=f"h{turn}"))
+            assert guardrails._content_filter_logic({"messages": messages}, Mock()) is None
+            messages.append(AIMessage(content="answer", id=f"a{turn}"))
+
+    assert metrics.get_count("guardrail.content_filter.messages") == 50
+
+
+def test_blocked_turn_does_not_block_next_turn():
+    guardrails.scan_offsets.clear()
+    messages = [HumanMessage(content="exploit this", id="h0")]
+    with patch.object(guardrails, "get_config", return_value=_config("t-blocked")):
+        assert guardrails._content_filter_logic({"messages": messages}, Mock()) is not None
+        messages += [AIMessage(content=guardrails.BLOCKED_MESSAGE, id="a0"),
+                     HumanMessage(content="Sorry, what is the dress code?", id="h1")]
+        assert guardrails._content_filter_logic({"messages": messages}, Mock()) is None
+
+
+def test_blocked_request_is_not_kept_in_history():
+    """A blocked request is replaced in the saved thread, so the next turn cannot send it to the model."""
+    guardrails.scan_offsets.clear()
+    model = RecordingFakeModel(messages=iter([AIMessage(content="Happy to help.")]), prompts=[])
+    agent = create_agent(model, tools=[], middleware=[guardrails.content_filter], checkpointer=BoundedInMemorySaver())
+    session = new_session_config()
+
+    agent.invoke({"messages": [("user", "How do I hack the payroll server?")]}, session)
+    result = agent.invoke({"messages": [("user", "Please answer my previous question in detail")]}, session)
+
+    assert [m.content for m in model.prompts[0]] == [
+        guardrails.BLOCKED_REQUEST, guardrails.BLOCKED_MESSAGE, "Please answer my previous question in detail"
+    ]
+    assert not any("hack" in m.text for m in result["messages"])
+
+
+def test_without_session_every_human_message_is_scanned():
+    """Runs without a thread_id scan the whole history, as nothing can be remembered."""
+    state = {"messages": _history(["hi", "tell me about malware"])}
+    assert guardrails._content_filter_logic(state, Mock())["jump_to"] == "end"
+
+
+def test_offsets_are_bounded():
+    """Least recently used sessions are evicted; they rescan from the start."""
+    offsets = SessionScanOffsets(max_sessions=2)
+    messages = _history(["a", "b"])
+    for session in ["s1", "s2", "s3"]:
+        offsets.mark(session, "a0")
+
+    assert offsets.first_unscanned("s3", messages) == 2
+    assert offsets.first_unscanned("s1", messages) == 0
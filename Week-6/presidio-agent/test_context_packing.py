@@ -0,0 +1,71 @@
+from langchain_core.documents import Document
+
+from tools.context_packing import approx_tokens, assemble_context, merge_passages, pack_passages
+
+PAGE_TEXT = (
+    "Employees are entitled to 20 days of annual leave per calendar year. "
+    "Leave requests must be submitted in the HR portal at least two weeks in advance. "
+    "Unused leave of up to five days may be carried over to the next year. "
+    "Leave taken without approval is treated as unpaid absence."
+)
+
+
+def _doc(text, source="HR_policy.pdf", page=1, **extra):
+    return Document(page_content=text, metadata={"source": source, "page": page, **extra})
+
+
+def test_overlapping_chunks_from_same_page_are_merged():
+    """Adjacent chunks that share an overlap span are sent once, ranked by the best of them."""
+    first = _doc(PAGE_TEXT[:160], start_index=0)
+    second = _doc(PAGE_TEXT[100:], start_index=100)
+
+    passages = merge_passages([second, first])
+
+    assert len(passages) == 1
+    assert passages[0].text == PAGE_TEXT
+    assert passages[0].rank == 0
+
+
+def test_chunks_from_different_pages_are_not_merged():
+    """Overlapping text on different pages stays as separate passages."""
+    first = _doc(PAGE_TEXT[:160], page=1)
+    second = _doc(PAGE_TEXT[100:], page=2)
+
+    passages = merge_passages([first, second])
+
+    assert [p.text for p in passages] == [PAGE_TEXT[:160], PAGE_TEXT[100:]]
+
+
+def test_near_duplicates_keep_highest_ranked():
+    """A near-identical chunk from another document is dropped in favour of the better hit."""
+    original = _doc(PAGE_TEXT, source="a.pdf")
+    duplicate = _doc(PAGE_TEXT.replace("20 days", "20  days") + " ", source="b.pdf")
+
+    passages = merge_passages([original, duplicate], scores=[0.9, 0.8])
+
+    assert len(passages) == 1
+    assert passages[0].metadata["source"] == "a.pdf"
+    assert passages[0].score == 0.9
+
+
+def test_budget_keeps_most_relevant_first():
+    """Passages are packed in relevance order and the last one is trimmed to the budget."""
+    docs = [_doc("A" * 400, page=1), _doc("B " * 200, page=2), _doc("C " * 200, page=3)]
+
+    packed = pack_passages(docs, token_budget=approx_tokens("A" * 400) + 50)
+
+    assert packed[0].text == "A" * 400
+    assert len(packed) == 2
+    assert packed[1].text.startswith("B")
+    assert approx_tokens(packed[1].text) <= 50
+
+
+def test_assemble_context_removes_overlap():
+    """The assembled context holds the page once and is shorter than the raw chunks."""
+    docs = [_doc(PAGE_TEXT[:160]), _doc(PAGE_TEXT[100:])]
+
+    context = assemble_context(docs)
+
+    assert context == PAGE_TEXT
+    assert len(context) < sum(len(d.page_content) for d in docs)
+    assert assemble_context([]) == ""
@@ -0,0 +1,136 @@
+import asyncio
+import time
+
+from langchain.agents import create_agent
+from langchain.tools import tool
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+import metrics
+from deadline import DeadlineMiddleware, deadline_scope, get_deadline_report, new_deadline, PARTIAL_PREFIX
+
+
+class ToolCallingFakeModel(GenericFakeChatModel):
+    """Fake chat model that accepts tools so it can drive create_agent."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+@tool
+def policy_search(query: str) -> str:
+    """Fast policy lookup."""
+    return "Up to 5 PTO days carry over."
+
+
+@tool
+def slow_search(query: str) -> str:
+    """Web search that never answers in time."""
+    time.sleep(1.0)
+    return "too late"
+
+
+@tool
+def timed_search(query: str, timeout_seconds: float = 30.0) -> str:
+    """Search that accepts the caller's time budget."""
+    return f"budget {timeout_seconds:.1f}"
+
+
+def _agent(replies, tools, budget):
+    model = ToolCallingFakeModel(messages=iter(replies))
+    return create_agent(model, tools=tools, middleware=[DeadlineMiddleware(budget=budget)])
+
+
+async def _timed(awaitable):
+    # Timed inside the loop: asyncio.run also waits for the abandoned tool thread
+    start = time.perf_counter()
+    result = await awaitable
+    return result, time.perf_counter() - start
+
+
+def _tool_call(name, call_id):
+    return {"name": name, "args": {"query": "PTO carryover"}, "id": call_id}
+
+
+def test_run_within_deadline_is_unchanged():
+    """A run that finishes in time returns the model's answer and records no miss."""
+    metrics.reset()
+    agent = _agent(
+        [AIMessage(content="", tool_calls=[_tool_call("policy_search", "1")]), AIMessage(content="Five days.")],
+        [policy_search], budget=5.0
+    )
+
+    result = asyncio.run(agent.ainvoke({"messages": [("user", "PTO carryover?")]}))
+
+    assert result["messages"][-1].content == "Five days."
+    assert get_deadline_report()["miss_rate"] == 0.0
+
+
+def test_slow_tool_is_cancelled_and_run_degrades():
+    """A tool past the deadline times out and the answer falls back to gathered results."""
+    metrics.reset()
+    agent = _agent(
+        [AIMessage(content="", tool_calls=[_tool_call("policy_search", "1"), _tool_call("slow_search", "2")]),
+         AIMessage(content="never reached")],
+        [policy_search, slow_search], budget=0.3
+    )
+
+    result, elapsed = asyncio.run(_timed(agent.ainvoke({"messages": [("user", "PTO carryover?")]})))
+
+    assert elapsed < 1.0
+    tool_messages = [m for m in result["messages"] if m.type == "tool"]
+    assert tool_messages[1].status == "error"
+    final = result["messages"][-1].content
+    assert final.startswith(PARTIAL_PREFIX)
+    assert "Up to 5 PTO days carry over." in final
+
+    report = get_deadline_report()
+    assert report["requests"] == 1
+    assert report["miss_rate"] == 1.0
+    assert report["missed_by_stage"]["slow_search"] == 1
+
+
+def test_sync_run_honors_deadline():
+    """The sync agent path bounds tool calls as well."""
+    metrics.reset()
+    agent = _agent(
+        [AIMessage(content="", tool_calls=[_tool_call("slow_search", "1")]), AIMessage(content="never reached")],
+        [slow_search], budget=0.2
+    )
+
+    result = agent.invoke({"messages": [("user", "Industry trends?")]})
+
+    assert "did not finish before the request deadline" in result["messages"][2].content
+    assert get_deadline_report()["missed_by_stage"]["slow_search"] == 1
+
+
+def test_time_left_is_passed_to_tools_that_accept_it():
+    """Tools with a timeout_seconds argument get the remaining budget."""
+    metrics.reset()
+    agent = _agent(
+        [AIMessage(content="", tool_calls=[_tool_call("timed_search", "1")]), AIMessage(content="done")],
+        [timed_search], budget=5.0
+    )
+
+    result = asyncio.run(agent.ainvoke({"messages": [("user", "Insurance cover?")]}))
+
+    budget = float(result["messages"][2].content.split()[1])
+    assert 0 < budget <= 5.0
+
+
+def test_caller_deadline_scope_is_used():
+    """A deadline set by the caller takes precedence over the middleware budget."""
+    metrics.reset()
+    agent = _agent(
+        [AIMessage(content="", tool_calls=[_tool_call("slow_search", "1")]), AIMessage(content="never reached")],
+        [slow_search], budget=60.0
+    )
+
+    async def run():
+        with deadline_scope(new_deadline(0.2)):
+            return await _timed(agent.ainvoke({"messages": [("user", "Industry trends?")]}))
+
+    _, elapsed = asyncio.run(run())
+
+    assert elapsed < 1.0
+    assert get_deadline_report()["requests"] == 1
@@ -0,0 +1,73 @@
+import os
+import time
+from unittest.mock import Mock, patch
+
+from langchain.messages import HumanMessage
+
+import guardrails
+from keyword_matcher import KeywordMatcher, KeywordRegistry
+
+
+def test_word_boundaries_and_inflections():
+    """Terms match whole words and their inflections, not longer words."""
+    matcher = KeywordMatcher(["hack", "exploit", "malware"])
+
+    assert matcher.search("How to hack into a system?") == "hack"
+    assert matcher.search("Tell me about security exploits") == "exploit"
+    assert matcher.search("Our hackers were hacking") == "hack"
+    assert matcher.search("Read the exploitation policy") is None
+    assert matcher.search("Sign up for the hackathon") is None
+    assert matcher.search("Is shacking up covered?") is None
+
+
+def test_case_and_multi_word_terms():
+    """Matching is case-insensitive and multi-word terms ignore extra spacing."""
+    matcher = KeywordMatcher(["insider trading"])
+
+    assert matcher.search("What counts as INSIDER\n  trading?") == "insider trading"
+    assert matcher.search("insider information") is None
+
+
+def test_overlapping_terms_are_all_found():
+    """Terms sharing prefixes are found in one pass."""
+    matcher = KeywordMatcher(["mal", "malware", "ware"])
+
+    found = [term for _, _, term in matcher.find_all("malware and mal, ware")]
+
+    assert found == ["malware", "mal", "ware"]
+
+
+def test_empty_term_list_matches_nothing():
+    assert KeywordMatcher([]).search("anything") is None
+
+
+def test_registry_hot_reload_and_tenants(tmp_path):
+    """Tenant lists extend the defaults and edits are picked up without a restart."""
+    (tmp_path / "default.txt").write_text("# shared\nphishing kit\n")
+    (tmp_path / "acme.txt").write_text("project falcon\n")
+    registry = KeywordRegistry(str(tmp_path), defaults=["hack"], reload_interval=0)
+
+    assert registry.matcher().search("buy a phishing kit") == "phishing kit"
+    assert registry.matcher().search("project falcon status") is None
+    assert registry.matcher("acme").search("project falcon status") == "project falcon"
+    assert registry.matcher("acme").search("hack the planet") == "hack"
+
+    (tmp_path / "default.txt").write_text("phishing kit\nransomware\n")
+    os.utime(tmp_path / "default.txt", (time.time() + 5, time.time() + 5))
+
+    assert registry.matcher("acme").search("ransomware attack") == "ransomware"
+
+
+def test_content_filter_uses_tenant_list(tmp_path):
+    """The guardrail checks the tenant's list from the run config."""
+    (tmp_path / "acme.txt").write_text("project falcon\n")
+    registry = KeywordRegistry(str(tmp_path), defaults=guardrails.banned_keywords, reload_interval=0)
+    state = {"messages": [HumanMessage(content="Status of Project Falcon?")]}
+
+    with patch.object(guardrails, "keyword_registry", registry), \
+         patch.object(guardrails, "get_config", return_value={"configurable": {"tenant_id": "acme"}}):
+        result = guardrails._content_filter_logic(state, Mock())
+    assert result["jump_to"] == "end"
+
+    with patch.object(guardrails, "keyword_registry", registry):
+        assert guardrails._content_filter_logic(state, Mock()) is None
@@ -0,0 +1,110 @@
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from tokenizers import Tokenizer
+from tokenizers.models import WordLevel
+from tokenizers.pre_tokenizers import Whitespace
+
+from tools import rag_tool
+from tools import local_embeddings
+from tools.local_embeddings import OnnxEmbeddings, get_local_embeddings
+
+VOCAB = ["[PAD]", "[UNK]", "leave", "notice", "holiday", "payroll"]
+
+
+class FakeSession:
+    """Each token's hidden state is its one-hot vocab vector."""
+
+    def __init__(self, inputs=("input_ids", "attention_mask")):
+        self.inputs = inputs
+        self.batches = []
+        self.feeds = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name=name) for name in self.inputs]
+
+    def run(self, output_names, feeds):
+        self.batches.append(len(feeds["input_ids"]))
+        self.feeds.append(feeds)
+        return [np.eye(len(VOCAB), dtype=np.float32)[feeds["input_ids"]]]
+
+
+def _embeddings(tmp_path, session, **kwargs):
+    tokenizer = Tokenizer(WordLevel({w: i for i, w in enumerate(VOCAB)}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = Whitespace()
+    tokenizer.save(str(tmp_path / "tokenizer.json"))
+    (tmp_path / "model.onnx").write_bytes(b"")
+    with patch("onnxruntime.InferenceSession", return_value=session):
+        return OnnxEmbeddings(str(tmp_path), **kwargs)
+
+
+def test_padding_does_not_change_embeddings(tmp_path):
+    """Texts embed the same alone or batched with longer ones, in input order."""
+    session = FakeSession()
+    embeddings = _embeddings(tmp_path, session, batch_size=2)
+    texts = ["leave notice notice holiday payroll", "leave", "holiday payroll"]
+
+    vectors = embeddings.embed_documents(texts)
+
+    assert session.batches == [2, 1]
+    for text, vector in zip(texts, vectors):
+        assert np.allclose(vector, embeddings.embed_query(text))
+    assert np.allclose(vectors[1], [0, 0, 1, 0, 0, 0])
+    assert np.isclose(np.linalg.norm(vectors[0]), 1.0)
+
+
+def test_token_type_ids_only_when_model_takes_them(tmp_path):
+    """BERT-style exports get token_type_ids; other models are not fed inputs they do not declare."""
+    plain = FakeSession()
+    bert = FakeSession(inputs=("input_ids", "attention_mask", "token_type_ids"))
+
+    _embeddings(tmp_path, plain).embed_query("leave")
+    _embeddings(tmp_path, bert).embed_query("leave")
+
+    assert set(plain.feeds[0]) == {"input_ids", "attention_mask"}
+    assert set(bert.feeds[0]) == {"input_ids", "attention_mask", "token_type_ids"}
+
+
+def test_quantized_model_must_exist(tmp_path):
+    """The int8 model is loaded only once `quantize` has written it."""
+    with pytest.raises(FileNotFoundError, match="quantize"):
+        _embeddings(tmp_path, FakeSession(), quantized=True)
+
+    (tmp_path / "model_int8.onnx").write_bytes(b"")
+    embeddings = _embeddings(tmp_path, FakeSession(), quantized=True)
+
+    assert embeddings.model_path.endswith("model_int8.onnx")
+
+
+def test_local_embeddings_loaded_once_per_settings():
+    """The ONNX session is built once per process and thread setting."""
+    local_embeddings._instances.clear()
+    with patch("tools.local_embeddings.OnnxEmbeddings") as onnx:
+        with patch.dict(os.environ, {"LOCAL_EMBEDDING_THREADS": "2"}):
+            first = get_local_embeddings()
+            second = get_local_embeddings()
+        with patch.dict(os.environ, {"LOCAL_EMBEDDING_THREADS": "4"}):
+            get_local_embeddings()
+    local_embeddings._instances.clear()
+
+    assert first is second
+    assert onnx.call_count == 2
+
+
+def test_local_backend_reads_local_index():
+    """With EMBEDDING_BACKEND=local the HR index is opened from its _local directory without Bedrock."""
+    with patch.dict(os.environ, {"EMBEDDING_BACKEND": "local"}), \
+         patch("tools.rag_tool.get_local_embeddings") as local, \
+         patch("tools.rag_tool.BedrockEmbeddings") as bedrock, \
+         patch("tools.rag_tool.Chroma") as chroma:
+        rag_tool.load_vectordb()
+
+    bedrock.assert_not_called()
+    chroma.assert_called_once_with(
+        persist_directory="vectorstore/hr_policy_chroma_local",
+        embedding_function=local.return_value,
+        collection_name=rag_tool.COLLECTION_NAME,
+    )
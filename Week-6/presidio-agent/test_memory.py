@@ -0,0 +1,79 @@
+from unittest.mock import patch
+
+from langchain.agents import create_agent
+from langchain.messages import AIMessage
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+
+import metrics
+from memory import BoundedInMemorySaver, memory_middleware, new_session_config
+
+
+def _agent(replies, checkpointer, middleware=()):
+    model = GenericFakeChatModel(messages=iter(replies))
+    return create_agent(model, tools=[], middleware=list(middleware), checkpointer=checkpointer)
+
+
+def test_follow_ups_keep_context():
+    """Turns on the same thread see the earlier messages; other threads do not."""
+    saver = BoundedInMemorySaver()
+    agent = _agent([AIMessage(content="Noted."), AIMessage(content="Yes."), AIMessage(content="Hi.")], saver)
+    session = new_session_config()
+
+    agent.invoke({"messages": [("user", "I'm in the Pune office")]}, session)
+    result = agent.invoke({"messages": [("user", "Does the holiday list apply to me?")]}, session)
+    other = agent.invoke({"messages": [("user", "Hello")]}, new_session_config())
+
+    assert [m.content for m in result["messages"]] == [
+        "I'm in the Pune office", "Noted.", "Does the holiday list apply to me?", "Yes."
+    ]
+    assert len(other["messages"]) == 2
+
+
+def test_least_recently_used_sessions_are_evicted():
+    metrics.reset()
+    saver = BoundedInMemorySaver(max_sessions=2, ttl_seconds=0)
+    agent = _agent([AIMessage(content="ok")] * 4, saver)
+    first, second, third = (new_session_config(t) for t in ["s1", "s2", "s3"])
+
+    agent.invoke({"messages": [("user", "one")]}, first)
+    agent.invoke({"messages": [("user", "two")]}, second)
+    agent.invoke({"messages": [("user", "again")]}, first)
+    agent.invoke({"messages": [("user", "three")]}, third)
+
+    assert saver.session_count() == 2
+    assert "s2" not in saver.storage
+    assert "s1" in saver.storage and "s3" in saver.storage
+    assert metrics.get_count("memory.sessions.evicted") == 1
+
+
+def test_idle_sessions_expire():
+    """Sessions idle past the TTL are dropped on the next checkpoint access."""
+    saver = BoundedInMemorySaver(max_sessions=10, ttl_seconds=60)
+    agent = _agent([AIMessage(content="ok")] * 2, saver)
+
+    with patch("memory.time.monotonic", return_value=1000.0):
+        agent.invoke({"messages": [("user", "hi")]}, new_session_config("idle"))
+    with patch("memory.time.monotonic", return_value=1100.0):
+        agent.invoke({"messages": [("user", "hi")]}, new_session_config("active"))
+
+    assert saver.session_count() == 1
+    assert "idle" not in saver.storage
+
+
+def test_old_turns_are_summarized_past_budget():
+    """Past the token budget, old turns are replaced by a summary and recent ones kept."""
+    summarizer = GenericFakeChatModel(messages=iter([AIMessage(content="User is in Pune.")] * 5))
+    agent = _agent(
+        [AIMessage(content="word " * 40) for _ in range(6)],
+        BoundedInMemorySaver(),
+        [memory_middleware(summarizer, max_tokens=150, keep_tokens=60)],
+    )
+    session = new_session_config()
+
+    for turn in range(6):
+        result = agent.invoke({"messages": [("user", f"question {turn}")]}, session)
+
+    contents = [m.text for m in result["messages"]]
+    assert any("User is in Pune." in c for c in contents)
+    assert "question 0" not in contents
+    assert len(result["messages"]) < 12
@@ -0,0 +1,99 @@
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from tools import rag_tool
+from tools.mmap_index import MmapVectorStore
+
+VOCAB = ["leave", "holiday", "notice", "payroll", "insurance", "remote", "laptop", "harassment"]
+
+TEXTS = [
+    "Annual leave is 20 days per year",
+    "The holiday calendar is published in January",
+    "Resignation requires a notice period of 60 days",
+    "Payroll is processed on the last working day",
+    "Health insurance covers dependants",
+    "Remote work needs manager approval",
+    "Report harassment to the HR helpdesk",
+]
+
+
+class KeywordEmbeddings(Embeddings):
+    """Bag-of-words embeddings over VOCAB, so search results are predictable."""
+
+    def _embed(self, text):
+        words = text.lower().split()
+        return [float(sum(w.startswith(v) for w in words)) + 0.01 for v in VOCAB]
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def _store(tmp_path, **kwargs):
+    return MmapVectorStore.from_texts(
+        TEXTS, KeywordEmbeddings(), metadatas=[{"page": i} for i in range(len(TEXTS))],
+        persist_directory=str(tmp_path), collection_name="hr_policy", **kwargs,
+    )
+
+
+def test_reopened_index_is_memory_mapped(tmp_path):
+    """A reopened store maps the persisted float16 matrix instead of loading it."""
+    _store(tmp_path)
+
+    reopened = MmapVectorStore(persist_directory=str(tmp_path), embedding_function=KeywordEmbeddings(),
+                               collection_name="hr_policy")
+
+    assert reopened.count == len(TEXTS)
+    assert isinstance(reopened._vectors, np.memmap)
+    assert reopened._vectors.dtype == np.float16
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"dtype": "int8"}, {"nlist": 3}])
+def test_best_match_ranks_first(tmp_path, kwargs):
+    """Exact, int8 and IVF layouts all rank the matching policy first."""
+    store = _store(tmp_path, **kwargs)
+    store.nprobe = 3
+
+    docs = store.similarity_search("How many days of annual leave?", k=2)
+
+    assert docs[0].page_content == "Annual leave is 20 days per year"
+    assert docs[0].metadata == {"page": 0}
+
+
+def test_relevance_scores_are_cosine(tmp_path):
+    """Relevance is cosine similarity in [0, 1], so RAG_RELEVANCE_THRESHOLD applies unchanged."""
+    store = _store(tmp_path)
+
+    results = store.similarity_search_with_relevance_scores("remote work", k=3)
+
+    assert results[0][0].page_content.startswith("Remote work")
+    assert results[0][1] > results[1][1]
+    assert all(0.0 <= score <= 1.0 for _, score in results)
+    assert rag_tool.distance_space(store) == "cosine"
+
+
+def test_missing_index_returns_no_results(tmp_path):
+    """An index that was never built behaves like an empty store."""
+    store = MmapVectorStore(persist_directory=str(tmp_path), embedding_function=KeywordEmbeddings(),
+                            collection_name="missing")
+
+    assert store.similarity_search("leave") == []
+
+
+def test_mmap_backend_is_selected():
+    """VECTOR_BACKEND=mmap opens the memory-mapped HR index instead of Chroma."""
+    with patch.dict(os.environ, {"VECTOR_BACKEND": "mmap", "EMBEDDING_BACKEND": "titan"}), \
+         patch("tools.rag_tool.BedrockEmbeddings") as bedrock, \
+         patch("tools.rag_tool.MmapVectorStore") as mmap_store, \
+         patch("tools.rag_tool.Chroma") as chroma:
+        vectordb = rag_tool.load_vectordb()
+
+    chroma.assert_not_called()
+    assert vectordb is mmap_store.return_value
+    assert mmap_store.call_args.kwargs["embedding_function"] is bedrock.return_value
@@ -0,0 +1,135 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+from langchain.agents import create_agent
+from langchain.tools import tool
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+import metrics
+from parallel_tools import PARALLEL_TOOLS_RULE, ParallelToolsMiddleware, get_tool_report
+
+
+class ToolCallingFakeModel(GenericFakeChatModel):
+    """Fake chat model that accepts tools and remembers the prompts it was sent."""
+
+    prompts: list = []
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, *args, **kwargs):
+        self.prompts.append(messages)
+        return super()._generate(messages, *args, **kwargs)
+
+
+@tool
+def policy_search(query: str) -> str:
+    """Internal policy lookup."""
+    time.sleep(0.4)
+    return "Up to 5 PTO days carry over."
+
+
+@tool
+def web_search(query: str) -> str:
+    """Industry benchmark search."""
+    time.sleep(0.4)
+    return "Most U.S. employers allow some carryover."
+
+
+@tool
+def slow_search(query: str) -> str:
+    """Search that hangs."""
+    time.sleep(1.0)
+    return "too late"
+
+
+@tool
+def timed_search(query: str, timeout_seconds: float = 30.0) -> str:
+    """Search that accepts a time budget."""
+    return f"budget {timeout_seconds:.1f}"
+
+
+def _tool_call(name, call_id):
+    return {"name": name, "args": {"query": "PTO carryover"}, "id": call_id}
+
+
+def _agent(tool_calls, tools, **kwargs):
+    model = ToolCallingFakeModel(messages=iter([
+        AIMessage(content="", tool_calls=[_tool_call(name, str(i)) for i, name in enumerate(tool_calls)]),
+        AIMessage(content="Five days, in line with industry."),
+    ]), prompts=[])
+    agent = create_agent(model, tools=tools, system_prompt="You are Presidio's agent.",
+                         middleware=[ParallelToolsMiddleware(**kwargs)])
+    return agent, model
+
+
+async def _timed(awaitable):
+    start = time.perf_counter()
+    result = await awaitable
+    return result, time.perf_counter() - start
+
+
+def test_same_turn_tool_calls_run_concurrently():
+    """Two tools requested in one turn take about as long as the slower one."""
+    metrics.reset()
+    agent, model = _agent(["policy_search", "web_search"], [policy_search, web_search])
+
+    result, elapsed = asyncio.run(_timed(agent.ainvoke({"messages": [("user", "Compare PTO carryover")]})))
+
+    assert elapsed < 0.7
+    assert result["messages"][-1].content == "Five days, in line with industry."
+    assert PARALLEL_TOOLS_RULE in model.prompts[0][0].content
+    report = get_tool_report()
+    assert report["tool_turns"] == 1
+    assert report["calls_per_turn"] == 2
+    assert report["parallel_turn_rate"] == 1.0
+
+
+def test_sequential_mode_runs_one_tool_at_a_time():
+    """PARALLEL_TOOL_CALLS=off restores one-at-a-time tools and drops the prompt rule."""
+    metrics.reset()
+    agent, model = _agent(["policy_search", "web_search"], [policy_search, web_search])
+
+    with patch("parallel_tools.PARALLEL_TOOL_CALLS", "off"):
+        _, elapsed = asyncio.run(_timed(agent.ainvoke({"messages": [("user", "Compare PTO carryover")]})))
+
+    assert elapsed >= 0.8
+    assert PARALLEL_TOOLS_RULE not in model.prompts[0][0].content
+
+
+def test_slow_tool_times_out_without_ending_the_run():
+    """A tool past its own timeout answers with an error; the model still answers from the rest."""
+    metrics.reset()
+    agent, _ = _agent(["policy_search", "slow_search"], [policy_search, slow_search],
+                      timeouts={"slow_search": 0.2})
+
+    result, elapsed = asyncio.run(_timed(agent.ainvoke({"messages": [("user", "Compare PTO carryover")]})))
+
+    assert elapsed < 0.9
+    tool_messages = {m.name: m for m in result["messages"] if m.type == "tool"}
+    assert tool_messages["policy_search"].content == "Up to 5 PTO days carry over."
+    assert tool_messages["slow_search"].status == "error"
+    assert result["messages"][-1].content == "Five days, in line with industry."
+    assert get_tool_report()["timeouts"] == {"slow_search": 1}
+
+
+def test_sync_run_honors_tool_timeout():
+    """The sync agent path bounds tool calls as well."""
+    metrics.reset()
+    agent, _ = _agent(["slow_search"], [slow_search], default_timeout=0.2)
+
+    result = agent.invoke({"messages": [("user", "Industry trends?")]})
+
+    assert "did not respond within 0.2s" in result["messages"][2].content
+    assert get_tool_report()["timeouts"] == {"slow_search": 1}
+
+
+def test_tool_timeout_is_passed_to_tools_that_accept_it():
+    """Tools with a timeout_seconds argument get their per-tool timeout."""
+    agent, _ = _agent(["timed_search"], [timed_search], timeouts={"timed_search": 2.0})
+
+    result = asyncio.run(agent.ainvoke({"messages": [("user", "Insurance cover?")]}))
+
+    assert result["messages"][2].content == "budget 2.0"
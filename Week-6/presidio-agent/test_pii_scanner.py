@@ -0,0 +1,121 @@
+import random
+from unittest.mock import Mock
+
+from langchain.messages import AIMessage, HumanMessage, ToolMessage
+
+from benchmark_pii_scanner import synthetic_text
+from pii_scanner import PIIScanner, PIIScannerMiddleware, StreamingPIIRedactor, passes_luhn
+
+TEXT = ("Mail jane.roe@presidio.com or call (555) 123-4567. SSN 123-45-6789, "
+        "badge EMP-004521, card 4111 1111 1111 1111, order 4111 1111 1111 1112.")
+
+
+def test_all_types_in_one_pass():
+    """Every configured type is found; card numbers failing Luhn are left alone."""
+    redacted, found = PIIScanner().scan(TEXT)
+
+    assert found == ["email", "phone", "ssn", "employee_id", "credit_card"]
+    assert redacted == ("Mail [REDACTED_EMAIL] or call [REDACTED_PHONE]. SSN [REDACTED_SSN], "
+                        "badge [REDACTED_EMPLOYEE_ID], card [REDACTED_CREDIT_CARD], order 4111 1111 1111 1112.")
+
+
+def test_mask_and_hash_strategies():
+    """Mask keeps the last digits; hash gives a stable per-value token."""
+    masked, _ = PIIScanner(["email", "ssn", "credit_card"], strategy="mask").scan(TEXT)
+    assert "j***@****.com" in masked
+    assert "***-**-6789" in masked
+    assert "****-****-****-1111" in masked
+
+    hashed, _ = PIIScanner(["email"], strategy="hash").scan("a@b.com and a@b.com")
+    first, second = hashed.split(" and ")
+    assert first == second and first.startswith("<email_hash:")
+
+
+def test_only_configured_types_are_redacted():
+    redacted, found = PIIScanner(["email"]).scan(TEXT)
+    assert found == ["email"]
+    assert "123-45-6789" in redacted
+
+
+def test_windowed_scan_matches_full_scan():
+    """Skipping prose between "@"/digit windows finds exactly what a full regex pass finds."""
+    scanner = PIIScanner()
+    for seed in range(50):
+        rng = random.Random(seed)
+        text = synthetic_text(rng.randint(10, 20_000), rng.choice([1, 5, 50]), seed)
+        expected = [(m.start(), m.end(), m.lastgroup) for m in scanner._pattern.finditer(text)
+                    if m.lastgroup != "credit_card" or passes_luhn(m.group())]
+        assert scanner.find_all(text) == expected
+
+
+def _stream(redactor, chunks):
+    shown = [redactor.feed(chunk) for chunk in chunks]
+    return shown + [redactor.flush()]
+
+
+def test_streamed_pii_split_across_chunks_is_redacted():
+    """Values split across deltas are redacted as if the reply had been scanned whole."""
+    redactor = StreamingPIIRedactor(PIIScanner())
+    chunks = ["Mail jane.roe@presi", "dio.com or call (555) 12", "3-4567. SSN 123-", "45-6789, card 4111 1111 ",
+              "1111 1111, order 4111 1111 1111 1112."]
+
+    shown = _stream(redactor, chunks)
+
+    assert "".join(shown) == ("Mail [REDACTED_EMAIL] or call [REDACTED_PHONE]. SSN [REDACTED_SSN], "
+                              "card [REDACTED_CREDIT_CARD], order 4111 1111 1111 1112.")
+    assert redactor.found == ["email", "phone", "ssn", "credit_card"]
+
+
+def test_streamed_prose_is_not_held_back():
+    """Text with no "@" or digit near the end is released while the stream continues."""
+    redactor = StreamingPIIRedactor(PIIScanner())
+    prose = "Annual leave requests go to your manager. " * 5
+
+    assert redactor.feed(prose) == prose[:-65]
+    assert redactor.flush() == prose[-65:]
+
+
+def test_streamed_redaction_matches_whole_scan():
+    """Any split of a text into deltas gives the same output as one scan."""
+    scanner = PIIScanner(strategy="mask")
+    for seed in range(30):
+        rng = random.Random(seed)
+        text = synthetic_text(rng.randint(10, 5_000), rng.choice([1, 5, 50]), seed)
+        cuts = sorted(rng.sample(range(len(text)), min(len(text) - 1, rng.randint(1, 200))))
+        chunks = [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])]
+
+        assert "".join(_stream(StreamingPIIRedactor(scanner), chunks)) == scanner.scan(text)[0]
+
+
+def test_middleware_scans_only_new_messages():
+    """Each hook reads the messages added since the last scanned id."""
+    middleware = PIIScannerMiddleware(apply_to_input=True, apply_to_output=True)
+    middleware.scanner.scan_content = Mock(wraps=middleware.scanner.scan_content)
+    history = [
+        HumanMessage(content="Email me at jane@presidio.com", id="h1"),
+        AIMessage(content="Done.", id="a1"),
+    ]
+
+    update = middleware.before_model({"messages": history}, Mock())
+    assert update["messages"][0].content == "Email me at [REDACTED_EMAIL]"
+    assert update["messages"][0].id == "h1"
+    assert update["pii_scanned_id"] == "a1"
+    assert middleware.scanner.scan_content.call_count == 2
+
+    history.append(HumanMessage(content="My SSN is 123-45-6789", id="h2"))
+    update = middleware.before_model({"messages": history, "pii_scanned_id": "a1"}, Mock())
+    assert update["messages"][0].content == "My SSN is [REDACTED_SSN]"
+    assert middleware.scanner.scan_content.call_count == 3
+
+    # Nothing new: no scan and no state update
+    assert middleware.after_model({"messages": history, "pii_scanned_id": "h2"}, Mock()) is None
+    assert middleware.scanner.scan_content.call_count == 3
+
+
+def test_middleware_respects_message_kinds():
+    """Tool results are left alone unless apply_to_tool_results is set."""
+    messages = [ToolMessage(content="Contact: hr@presidio.com", tool_call_id="1", id="t1")]
+
+    assert "messages" not in (PIIScannerMiddleware().before_model({"messages": messages}, Mock()) or {})
+    update = PIIScannerMiddleware(apply_to_tool_results=True).before_model({"messages": messages}, Mock())
+    assert update["messages"][0].content == "Contact: [REDACTED_EMAIL]"
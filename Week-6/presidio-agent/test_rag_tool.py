@@ -0,0 +1,115 @@
+import pytest
+from unittest.mock import Mock, patch
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage
+
+import metrics
+from tools import rag_tool
+
+
+def _vectordb(scored, space="cosine"):
+    """Mocked Chroma store returning ``scored`` from a collection in ``space``."""
+    vectordb = Mock()
+    vectordb._collection.metadata = {"hnsw:space": space} if space else None
+    vectordb.similarity_search_with_relevance_scores.return_value = scored
+    return vectordb
+
+
+def _chain_with_scores(scored, llm_reply="Answer from policy", space="cosine"):
+    """Build the RAG chain over a mocked vector store and LLM."""
+    vectordb = _vectordb(scored, space)
+    llm = Mock(return_value=AIMessage(content=llm_reply))
+
+    with patch("tools.rag_tool.load_vectordb", return_value=vectordb), \
+         patch("tools.rag_tool.ChatBedrock", return_value=llm):
+        return rag_tool.load_rag_chain(), llm
+
+
+def test_irrelevant_question_skips_generation():
+    """Best score below the threshold returns not-found without an LLM call."""
+    metrics.reset()
+    chain, llm = _chain_with_scores([(Document(page_content="PTO carryover"), 0.05)])
+
+    result = chain.invoke("Who won the football match?")
+
+    assert result.content == rag_tool.NOT_FOUND_MESSAGE
+    llm.assert_not_called()
+    assert rag_tool.get_rag_metrics()["skip_rate"] == 1.0
+
+
+def test_empty_retrieval_skips_generation():
+    """No retrieved chunks at all is treated as not found."""
+    metrics.reset()
+    chain, llm = _chain_with_scores([])
+
+    assert chain.invoke("anything").content == rag_tool.NOT_FOUND_MESSAGE
+    llm.assert_not_called()
+
+
+def test_relevant_question_is_generated_with_context():
+    """Relevant chunks are formatted into the prompt and sent to the LLM."""
+    metrics.reset()
+    scored = [
+        (Document(page_content="Up to 5 PTO days carry over."), 0.82),
+        (Document(page_content="Carryover expires in March."), 0.61),
+    ]
+    chain, llm = _chain_with_scores(scored)
+
+    result = chain.invoke("What is the PTO carryover policy?")
+
+    assert result.content == "Answer from policy"
+    prompt_text = llm.call_args[0][0].to_string()
+    assert "Up to 5 PTO days carry over." in prompt_text
+    assert "Carryover expires in March." in prompt_text
+
+    rag_metrics = rag_tool.get_rag_metrics()
+    assert rag_metrics["generated"] == 1
+    assert rag_metrics["hit_rate"] == 1.0
+
+
+def test_context_mode_returns_ranked_deduplicated_excerpts():
+    """Raw-context mode cites source/page, drops duplicate chunks and calls no LLM."""
+    metrics.reset()
+    vectordb = _vectordb([
+        (Document(page_content="Carryover expires in March.",
+                  metadata={"source": "data/Presidio_HR_Policy_Document.pdf", "page": 6}), 0.61),
+        (Document(page_content="Up to 5 PTO days carry over.",
+                  metadata={"source": "data/Presidio_HR_Policy_Document.pdf", "page": 5}), 0.82),
+        (Document(page_content="Up to 5  PTO days carry over.",
+                  metadata={"source": "data/Presidio_HR_Policy_Document.pdf", "page": 5}), 0.80),
+    ])
+
+    with patch("tools.rag_tool.ChatBedrock") as mock_llm:
+        result = rag_tool.search_policy_excerpts("PTO carryover?", vectordb=vectordb)
+
+    mock_llm.assert_not_called()
+    assert result.index("[1] Presidio_HR_Policy_Document.pdf, page 6") < result.index("[2] Presidio_HR_Policy_Document.pdf, page 7")
+    assert result.count("Up to 5") == 1
+    assert rag_tool.get_rag_metrics()["context"] == 1
+
+
+def test_context_mode_not_found_below_threshold():
+    """Raw-context mode honours the same relevance threshold."""
+    vectordb = _vectordb([(Document(page_content="Unrelated"), 0.01)])
+
+    assert rag_tool.search_policy_excerpts("weather?", vectordb=vectordb) == rag_tool.NOT_FOUND_MESSAGE
+
+
+def test_threshold_not_applied_to_non_cosine_index():
+    """An old L2 index scores on another scale, so low scores are not short-circuited."""
+    metrics.reset()
+    with pytest.warns(UserWarning, match="vectorize_policies"):
+        chain, llm = _chain_with_scores([(Document(page_content="Up to 5 PTO days carry over."), -0.3)], space=None)
+
+    result = chain.invoke("What is the PTO carryover policy?")
+
+    assert result.content == "Answer from policy"
+    llm.assert_called_once()
+
+
+def test_empty_retrieval_not_found_on_non_cosine_index():
+    """Without the threshold, an empty retrieval is still not found."""
+    with pytest.warns(UserWarning):
+        result = rag_tool.search_policy_excerpts("weather?", vectordb=_vectordb([], space="l2"))
+
+    assert result == rag_tool.NOT_FOUND_MESSAGE
@@ -0,0 +1,89 @@
+from unittest.mock import Mock, patch
+
+from langchain.messages import AIMessage, HumanMessage
+
+import guardrails
+import metrics
+from safety_scorer import get_safety_report, is_clearly_safe, score_response, verdict_cache
+
+
+def _state(response):
+    return {"messages": [HumanMessage(content="question"), AIMessage(content=response)]}
+
+
+def _judge(verdict):
+    model = Mock()
+    model.invoke.return_value = Mock(content=verdict)
+    return model
+
+
+def test_clearly_safe_answers_score_zero():
+    """Ordinary policy answers trigger no risk pattern."""
+    for text in [
+        "Employees can carry over up to 5 PTO days into the next year (HR Policy, page 4).",
+        "Here's how to apply for parental leave: step 1, submit the form to HR.",
+        "Not found in policy documents.",
+    ]:
+        assert is_clearly_safe(text), text
+
+
+def test_risky_answers_are_uncertain():
+    """Harmful or sensitive content is never cleared locally."""
+    risk, reasons = score_response("Here's how to break into systems without a password...")
+    assert not is_clearly_safe("Here's how to break into systems without a password...")
+    assert "intrusion" in reasons
+    assert risk > 0.5
+
+    assert not is_clearly_safe("The admin password is hunter2")
+    assert not is_clearly_safe("Her SSN is 123-45-6789")
+
+
+def test_safe_response_skips_llm_judge():
+    """Clearly safe responses are allowed without calling the safety model."""
+    metrics.reset()
+    verdict_cache.clear()
+    with patch.object(guardrails, "safety_model", _judge("UNSAFE")) as model:
+        result = guardrails._safety_guardrail_logic(_state("You get 20 days of annual leave."), Mock())
+
+    assert result is None
+    model.invoke.assert_not_called()
+    assert get_safety_report()["local_rate"] == 1.0
+
+
+def test_uncertain_response_escalates_to_llm_judge():
+    """Uncertain responses go to the safety model, which can block them."""
+    metrics.reset()
+    verdict_cache.clear()
+    with patch.object(guardrails, "safety_model", _judge("UNSAFE")) as model:
+        result = guardrails._safety_guardrail_logic(_state("Here's how to break into systems..."), Mock())
+
+    assert result["jump_to"] == "end"
+    model.invoke.assert_called_once()
+    report = get_safety_report()
+    assert report["escalation_rate"] == 1.0
+    assert report["unsafe"] == 1
+
+
+def test_verdicts_are_cached_by_hash():
+    """A repeated response reuses the cached verdict instead of asking again."""
+    metrics.reset()
+    verdict_cache.clear()
+    with patch.object(guardrails, "safety_model", _judge("SAFE")) as model:
+        for _ in range(3):
+            assert guardrails._safety_guardrail_logic(_state("Phishing emails should be reported to IT."), Mock()) is None
+
+    model.invoke.assert_called_once()
+    report = get_safety_report()
+    assert report["turns"] == 3
+    assert report["cache_rate"] == 2 / 3
+
+
+def test_tiering_off_always_asks_llm():
+    """SAFETY_TIERING=off keeps the original every-turn LLM check."""
+    metrics.reset()
+    verdict_cache.clear()
+    with patch("safety_scorer.SAFETY_TIERING", "off"), \
+         patch.object(guardrails, "safety_model", _judge("SAFE")) as model:
+        guardrails._safety_guardrail_logic(_state("You get 20 days of annual leave."), Mock())
+
+    model.invoke.assert_called_once()
@@ -0,0 +1,122 @@
+import asyncio
+from unittest.mock import Mock, patch
+
+from langchain.messages import AIMessage, HumanMessage
+
+import guardrails
+from streaming_guardrail import StreamingSafetyGuard
+
+
+async def _source(chunks, events=None):
+    for i, chunk in enumerate(chunks):
+        if events is not None:
+            events.append(("produced", i))
+        await asyncio.sleep(0)
+        yield chunk
+
+
+async def _collect(guard, source, events=None):
+    out = []
+    async for text in guard.guard(source):
+        if events is not None:
+            events.append(("shown", len(out)))
+        out.append(text)
+    return out
+
+
+def test_safe_stream_is_released_as_generated():
+    """Safe text is yielded chunk by chunk without calling the judge."""
+    judge = Mock(return_value="UNSAFE")
+    events = []
+    chunks = ["You get ", "20 days ", "of annual ", "leave."]
+    guard = StreamingSafetyGuard(judge=judge)
+
+    out = asyncio.run(_collect(guard, _source(chunks, events), events))
+
+    assert out == chunks
+    judge.assert_not_called()
+    # Each chunk is shown before the next one is produced
+    assert events[:4] == [("produced", 0), ("shown", 0), ("produced", 1), ("shown", 1)]
+
+
+def test_phrase_split_across_chunks_is_blocked():
+    """The sliding window catches a risky phrase spanning chunks and stops the stream."""
+    judge = Mock(return_value="UNSAFE")
+    chunks = ["Sure. Here's how to break ", "into sys", "tems quickly: ", "step 1", " never shown"]
+    guard = StreamingSafetyGuard(judge=judge)
+
+    out = asyncio.run(_collect(guard, _source(chunks)))
+
+    assert guard.blocked
+    assert "intrusion" in guard.reasons
+    # Text is released up to the chunk that completed the phrase
+    assert "".join(out) == "Sure. Here's how to break into sys"
+    assert "systems" in judge.call_args.args[0]
+
+
+def test_uncertain_text_is_held_until_judged_safe():
+    """Flagged text is held back, then released in order once the judge clears it."""
+    judge = Mock(return_value="SAFE")
+    chunks = ["Report ", "phishing emails ", "to IT."]
+    guard = StreamingSafetyGuard(judge=judge)
+
+    out = asyncio.run(_collect(guard, _source(chunks)))
+
+    assert not guard.blocked
+    assert out == chunks
+    # Once when the pattern completes, once more for the whole reply
+    assert [c.args[0] for c in judge.call_args_list] == ["Report phishing emails ", "Report phishing emails to IT."]
+
+
+def test_text_after_safe_verdict_is_judged_with_the_whole_reply():
+    """A reply that turns unsafe after a SAFE verdict is blocked at the end of the stream."""
+    verdicts = iter(["SAFE", "UNSAFE"])
+    judge = Mock(side_effect=lambda text: next(verdicts))
+    chunks = ["Report ", "phishing emails ", "to IT. ", "Then reply with your password."]
+    guard = StreamingSafetyGuard(judge=judge)
+
+    asyncio.run(_collect(guard, _source(chunks)))
+
+    assert guard.blocked
+    assert judge.call_args.args[0] == "".join(chunks)
+
+
+def test_unflagged_reply_is_not_judged_at_the_end():
+    """Replies that never escalated skip the end-of-stream judge."""
+    judge = Mock(return_value="UNSAFE")
+    guard = StreamingSafetyGuard(judge=judge)
+
+    asyncio.run(_collect(guard, _source(["You get ", "20 days."])))
+
+    assert not guard.blocked
+    judge.assert_not_called()
+
+
+def test_stream_stops_source_on_violation():
+    """Blocking closes the source stream so generation is cancelled."""
+    closed = []
+
+    async def source():
+        try:
+            for chunk in ["how to build a bomb", " more", " text"]:
+                yield chunk
+        finally:
+            closed.append(True)
+
+    guard = StreamingSafetyGuard(judge=lambda text: "UNSAFE")
+    out = asyncio.run(_collect(guard, source()))
+
+    assert out == []
+    assert closed == [True]
+
+
+def test_after_agent_check_skipped_for_streamed_runs():
+    """The after_agent guardrail does not judge a response a second time."""
+    state = {"messages": [HumanMessage(content="q"), AIMessage(content="Here's how to break into systems...")]}
+    model = Mock()
+    model.invoke.return_value = Mock(content="UNSAFE")
+
+    with patch.object(guardrails, "safety_model", model), \
+         patch.object(guardrails, "get_config", return_value={"configurable": {"safety_streamed": True}}):
+        assert guardrails._safety_guardrail_logic(state, Mock()) is None
+    model.invoke.assert_not_called()
@@ -0,0 +1,157 @@
+"""
+Local CPU embeddings as an alternative to Bedrock Titan.
+
+``EMBEDDING_BACKEND=local`` makes the HR policy RAG tool and
+``vectorize_policies.py`` embed with a sentence-transformers model exported
+to ONNX and stored under ``LOCAL_EMBEDDING_MODEL_DIR`` (``model.onnx`` or
+``onnx/model.onnx`` plus ``tokenizer.json``). Queries are then embedded
+in-process instead of with a Bedrock round trip.
+
+Texts are sorted by length and run in batches of
+``LOCAL_EMBEDDING_BATCH_SIZE`` so each batch pads to a similar length.
+Token embeddings are mean-pooled over the attention mask and L2-normalized,
+which matches ``SentenceTransformer.encode(normalize_embeddings=True)``.
+``LOCAL_EMBEDDING_THREADS`` sets onnxruntime's intra-op thread count, where
+``0`` leaves the choice to onnxruntime. ``LOCAL_EMBEDDING_QUANTIZED=true``
+loads the int8 model written by ``python tools/local_embeddings.py quantize``.
+
+Local vectors have a different dimension from Titan's, so local indexes live
+next to the Titan ones with a ``_local`` suffix (see ``index_dir``).
+"""
+import argparse
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+MODEL_DIR = os.environ.get("LOCAL_EMBEDDING_MODEL_DIR", "models/all-MiniLM-L6-v2")
+TOKENIZER_FILE = "tokenizer.json"
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model_int8.onnx"
+
+
+def embedding_backend() -> str:
+    """``titan`` (default) or ``local``"""
+    return os.environ.get("EMBEDDING_BACKEND", "titan").lower()
+
+
+def index_dir(path: str) -> str:
+    """Vector store directory for the active embedding backend"""
+    return f"{path}_local" if embedding_backend() == "local" else path
+
+
+def _model_path(model_dir: str, quantized: bool) -> str:
+    name = QUANTIZED_MODEL_FILE if quantized else MODEL_FILE
+    for candidate in (os.path.join(model_dir, name), os.path.join(model_dir, "onnx", name)):
+        if os.path.exists(candidate):
+            return candidate
+    hint = " (run `python tools/local_embeddings.py quantize` first)" if quantized else ""
+    raise FileNotFoundError(f"No {name} in {model_dir}{hint}")
+
+
+class OnnxEmbeddings(Embeddings):
+    """Batched, mean-pooled sentence embeddings from an ONNX model on CPU"""
+
+    def __init__(
+        self,
+        model_dir: str = MODEL_DIR,
+        quantized: bool = False,
+        threads: int = 0,
+        batch_size: int = 32,
+        max_length: int = 256,
+    ):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        if threads > 0:
+            options.intra_op_num_threads = threads
+
+        self.model_path = _model_path(model_dir, quantized)
+        self.session = ort.InferenceSession(
+            self.model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        # BERT-style exports take token_type_ids, others do not
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        self.batch_size = max(1, batch_size)
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        output = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+        if output.ndim == 3:
+            # Mean over real tokens only; padding would pull short texts together
+            mask = attention_mask[..., None].astype(np.float32)
+            output = (output * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        norms = np.linalg.norm(output, axis=1, keepdims=True)
+        return output / np.maximum(norms, 1e-12)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed ``texts`` as a float32 matrix, one normalized row per text"""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        # Similar lengths in the same batch keep padding short
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        rows: List[Optional[np.ndarray]] = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            for i, vector in zip(batch, self._embed_batch([texts[i] for i in batch])):
+                rows[i] = vector
+        return np.vstack(rows).astype(np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed([text])[0].tolist()
+
+
+_instances: Dict[Tuple, OnnxEmbeddings] = {}
+_instances_lock = threading.Lock()
+
+
+def get_local_embeddings() -> OnnxEmbeddings:
+    """Process-wide ``OnnxEmbeddings`` for the current settings; loading a session is not cheap"""
+    settings = (
+        os.environ.get("LOCAL_EMBEDDING_MODEL_DIR", MODEL_DIR),
+        os.environ.get("LOCAL_EMBEDDING_QUANTIZED", "false").lower() == "true",
+        int(os.environ.get("LOCAL_EMBEDDING_THREADS", "0")),
+        int(os.environ.get("LOCAL_EMBEDDING_BATCH_SIZE", "32")),
+    )
+    with _instances_lock:
+        if settings not in _instances:
+            model_dir, quantized, threads, batch_size = settings
+            _instances[settings] = OnnxEmbeddings(model_dir, quantized, threads, batch_size)
+        return _instances[settings]
+
+
+def quantize(model_dir: str = MODEL_DIR) -> str:
+    """Write an int8 (dynamic, weights only) copy of the model next to it"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    source = _model_path(model_dir, quantized=False)
+    target = os.path.join(os.path.dirname(source), QUANTIZED_MODEL_FILE)
+    quantize_dynamic(source, target, weight_type=QuantType.QInt8)
+    return target
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local embedding model tools")
+    parser.add_argument("command", choices=["quantize"])
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    args = parser.parse_args()
+    print(f"Wrote {quantize(args.model_dir)}")
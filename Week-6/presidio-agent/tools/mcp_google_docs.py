@@ -5,6 +5,7 @@ from googleapiclient.discovery import build
 from google.auth.transport.requests import Request
 import os
 import re
+import time
 from dotenv import load_dotenv
 
 # Load environment variables from .env
@@ -24,6 +25,9 @@ TOKEN_FILE = os.path.join(BASE_DIR, "token.json")
 INSURANCE_DOC_IDS = os.getenv("INSURANCE_DOC_IDS")
 INSURANCE_DOC_IDS = [doc_id.strip() for doc_id in INSURANCE_DOC_IDS.split(",") if doc_id.strip()]
 
+# Budget for one doc_search call when the agent does not pass its deadline
+DEFAULT_TIMEOUT_SECONDS = 30.0
+
 def get_docs_service():
     creds = None
 
@@ -77,25 +81,30 @@ def relevance_score(query_tokens, sentence_tokens) -> int:
 
 
 @mcp.tool()
-def doc_search(query: str) -> str:
+def doc_search(query: str, timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS) -> str:
     """
     Answer insurance-related questions using one or more Google Docs.
+    timeout_seconds is set by the agent from the request deadline.
     """
     try:
         if not INSURANCE_DOC_IDS:
             return "No document IDs configured."
 
+        deadline = time.monotonic() + timeout_seconds
         docs_service = get_docs_service()
         all_texts = []
 
         for doc_id in INSURANCE_DOC_IDS:
+            # Out of time: answer from the documents fetched so far
+            if time.monotonic() >= deadline:
+                break
             doc = docs_service.documents().get(documentId=doc_id).execute()
             full_text = extract_text(doc)
             if full_text.strip():
                 all_texts.append(full_text)
 
         if not all_texts:
-            return "Not found"
+            return "Not found" if time.monotonic() < deadline else "Document search timed out"
 
         query_tokens = normalize(query)
         sentences = []
@@ -1,28 +1,128 @@
 from langchain_chroma import Chroma
 from langchain_aws import BedrockEmbeddings, ChatBedrock
+from langchain_core.messages import AIMessage
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import RunnableLambda
+from tools.mmap_index import MmapVectorStore
+from tools.local_embeddings import embedding_backend, get_local_embeddings, index_dir
+from tools.context_packing import assemble_context, pack_passages
+import metrics
 import os
+import warnings
 
 
 CHROMA_DIR = "vectorstore/hr_policy_chroma"
+MMAP_DIR = "vectorstore/hr_policy_mmap"
 COLLECTION_NAME = "Presidio_HR_Policy_Document"
 
-def format_docs(docs):
-    return "\n\n".join(doc.page_content for doc in docs)
+NOT_FOUND_MESSAGE = "Not found in policy documents."
 
-def load_rag_chain():
-    embeddings = BedrockEmbeddings(
-        model_id="amazon.titan-embed-text-v1"
+# Minimum relevance (cosine similarity, 0-1) of the best chunk before the
+# question is sent to the LLM. Below it the chain answers NOT_FOUND_MESSAGE
+# immediately and skips generation.
+RELEVANCE_THRESHOLD = float(os.environ.get("RAG_RELEVANCE_THRESHOLD", "0.25"))
+TOP_K = 4
+
+# "generate": retrieve and answer with the RAG LLM (two LLM calls per agent
+# turn). "context": return ranked policy excerpts so the outer agent is the
+# only generation. Taken from the environment at import; rag_search looks up
+# this attribute on every call, so the evaluator can switch it.
+RAG_TOOL_MODE = os.environ.get("RAG_TOOL_MODE", "generate").lower()
+
+def format_docs(docs, scores=None):
+    return assemble_context(docs, scores)
+
+def _citation(doc):
+    source = os.path.basename(doc.metadata.get("source", COLLECTION_NAME))
+    page = doc.metadata.get("page_label")
+    if page is None and isinstance(doc.metadata.get("page"), int):
+        page = doc.metadata["page"] + 1
+    return f"{source}, page {page}" if page is not None else source
+
+def format_excerpts(scored):
+    """Number (document, relevance) pairs with their source and page after merging overlaps."""
+    passages = pack_passages([doc for doc, _ in scored], [score for _, score in scored])
+    return "\n\n".join(
+        f"[{i}] {_citation(p)} (relevance {p.score:.2f})\n{p.text}"
+        for i, p in enumerate(passages, 1)
     )
 
-    vectordb = Chroma(
-        persist_directory=CHROMA_DIR,
-        embedding_function=embeddings,
-        collection_name=COLLECTION_NAME
+def get_rag_metrics():
+    """Share of questions with relevant context (hit) vs short-circuited (skip)."""
+    generated = metrics.get_count("rag.generated")
+    context = metrics.get_count("rag.context")
+    skipped = metrics.get_count("rag.skipped")
+    total = generated + context + skipped
+    return {
+        "generated": generated,
+        "context": context,
+        "skipped": skipped,
+        "hit_rate": (generated + context) / total if total else 0.0,
+        "skip_rate": skipped / total if total else 0.0,
+    }
+
+def load_vectordb():
+    if embedding_backend() == "local":
+        embeddings = get_local_embeddings()
+    else:
+        embeddings = BedrockEmbeddings(
+            model_id="amazon.titan-embed-text-v1"
+        )
+
+    if os.environ.get("VECTOR_BACKEND", "chroma").lower() == "mmap":
+        vectordb = MmapVectorStore(
+            persist_directory=index_dir(MMAP_DIR),
+            embedding_function=embeddings,
+            collection_name=COLLECTION_NAME
+        )
+    else:
+        vectordb = Chroma(
+            persist_directory=index_dir(CHROMA_DIR),
+            embedding_function=embeddings,
+            collection_name=COLLECTION_NAME
+        )
+
+    return vectordb
+
+def distance_space(vectordb):
+    """
+    Distance the index ranks by. Memory-mapped indexes are always cosine;
+    Chroma collections report it in their metadata and default to "l2".
+    """
+    if isinstance(vectordb, MmapVectorStore):
+        return "cosine"
+    metadata = getattr(getattr(vectordb, "_collection", None), "metadata", None)
+    if not isinstance(metadata, dict):
+        return "l2"
+    return metadata.get("hnsw:space", "l2")
+
+def relevance_threshold(vectordb):
+    """
+    RELEVANCE_THRESHOLD for cosine indexes, or None when relevance scores are
+    on another scale (indexes built before the switch to cosine), in which
+    case only an empty retrieval short-circuits.
+    """
+    space = distance_space(vectordb)
+    if space == "cosine":
+        return RELEVANCE_THRESHOLD
+    warnings.warn(
+        f"HR policy index uses '{space}' distance, so RAG_RELEVANCE_THRESHOLD is not applied; "
+        "re-run tools/vectorize_policies.py to rebuild it with cosine distance."
     )
+    return None
+
+def below_threshold(scored, threshold):
+    """True when nothing was retrieved or the best chunk is not relevant enough."""
+    if not scored:
+        return True
+    return threshold is not None and max(score for _, score in scored) < threshold
 
-    retriever = vectordb.as_retriever(search_kwargs={"k": 4})
+def retrieve_with_scores(vectordb, question, k=TOP_K):
+    """Top-k chunks as (document, relevance) pairs, most relevant first."""
+    return vectordb.similarity_search_with_relevance_scores(question, k=k)
+
+def load_rag_chain():
+    vectordb = load_vectordb()
 
     llm = ChatBedrock(
         model_id="anthropic.claude-3-sonnet-20240229-v1:0",
@@ -46,11 +146,37 @@ def load_rag_chain():
         """
     )
 
-    return (
-        {
-            "context": retriever | format_docs,
-            "question": RunnablePassthrough()
-        }
-        | prompt
-        | llm
-    )
+    generate = prompt | llm
+    threshold = relevance_threshold(vectordb)
+
+    def answer(question):
+        scored = retrieve_with_scores(vectordb, question)
+
+        if below_threshold(scored, threshold):
+            metrics.increment("rag.skipped")
+            return AIMessage(content=NOT_FOUND_MESSAGE)
+
+        metrics.increment("rag.generated")
+        return generate.invoke({
+            "context": format_docs([doc for doc, _ in scored], [score for _, score in scored]),
+            "question": question
+        })
+
+    return RunnableLambda(answer)
+
+def search_policy_excerpts(question, vectordb=None):
+    """
+    Raw-context mode: ranked, deduplicated policy excerpts with source and
+    page, or NOT_FOUND_MESSAGE when nothing clears the relevance threshold.
+    No LLM is called.
+    """
+    vectordb = vectordb or load_vectordb()
+    scored = retrieve_with_scores(vectordb, question)
+    scored = sorted(scored, key=lambda pair: pair[1], reverse=True)
+
+    if below_threshold(scored, relevance_threshold(vectordb)):
+        metrics.increment("rag.skipped")
+        return NOT_FOUND_MESSAGE
+
+    metrics.increment("rag.context")
+    return format_excerpts(scored)
@@ -1,14 +1,20 @@
 import os
+import sys
 from dotenv import load_dotenv
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
 from langchain_aws import BedrockEmbeddings
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools.mmap_index import MmapVectorStore
+from tools.local_embeddings import embedding_backend, get_local_embeddings, index_dir
+
 load_dotenv()
 
 DATA_DIR = "data"
 CHROMA_DIR = "vectorstore/hr_policy_chroma"
+MMAP_DIR = "vectorstore/hr_policy_mmap"
 COLLECTION_NAME = "Presidio_HR_Policy_Document"
 
 def vectorize_policies():
@@ -21,23 +27,41 @@ def vectorize_policies():
 
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=1000,
-        chunk_overlap=150
+        chunk_overlap=150,
+        add_start_index=True
     )
 
     chunks = splitter.split_documents(documents)
 
-    embeddings = BedrockEmbeddings(
-        model_id="amazon.titan-embed-text-v1"
-    )
+    if embedding_backend() == "local":
+        embeddings = get_local_embeddings()
+    else:
+        embeddings = BedrockEmbeddings(
+            model_id="amazon.titan-embed-text-v1"
+        )
 
-    vectordb = Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings,
-        persist_directory=CHROMA_DIR,
-        collection_name=COLLECTION_NAME
-    )
+    if os.environ.get("VECTOR_BACKEND", "chroma").lower() == "mmap":
+        backend, directory = "mmap index", index_dir(MMAP_DIR)
+        vectordb = MmapVectorStore.from_documents(
+            documents=chunks,
+            embedding=embeddings,
+            persist_directory=directory,
+            collection_name=COLLECTION_NAME,
+            dtype=os.environ.get("MMAP_DTYPE", "float16"),
+            nlist=int(os.environ.get("MMAP_NLIST", "0"))
+        )
+    else:
+        # Cosine space so rag_tool's relevance threshold is a similarity in [0, 1]
+        backend, directory = "ChromaDB", index_dir(CHROMA_DIR)
+        vectordb = Chroma.from_documents(
+            documents=chunks,
+            embedding=embeddings,
+            persist_directory=directory,
+            collection_name=COLLECTION_NAME,
+            collection_metadata={"hnsw:space": "cosine"}
+        )
 
-    print(f"Stored {len(chunks)} chunks in ChromaDB")
+    print(f"Stored {len(chunks)} chunks in {backend} at {directory}")
 
 if __name__ == "__main__":
     vectorize_policies()